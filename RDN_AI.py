@@ -1,31 +1,97 @@
 import os
 import csv
 import time
+import hashlib
+import threading
 import joblib
 import numpy as np
-from tensorflow.keras.models import load_model
-from sklearn.model_selection import train_test_split
+from profiling import maybe_profile
+from lite_inference import LITE_PRECISIONS, load_lite, LiteScaler, LiteEncoder
+from multifidelity import MF_MODEL_PATH, MultiFidelityForward, forward_rows
+from patch_analytic import analytic_inverse, patch_resonance, valid_targets
+from spectrum_surrogate import SPECTRUM_MODEL_PATH
 
 # adjust paths to your models directory if needed
 FORWARD_MODEL_PATH = r"models\forward-predict\forward_model.h5"
 FORWARD_SCALER_PATH = r"models\forward-predict\forward_scaler.save"
 FORWARD_ENCODER_PATH = r"models\forward-predict\forward_encoder.save"
 
+# optional seed ensemble written by `forward-predict.py --ensemble N` (stacked weights, see stacked_mlp.py)
+FORWARD_ENSEMBLE_PATH = r"models\forward-predict\forward_ensemble.npz"
+
 INVERSE_MODEL_PATH = r"models\inverse-predict\inverse_model.h5"
 INVERSE_SCALER_PATH = r"models\inverse-predict\inverse_scaler.save"
 INVERSE_ENCODER_PATH = r"models\inverse-predict\inverse_encoder.save"
 
+# numpy-only reduced precision copies written by ai_training/export-lite.py (see lite_inference.py)
+FORWARD_LITE_PATH = r"models\forward-predict\forward_lite_{precision}.npz"
+INVERSE_LITE_PATH = r"models\inverse-predict\inverse_lite_{precision}.npz"
+INFERENCE_MODE = os.environ.get("RDN_INFERENCE_MODE", "keras")  # "keras", "float16" or "int8"
+# "nn": forward network trained on dataset.csv; "multifidelity": analytic model x residual net (multifidelity.py)
+FORWARD_MODE = os.environ.get("RDN_FORWARD_MODE", "nn")
+# closed-form inverse (patch_analytic.analytic_inverse): "fallback" only when the models are missing,
+# "seed" also starts the optimizers from it, "fast" answers predict_input/optimize_parameters with it
+ANALYTIC_MODE = os.environ.get("RDN_ANALYTIC_MODE", "fallback")
+
 FEEDBACK_FILE = "ai_feedback_log.csv"
+# one lock per process for the feedback CSV and retraining: every TrainedAI instance (see
+# serving.InferencePool) appends through it, so rows from concurrent sessions never interleave
+FEEDBACK_LOCK = threading.Lock()
+RETRAIN_LOCK = threading.Lock()
 RETRAIN_MIN_SAMPLES = 12        # retrain when we have at least this many feedback rows
 RETRAIN_ON_EVERY = 8           # retrain every N new entries after min reached
 AUTOCORRECT_DAMPING = 0.6      # damping for auto-correction (0..1). 1=full correction, 0=none
+AUTOCORRECT_MODE = "damped"    # "damped" (ratio scaling) or "broyden" (uses every iterate of the current target)
+AUTOCORRECT_MAX_STEP = 0.25    # broyden trust region: max |log change| of any corrected dimension per step
+# clip limits applied to corrected params, by index in the numeric vector
+AUTOCORRECT_BOUNDS = {0: (0.001, 0.12), 1: (0.001, 0.12), 5: (0.0005, 0.01)}  # patch_W, patch_L, feed_width
+# Initial d log(Fr, BW) / d log(patch_W, patch_L, feed_width) for the broyden mode:
+# Fr ~ 1/L, BW ~ h/W * Fr, feed width widens BW weakly (same sqrt law as the damped mode).
+AUTOCORRECT_JACOBIAN0 = np.array([[0.0, -1.0, 0.0],
+                                  [-1.0, -1.0, 0.5]])
+ENSEMBLE_SKIP_FREQ_STD = 0.01  # GHz; a design whose ensemble std is below both of these ...
+ENSEMBLE_SKIP_BW_STD = 5.0     # MHz; ... and whose mean is within tolerance can skip the solver
+EI_SAMPLES = 256               # Monte Carlo draws per candidate for expected improvement
+
+# optimizer search space (also used by the active-learning sampler)
+PARAM_NAMES = ['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m', 'feed_type']
+PARAM_X0 = [0.03, 0.03, 3.0, 0.001, 4.0, 0.002, 0]  # reasonable defaults
+PARAM_BOUNDS = [(0.001, 0.1), (0.001, 0.1), (1.0, 10.0), (0.0005, 0.003), (2.0, 10.0), (0.001, 0.006), (0, 3)]
+
+def design_objective(freq_pred_ghz, bw_pred_mhz, desired_freq_ghz, desired_bw_mhz):
+    """Weighted squared error minimised by optimize_parameters (works on arrays)."""
+    freq_error = (freq_pred_ghz - desired_freq_ghz) / 10.0
+    bw_error = (bw_pred_mhz - desired_bw_mhz) / 100.0
+    return 10 * freq_error**2 + 1 * bw_error**2
+
+def feedback_header(num_params=6):
+    header = ["timestamp", "target_Fr_GHz", "target_BW_MHz"]
+    header += [f"param_{i}" for i in range(num_params)]
+    header += ["feed_type_label", "actual_Fr_GHz", "actual_BW_MHz", "S11_dB"]
+    return header
 
+def feedback_row(target_Fr, target_BW, predicted_params, feed_type_label, actual_Fr, actual_BW, S11, timestamp=None):
+    """One FEEDBACK_FILE row (shared by log_feedback and the job queue's central write-back)."""
+    row = [time.time() if timestamp is None else float(timestamp), float(target_Fr), float(target_BW)]
+    row += [float(x) for x in predicted_params[:6]]
+    row += [str(feed_type_label), float(actual_Fr), float(actual_BW), float(S11)]
+    return row
+
+@maybe_profile
 class TrainedAI:
-    def __init__(self, models_dir="models"):
+    def __init__(self, models_dir="models", inference_mode=None, forward_mode=None, analytic_mode=None):
         print("AI Initialized")
+        # "float16"/"int8" serve the surrogates with numpy only, TensorFlow is never imported
+        self.inference_mode = inference_mode or INFERENCE_MODE
+        self.forward_mode = forward_mode or FORWARD_MODE
+        self.analytic_mode = analytic_mode or ANALYTIC_MODE
         # lazy-load models when needed
         self._forward_loaded = False
+        self._forward_files = []   # files behind the loaded forward model (forward_model_version)
+        self._version = (None, None)
         self._inverse_loaded = False
+        self._ensemble = None
+        self._spectrum = None
         self._load_forward()
         self._load_inverse()
         # count new feedbacks since last retrain (persistent across runs if file exists)
@@ -38,14 +104,38 @@ class TrainedAI:
                 self._feedback_count = 0
 
     # ---------- model load helpers ----------
+    def _load_lite(self, path_template):
+        if self.inference_mode not in LITE_PRECISIONS:
+            return None
+        path = path_template.format(precision=self.inference_mode)
+        if not os.path.exists(path):
+            print(f"[AI] {path} not found, falling back to the Keras model")
+            return None
+        return load_lite(path)
+
     def _load_forward(self):
         if self._forward_loaded:
             return
-        if os.path.exists(FORWARD_MODEL_PATH):
+        if self.forward_mode == "multifidelity" and os.path.exists(MF_MODEL_PATH):
+            # takes unscaled inputs, so plug in an identity scaler
+            self.model = MultiFidelityForward.load(MF_MODEL_PATH)
+            self.encoder = LiteEncoder([0, 1, 2, 3])
+            self.scaler = LiteScaler(np.zeros(10), np.ones(10))
+            self._forward_loaded = True
+            self._forward_files = [MF_MODEL_PATH]
+            return
+        lite = self._load_lite(FORWARD_LITE_PATH)
+        if lite is not None:
+            self.model, self.scaler, self.encoder = lite
+            self._forward_loaded = True
+            self._forward_files = [FORWARD_LITE_PATH.format(precision=self.inference_mode)]
+        elif os.path.exists(FORWARD_MODEL_PATH):
+            from tensorflow.keras.models import load_model
             self.model = load_model(FORWARD_MODEL_PATH)
             self.scaler = joblib.load(FORWARD_SCALER_PATH)
             self.encoder = joblib.load(FORWARD_ENCODER_PATH)
             self._forward_loaded = True
+            self._forward_files = [FORWARD_MODEL_PATH, FORWARD_SCALER_PATH, FORWARD_ENCODER_PATH]
         else:
             self.model = None
             self.scaler = None
@@ -55,7 +145,12 @@ class TrainedAI:
     def _load_inverse(self):
         if self._inverse_loaded:
             return
-        if os.path.exists(INVERSE_MODEL_PATH):
+        lite = self._load_lite(INVERSE_LITE_PATH)
+        if lite is not None:
+            self.inv_model, self.inv_scaler, self.inv_encoder = lite
+            self._inverse_loaded = True
+        elif os.path.exists(INVERSE_MODEL_PATH):
+            from tensorflow.keras.models import load_model
             self.inv_model = load_model(INVERSE_MODEL_PATH)
             self.inv_scaler = joblib.load(INVERSE_SCALER_PATH)
             self.inv_encoder = joblib.load(INVERSE_ENCODER_PATH)
@@ -66,15 +161,23 @@ class TrainedAI:
             self.inv_encoder = None
             self._inverse_loaded = False
 
+    def _load_ensemble(self):
+        if self._ensemble is None and os.path.exists(FORWARD_ENSEMBLE_PATH):
+            from stacked_mlp import StackedMLP
+            self._ensemble = StackedMLP.load(FORWARD_ENSEMBLE_PATH)
+        return self._ensemble is not None
+
+    def has_ensemble(self):
+        self._load_forward()
+        # the ensemble shares the forward network's scaler, which the multifidelity model replaces
+        return self._forward_loaded and self.forward_mode != "multifidelity" and self._load_ensemble()
+
     # ---------- logging ----------
     def _ensure_feedback_header(self, num_params=6):
         if not os.path.exists(FEEDBACK_FILE):
-            header = ["timestamp", "target_Fr_GHz", "target_BW_MHz"]
-            header += [f"param_{i}" for i in range(num_params)]
-            header += ["feed_type_label", "actual_Fr_GHz", "actual_BW_MHz", "S11_dB"]
             with open(FEEDBACK_FILE, "w", newline="") as f:
                 writer = csv.writer(f)
-                writer.writerow(header)
+                writer.writerow(feedback_header(num_params))
 
     def log_feedback(self, target_Fr, target_BW, predicted_params, feed_type_label, actual_Fr, actual_BW, S11):
         """
@@ -83,26 +186,35 @@ class TrainedAI:
         feed_type_label: string label from encoder/categories_
         """
         try:
-            self._ensure_feedback_header(num_params=len(predicted_params))
-            row = [time.time(), float(target_Fr), float(target_BW)]
-            row += [float(x) for x in predicted_params[:6]]
-            row += [str(feed_type_label), float(actual_Fr), float(actual_BW), float(S11)]
-            with open(FEEDBACK_FILE, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
-            self._feedback_count += 1
+            row = feedback_row(target_Fr, target_BW, predicted_params, feed_type_label, actual_Fr, actual_BW, S11)
+            with FEEDBACK_LOCK:
+                self._ensure_feedback_header(num_params=len(predicted_params))
+                with open(FEEDBACK_FILE, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(row)
+                self._feedback_count += 1
         except Exception as e:
             print("[AI][log_feedback] failed:", e)
 
     # ---------- auto-correction ----------
-    def autocorrect_params(self, predicted_params, desired_Fr, actual_Fr, desired_BW=None, actual_BW=None):
+    def autocorrect_params(self, predicted_params, desired_Fr, actual_Fr, desired_BW=None, actual_BW=None,
+                           history=None, mode=None):
         """
         Simple physics-guided correction:
         - Resonant frequency f ~ 1/(2*L*sqrt(eps_eff)), so L ∝ 1/f.
           We'll scale patch_L and patch_W by ratio r = actual/desired (damped).
         - Bandwidth correction: weak heuristic scaling of feed_width depending on BW ratio.
+        With mode="broyden" (or AUTOCORRECT_MODE) and a history of
+        (numeric_params, actual_Fr, actual_BW) tuples for this target, oldest first and
+        including the current iterate, a quasi-Newton step is taken instead (see _broyden_correct).
         Returns corrected_params list (same length as predicted_params).
         """
+        mode = mode or AUTOCORRECT_MODE
+        if mode == "broyden" and history:
+            try:
+                return self._broyden_correct(history, desired_Fr, desired_BW)
+            except Exception as e:
+                print("[AI][autocorrect] broyden step failed, falling back to damped:", e)
         params = predicted_params[:]  # copy
         try:
             # frequency ratio: if actual < desired => ratio < 1 => reduce length to raise freq
@@ -124,26 +236,77 @@ class TrainedAI:
                 params[5] = params[5] * ( (1-damp) + damp * feed_corr )
 
             # keep values in sane bounds (you can tune these)
-            params[0] = float(np.clip(params[0], 0.001, 0.12))  # patch_W
-            params[1] = float(np.clip(params[1], 0.001, 0.12))  # patch_L
-            params[5] = float(np.clip(params[5], 0.0005, 0.01)) # feed_width
+            self._clip_corrected(params)
         except Exception as e:
             print("[AI][autocorrect] failed:", e)
         return params
 
+    def _clip_corrected(self, params):
+        for i, (lo, hi) in AUTOCORRECT_BOUNDS.items():
+            params[i] = float(np.clip(params[i], lo, hi))
+        return params
+
+    def _broyden_correct(self, history, desired_Fr, desired_BW):
+        """
+        Quasi-Newton correction in log space, u = log(patch_W, patch_L, feed_width) and
+        y = log(Fr, BW). The Jacobian starts from the physics prior AUTOCORRECT_JACOBIAN0
+        and gets a Broyden rank-1 update for every consecutive pair of simulated iterates,
+        so each new simulation refines the local simulator model instead of being forgotten.
+        The step is taken from the best iterate so far, min-norm, limited to AUTOCORRECT_MAX_STEP.
+        """
+        idx = [0, 1, 5]
+        U = np.log([[float(p[i]) for i in idx] for p, _, _ in history])
+        fr = np.array([float(h[1]) for h in history])
+        bw = np.array([float(h[2]) if h[2] is not None else 0.0 for h in history])
+        use_bw = desired_BW is not None and float(desired_BW) > 0
+        bw_ok = bw > 0
+        Y = np.column_stack([np.log(fr), np.log(np.where(bw_ok, bw, 1.0))])
+
+        J = AUTOCORRECT_JACOBIAN0.copy()
+        for k in range(1, len(U)):
+            du = U[k] - U[k-1]
+            denom = float(du @ du)
+            if denom < 1e-12:
+                continue
+            rows = [0, 1] if (bw_ok[k] and bw_ok[k-1]) else [0]
+            J[rows] += np.outer(Y[k, rows] - Y[k-1, rows] - J[rows] @ du, du) / denom
+
+        # distance to target of every iterate (same weighting as optimize_parameters)
+        err = 10 * ((fr - float(desired_Fr)) / 10.0)**2
+        if use_bw:
+            err = err + np.where(bw_ok, ((bw - float(desired_BW)) / 100.0)**2, np.inf)
+        base = int(np.argmin(err))
+
+        rows = [0, 1] if (use_bw and bw_ok[base]) else [0]
+        target = np.log([float(desired_Fr), float(desired_BW) if use_bw else 1.0])
+        residual = target[rows] - Y[base, rows]
+        step = np.linalg.lstsq(J[rows], residual, rcond=None)[0]
+        largest = np.max(np.abs(step))
+        if largest > AUTOCORRECT_MAX_STEP:
+            step *= AUTOCORRECT_MAX_STEP / largest
+
+        params = [float(x) for x in history[base][0]]
+        for j, i in enumerate(idx):
+            params[i] = float(np.exp(U[base, j] + step[j]))
+        return self._clip_corrected(params)
+
     # ---------- retraining ----------
     def retrain_if_needed(self, min_samples=RETRAIN_MIN_SAMPLES, retrain_every=RETRAIN_ON_EVERY):
         """
         Retrain forward model on feedback CSV (predictors: target + params -> actual outputs)
         We'll train a small MLPRegressor from scikit-learn for robustness if keras unavailable for quick retrain.
         This function is synchronous and may take time depending on sample count.
+        Only one retrain runs at a time per process; concurrent callers skip it.
         """
+        if not RETRAIN_LOCK.acquire(blocking=False):
+            return False
         try:
             if not os.path.exists(FEEDBACK_FILE):
                 return False
             import pandas as pd
-            df = pd.read_csv(FEEDBACK_FILE)
-            # drop rows with NaN
+            with FEEDBACK_LOCK:
+                df = pd.read_csv(FEEDBACK_FILE)
+            # drop rows with NaN (exploration rows from active_learning carry no target)
             df = df.dropna()
             n = len(df)
             if n < min_samples:
@@ -203,16 +366,35 @@ class TrainedAI:
             with open(meta_path, "w") as f:
                 f.write(str(n))
             print(f"[AI][retrain] retrained on {n} feedback samples and saved ai_quick_retrain.save")
+
+            # multifidelity mode: the feedback rows are the high-fidelity data for the residual net
+            if self.forward_mode == "multifidelity":
+                from active_learning import load_feedback_designs
+                with FEEDBACK_LOCK:
+                    X_hf, y_hf = load_feedback_designs(FEEDBACK_FILE)
+                if len(X_hf) >= min_samples:
+                    mf = MultiFidelityForward().fit(forward_rows(X_hf[:, :6], X_hf[:, 6]), y_hf)
+                    mf.save(MF_MODEL_PATH)
+                    self.model = mf
+                    self.encoder = LiteEncoder([0, 1, 2, 3])
+                    self.scaler = LiteScaler(np.zeros(10), np.ones(10))
+                    self._forward_loaded = True
+                    self._forward_files = [MF_MODEL_PATH]
+                    print(f"[AI][retrain] refitted multifidelity residual on {len(X_hf)} rows")
             return True
         except Exception as e:
             print("[AI][retrain_if_needed] failed:", e)
             return False
+        finally:
+            RETRAIN_LOCK.release()
 
     # ---------- your existing methods updated ----------
     def predict_input(self, desired_freq_ghz, desired_bw_mhz):
         self._load_inverse()
-        if not self._inverse_loaded:
-            raise RuntimeError("Inverse model not found.")
+        if self.analytic_mode == "fast" or not self._inverse_loaded:
+            if not self._inverse_loaded:
+                print("[AI] inverse model not found, using the analytic inverse")
+            return self._analytic_design(desired_freq_ghz, desired_bw_mhz)["dict"]
         input_vec = np.array([[desired_freq_ghz, desired_bw_mhz]])
         input_scaled = self.inv_scaler.transform(input_vec)
         pred = self.inv_model.predict(input_scaled)[0]
@@ -248,16 +430,118 @@ class TrainedAI:
         bw_pred_mhz = float(pred[0][1])
         return freq_pred_ghz, bw_pred_mhz
 
+    def predict_output_batch(self, numeric, feed_types):
+        """
+        Forward prediction for many designs in one pass. numeric: (n, 6)
+        [W,L,eps_eff,substrate_h,eps_r,feed_width]; feed_types: int or (n,).
+        Returns (n, 2) [Fr_GHz, BW_MHz]. Without a forward model (or in analytic "fast"
+        mode) the closed-form patch model answers instead, as in optimize_parameters.
+        """
+        self._load_forward()
+        numeric = np.atleast_2d(np.asarray(numeric, dtype=float))
+        if self.analytic_mode == "fast" or not self._forward_loaded:
+            feed_types = np.broadcast_to(np.asarray(feed_types, dtype=int), (len(numeric),))
+            return np.column_stack(patch_resonance(numeric[:, 0], numeric[:, 1], numeric[:, 4], numeric[:, 3],
+                                                   feed_types))
+        return self._predict_forward_batch(self._forward_inputs(numeric, feed_types))[:, :2]
+
+    def forward_model_version(self):
+        """
+        Short content hash of whatever answers predict_output_batch: the loaded forward
+        model files, or the analytic model's source. Changes whenever the model is
+        replaced or refitted, so it keys caches of surrogate results (pareto.py).
+        The hash is recomputed only when a file's size or mtime changes.
+        """
+        self._load_forward()
+        if self.analytic_mode == "fast" or not self._forward_loaded:
+            import patch_analytic
+            files, tag = [patch_analytic.__file__], "analytic"
+        else:
+            files, tag = self._forward_files, f"{self.forward_mode}-{self.inference_mode}"
+        stamp = (tag,) + tuple((p, os.path.getsize(p), os.path.getmtime(p)) for p in files)
+        if self._version[0] == stamp:
+            return self._version[1]
+        h = hashlib.sha256(tag.encode())
+        for path in files:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+        self._version = (stamp, f"{tag}-{h.hexdigest()[:12]}")
+        return self._version[1]
+
+    # ---------- full S11 curve ----------
+    def predict_spectrum(self, numeric, feed_types, threshold=-10.0):
+        """
+        S11 curves of many designs in one pass (spectrum_surrogate.py, trained by
+        ai_training/spectrum-predict.py): returns (grid_ghz, s11_db (n, G), band metrics dict).
+        """
+        if self._spectrum is None:
+            if not os.path.exists(SPECTRUM_MODEL_PATH):
+                raise RuntimeError("Spectrum surrogate not found.")
+            from spectrum_surrogate import SpectrumSurrogate
+            self._spectrum = SpectrumSurrogate.load(SPECTRUM_MODEL_PATH)
+        from spectrum_surrogate import band_metrics
+        curves = self._spectrum.predict(forward_rows(numeric, feed_types))
+        return self._spectrum.grid, curves, band_metrics(self._spectrum.grid, curves, threshold)
+
+    # ---------- ensemble uncertainty ----------
+    def _forward_inputs(self, numeric, feed_types):
+        numeric = np.atleast_2d(np.asarray(numeric, dtype=float))[:, :6]
+        feed_types = np.broadcast_to(np.asarray(feed_types, dtype=int), (len(numeric),)).reshape(-1, 1)
+        onehot = self.encoder.transform(feed_types)
+        return self.scaler.transform(np.hstack([numeric, onehot]))
+
+    def predict_output_dist(self, numeric, feed_types):
+        """
+        Ensemble prediction for a batch of designs in one stacked-weights call.
+        numeric: (n, 6) [W,L,eps_eff,substrate_h,eps_r,feed_width]; feed_types: int or (n,).
+        Returns (mean, var), each (n, 2) as [Fr_GHz, BW_MHz].
+        """
+        if not self.has_ensemble():
+            raise RuntimeError("Forward ensemble not found.")
+        pred = self._ensemble.predict(self._forward_inputs(numeric, feed_types))
+        return pred.mean(axis=0), pred.var(axis=0)
+
+    def surrogate_is_confident(self, mean, var, desired_freq_ghz, desired_bw_mhz, freq_tolerance=0.03, bw_tolerance=15):
+        """True when one design's ensemble mean is within tolerance and its spread is below the skip thresholds."""
+        std = np.sqrt(var)
+        return bool(abs(mean[0] - desired_freq_ghz) < freq_tolerance and abs(mean[1] - desired_bw_mhz) < bw_tolerance
+                    and std[0] < ENSEMBLE_SKIP_FREQ_STD and std[1] < ENSEMBLE_SKIP_BW_STD)
+
+    def jitter_candidates(self, numeric, n=32, scale=0.05, seed=0):
+        """The design itself plus n log-normal perturbations of patch_W, patch_L and feed_width."""
+        rng = np.random.default_rng(seed)
+        cands = np.tile(np.asarray(numeric[:6], dtype=float), (n + 1, 1))
+        for i in [0, 1, 5]:
+            lo, hi = PARAM_BOUNDS[i]
+            cands[1:, i] = np.clip(cands[1:, i] * np.exp(rng.normal(0, scale, n)), lo, hi)
+        return cands
+
+    def rank_candidates(self, desired_freq_ghz, desired_bw_mhz, numeric, feed_types, best_objective=None, seed=0):
+        """
+        Expected improvement of design_objective under the ensemble's Gaussian prediction,
+        estimated with EI_SAMPLES draws for all candidates at once. best_objective defaults
+        to the best predicted mean. Returns (order best-first, ei, mean, var).
+        """
+        mean, var = self.predict_output_dist(numeric, feed_types)
+        rng = np.random.default_rng(seed)
+        draws = mean + np.sqrt(var) * rng.standard_normal((EI_SAMPLES, 1, 2))
+        obj = design_objective(draws[..., 0], draws[..., 1], desired_freq_ghz, desired_bw_mhz)
+        if best_objective is None:
+            best_objective = design_objective(mean[:, 0], mean[:, 1], desired_freq_ghz, desired_bw_mhz).min()
+        ei = np.maximum(best_objective - obj, 0.0).mean(axis=0)
+        return np.argsort(-ei), ei, mean, var
+
     def optimize_parameters(self, desired_freq_ghz, desired_bw_mhz, **fixed_params):
         """
         Keep compatibility with your previous optimize_parameters but make it return
         the numeric parameter vector (not the label) so we can log + autocorrect easily.
         """
         # same param order as your original code
-        param_names = ['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m', 'feed_type']
+        param_names = PARAM_NAMES
         # defaults similar to yours
-        x0 = [0.03, 0.03, 3.0, 0.001, 4.0, 0.002, 0]  # reasonable defaults
-        bounds = [(0.001, 0.1), (0.001, 0.1), (1.0, 10.0), (0.0005, 0.003), (2.0, 10.0), (0.001, 0.006), (0, 3)]
+        x0 = list(PARAM_X0)
+        bounds = PARAM_BOUNDS
         fixed_indices = {i: fixed_params[n] for i, n in enumerate(param_names) if n in fixed_params}
         variable_indices = [i for i in range(len(param_names)) if i not in fixed_indices]
         x0_var = [x0[i] for i in variable_indices]
@@ -265,14 +549,17 @@ class TrainedAI:
 
         # lazy load forward model
         self._load_forward()
-        if not self._forward_loaded:
-            raise RuntimeError("Forward model missing.")
+        if self.analytic_mode == "fast" or not self._forward_loaded:
+            if not self._forward_loaded:
+                print("[AI] forward model not found, using the analytic inverse")
+            return self._analytic_design(desired_freq_ghz, desired_bw_mhz, **fixed_params)
+        if self.analytic_mode == "seed":
+            seed = self._analytic_design(desired_freq_ghz, desired_bw_mhz, **fixed_params)
+            seed_params = seed["numeric"] + [seed["feed_type_index"]]
+            x0_var = [float(np.clip(seed_params[i], *bounds[i])) for i in variable_indices]
 
         import scipy.optimize
 
-        freq_norm = 10.0  # GHz
-        bw_norm = 100.0   # MHz
-
         def objective(x_var):
             params = x0[:]
             for idx, val in zip(variable_indices, x_var):
@@ -289,9 +576,7 @@ class TrainedAI:
             pred = self.model.predict(input_scaled)
             freq_pred_ghz = float(pred[0][0])
             bw_pred_mhz = float(pred[0][1])
-            freq_error = (freq_pred_ghz - desired_freq_ghz) / freq_norm
-            bw_error = (bw_pred_mhz - desired_bw_mhz) / bw_norm
-            return 10 * freq_error**2 + 1 * bw_error**2
+            return design_objective(freq_pred_ghz, bw_pred_mhz, desired_freq_ghz, desired_bw_mhz)
 
         result = scipy.optimize.minimize(
             objective, x0_var, bounds=bounds_var, method='Powell',
@@ -333,6 +618,122 @@ class TrainedAI:
                 "fun": float(result.fun)
             }
         }
+
+    def _analytic_design(self, desired_freq_ghz, desired_bw_mhz, **fixed_params):
+        """optimize_parameters-shaped result from the closed-form inverse (patch_analytic.py)."""
+        params, predicted = analytic_inverse(desired_freq_ghz, desired_bw_mhz,
+                                             fixed_params.get("eps_r"), fixed_params.get("substrate_h"))
+        p = params[0].tolist()
+        feed_type_index = int(p[6])
+        fun = float(design_objective(predicted[0, 0], predicted[0, 1], desired_freq_ghz, desired_bw_mhz))
+        return {
+            "numeric": p[:6],
+            "feed_type_index": feed_type_index,
+            "feed_type_label": feed_type_index,
+            "dict": {
+                "patch_W": p[0],
+                "patch_L": p[1],
+                "eps_eff": p[2],
+                "substrate_h": p[3],
+                "substrate_W": p[0] + 6*p[3],
+                "substrate_L": p[1] + 6*p[3],
+                "eps_r": p[4],
+                "feed_width": p[5],
+                "feed_type": feed_type_index,
+                "success": True,
+                "fun": fun
+            }
+        }
+
+    def _predict_forward_batch(self, X_scaled):
+        # Keras: predict_on_batch skips the per-call tf.data pipeline of predict()
+        if hasattr(self.model, "predict_on_batch"):
+            return np.asarray(self.model.predict_on_batch(X_scaled))
+        return np.asarray(self.model.predict(X_scaled))
+
+    def optimize_parameters_batch(self, desired_freq_ghz, desired_bw_mhz, eps_r=None, substrate_h=None,
+                                  population=64, rounds=25, seed=0):
+        """
+        Vectorized counterpart of optimize_parameters for many targets at once.
+        Every round evaluates population candidates for all B targets in a single forward
+        pass and resamples around each target's best so far with a shrinking step
+        (a batched (1, lambda) evolution strategy inside PARAM_BOUNDS).
+        eps_r / substrate_h: None, scalar or (B,) array with NaN meaning "free".
+        Returns dict of arrays: "params" (B, 7) in PARAM_NAMES order, "predicted" (B, 2)
+        [Fr_GHz, BW_MHz], "objective" (B,), "feed_type_label" (B,) and "valid" (B,): False
+        for targets patch_analytic.valid_targets rejects, whose rows are NaN.
+        """
+        self._load_forward()
+        f_t = np.atleast_1d(np.asarray(desired_freq_ghz, dtype=float))
+        b_t = np.broadcast_to(np.asarray(desired_bw_mhz, dtype=float), f_t.shape)
+        valid = valid_targets(f_t, b_t, eps_r, substrate_h)
+        if self.analytic_mode == "fast" or not self._forward_loaded:
+            params, predicted = analytic_inverse(f_t, b_t, eps_r, substrate_h)
+            return {
+                "params": params,
+                "predicted": predicted,
+                "objective": design_objective(predicted[:, 0], predicted[:, 1], f_t, b_t),
+                "feed_type_label": np.array(["" if np.isnan(ft) else str(int(ft)) for ft in params[:, 6]]),
+                "valid": valid,
+            }
+        B, P = len(f_t), population
+        rng = np.random.default_rng(seed)
+        lo = np.array([b[0] for b in PARAM_BOUNDS], dtype=float)
+        hi = np.array([b[1] for b in PARAM_BOUNDS], dtype=float)
+        fixed = np.full((B, len(PARAM_BOUNDS)), np.nan)
+        if eps_r is not None:
+            fixed[:, 4] = np.broadcast_to(np.asarray(eps_r, dtype=float), (B,))
+        if substrate_h is not None:
+            fixed[:, 3] = np.broadcast_to(np.asarray(substrate_h, dtype=float), (B,))
+        is_fixed = ~np.isnan(fixed)
+        categories = np.asarray(self.encoder.categories_[0]).astype(int)
+
+        def evaluate(cand):
+            cand = np.where(is_fixed[:, None, :], fixed[:, None, :], cand)
+            flat = cand.reshape(B * P, -1)
+            pred = self._predict_forward_batch(self._forward_inputs(flat[:, :6], flat[:, 6].astype(int)))
+            obj = design_objective(pred[:, 0], pred[:, 1], np.repeat(f_t, P), np.repeat(b_t, P))
+            return cand, pred.reshape(B, P, -1), obj.reshape(B, P)
+
+        cand = lo + (hi - lo) * rng.random((B, P, len(lo)))
+        cand[..., 6] = rng.choice(categories, (B, P))
+        if self.analytic_mode == "seed":
+            cand[:, 0, :] = np.clip(analytic_inverse(f_t, b_t, eps_r, substrate_h)[0], lo, hi)
+        cand, pred, obj = evaluate(cand)
+        best_i = obj.argmin(axis=1)
+        rows = np.arange(B)
+        best, best_pred, best_obj = cand[rows, best_i], pred[rows, best_i], obj[rows, best_i]
+
+        # per-target step size, grown on success and shrunk on failure; an eighth of every
+        # population is drawn fresh from the whole box so a target can escape a poor basin
+        step = np.full((B, 1, 1), 0.2)
+        n_fresh = max(P // 8, 1)
+        for r in range(rounds):
+            cand = best[:, None, :] + step * (hi - lo) * rng.standard_normal((B, P, len(lo)))
+            cand[:, -n_fresh:, :] = lo + (hi - lo) * rng.random((B, n_fresh, len(lo)))
+            cand = np.clip(cand, lo, hi)
+            switch = rng.random((B, P)) < 0.2
+            cand[..., 6] = np.where(switch, rng.choice(categories, (B, P)), best[:, None, 6])
+            cand[:, -n_fresh:, 6] = rng.choice(categories, (B, n_fresh))
+            cand[:, 0, :] = best   # keep the incumbent
+            cand, pred, obj = evaluate(cand)
+            i = obj.argmin(axis=1)
+            better = obj[rows, i] < best_obj
+            best[better] = cand[rows, i][better]
+            best_pred[better] = pred[rows, i][better]
+            best_obj[better] = obj[rows, i][better]
+            step = np.clip(np.where(better[:, None, None], step * 1.5, step * 0.6), 1e-4, 0.5)
+
+        best[:, 6] = np.round(best[:, 6])
+        labels = np.array(["" if not ok else str(int(ft)) for ft, ok in zip(best[:, 6], valid)])
+        best[~valid], best_pred[~valid], best_obj[~valid] = np.nan, np.nan, np.nan
+        return {
+            "params": best,
+            "predicted": best_pred[:, :2],
+            "objective": best_obj,
+            "feed_type_label": labels,
+            "valid": valid,
+        }
 '''
 ai = TrainedAI()
 #ai.predict_input(2.4, 100) 
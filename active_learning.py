@@ -0,0 +1,208 @@
+import os
+import csv
+import numpy as np
+from patch_analytic import effective_permittivity
+from RDN_AI import PARAM_BOUNDS, FEEDBACK_FILE
+
+ACTIVE_QUEUE_FILE = "ai_active_queue.csv"
+AL_COMMITTEE_SIZE = 5        # bootstrap members whose disagreement scores a candidate
+AL_MIN_ROWS = 8              # below this many simulated rows, propose space-filling designs only
+AL_CANDIDATES = 4000         # random candidates scored per proposal
+QUEUE_COLUMNS = ["param_0", "param_1", "param_2", "param_3", "param_4", "param_5",
+                 "feed_type", "pred_Fr_GHz", "pred_BW_MHz"]
+
+
+def sample_designs(n, rng, **fixed_params):
+    """
+    Uniform designs inside the optimize_parameters bounds, as an (n, 7) array in
+    PARAM_NAMES order. eps_eff is derived from W/eps_r/h instead of sampled, so every
+    row is physically consistent. fixed_params (eps_r=..., substrate_h=...) pin columns.
+    """
+    X = np.column_stack([rng.uniform(lo, hi, n) for lo, hi in PARAM_BOUNDS])
+    X[:, 6] = rng.integers(0, 4, n)
+    if "eps_r" in fixed_params:
+        X[:, 4] = fixed_params["eps_r"]
+    if "substrate_h" in fixed_params:
+        X[:, 3] = fixed_params["substrate_h"]
+    X[:, 2] = effective_permittivity(X[:, 0], X[:, 4], X[:, 3])
+    return X
+
+
+def _features(X):
+    # log geometry + eps_r and one-hot feed type; eps_eff is redundant with W/eps_r/h
+    X = np.asarray(X, dtype=float)
+    onehot = np.eye(4)[np.clip(X[:, 6].astype(int), 0, 3)]
+    return np.hstack([np.log(X[:, [0, 1, 3, 4, 5]]), onehot])
+
+
+class ActiveLearner:
+    """
+    Query-by-committee sampler: a bootstrap committee of small MLPs is fitted on the
+    simulated (params -> Fr, BW) rows, and the next batch is taken where the committee
+    disagrees most, spread out so one batch does not cluster around a single region.
+    Proposed designs are queued to ACTIVE_QUEUE_FILE; run_queue() simulates them,
+    logs them as feedback rows and triggers the usual retrain_if_needed() path.
+    """
+    def __init__(self, ai=None, committee_size=AL_COMMITTEE_SIZE, queue_path=ACTIVE_QUEUE_FILE, seed=0):
+        self.ai = ai
+        self.committee_size = committee_size
+        self.queue_path = queue_path
+        self.rng = np.random.default_rng(seed)
+        self.members = []
+        self.n_rows = 0
+
+    # ---------- committee ----------
+    def fit(self, X, y):
+        """X: (n, 7) designs in PARAM_NAMES order, y: (n, 2) simulated [Fr_GHz, BW_MHz]."""
+        from sklearn.neural_network import MLPRegressor
+        F = _features(X)
+        Y = np.log(np.maximum(np.asarray(y, dtype=float), 1e-6))
+        self.n_rows = len(F)
+        self.members = []
+        if self.n_rows < AL_MIN_ROWS:
+            return self
+        self.f_mean, self.f_std = F.mean(axis=0), F.std(axis=0) + 1e-9
+        self.y_mean, self.y_std = Y.mean(axis=0), Y.std(axis=0) + 1e-9
+        Fn = (F - self.f_mean) / self.f_std
+        Yn = (Y - self.y_mean) / self.y_std
+        for k in range(self.committee_size):
+            idx = self.rng.integers(0, self.n_rows, self.n_rows)
+            mdl = MLPRegressor(hidden_layer_sizes=(16,), alpha=1e-2, solver="lbfgs", max_iter=5000, random_state=k)
+            mdl.fit(Fn[idx], Yn[idx])
+            self.members.append(mdl)
+        return self
+
+    def fit_from_feedback(self, path=FEEDBACK_FILE):
+        X, y = load_feedback_designs(path)
+        return self.fit(X, y)
+
+    def predict(self, X):
+        """Committee predictions, shape (members, n, 2), in [Fr_GHz, BW_MHz]."""
+        Fn = (_features(X) - self.f_mean) / self.f_std
+        out = np.stack([m.predict(Fn) for m in self.members])
+        return np.exp(out * self.y_std + self.y_mean)
+
+    # ---------- proposal ----------
+    def propose(self, batch_size=8, n_candidates=AL_CANDIDATES, **fixed_params):
+        """
+        Returns (designs, predicted) for the next batch_size simulations: designs is
+        (batch, 7) in PARAM_NAMES order, predicted the committee mean [Fr_GHz, BW_MHz]
+        (NaN while the committee is not fitted yet).
+        """
+        cand = sample_designs(n_candidates, self.rng, **fixed_params)
+        F = _features(cand)
+        Fs = (F - F.mean(axis=0)) / (F.std(axis=0) + 1e-9)
+        if self.members:
+            preds = self.predict(cand)
+            # disagreement in log space, so Fr and BW count on the same relative scale
+            score = np.log(preds).var(axis=0).sum(axis=1)
+            mean = preds.mean(axis=0)
+        else:
+            score = np.ones(n_candidates)
+            mean = np.full((n_candidates, 2), np.nan)
+
+        # greedy batch: best score, then damp candidates close to the ones already picked
+        picked = []
+        length2 = np.median(((Fs - Fs.mean(axis=0))**2).sum(axis=1)) / 4
+        weight = score.copy()
+        for _ in range(min(batch_size, n_candidates)):
+            i = int(np.argmax(weight))
+            picked.append(i)
+            d2 = ((Fs - Fs[i])**2).sum(axis=1)
+            weight = weight * (1 - np.exp(-d2 / length2))
+        return cand[picked], mean[picked]
+
+    # ---------- simulator queue ----------
+    def enqueue(self, designs, predicted):
+        exists = os.path.exists(self.queue_path)
+        with open(self.queue_path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if not exists:
+                writer.writerow(QUEUE_COLUMNS)
+            for row, pred in zip(designs, predicted):
+                writer.writerow([float(x) for x in row[:6]] + [int(row[6])] + [float(pred[0]), float(pred[1])])
+
+    def pending(self):
+        if not os.path.exists(self.queue_path):
+            return []
+        with open(self.queue_path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def run_queue(self, simulate, limit=None):
+        """
+        Simulate queued designs in order. simulate(params_dict) -> (Fr_GHz, BW_MHz, S11_dB),
+        e.g. StandInSimulator().simulate. Each result is logged with ai.log_feedback with empty
+        (NaN) target columns, since nobody asked for this Fr / BW: retrain_if_needed() (which
+        runs at the end) drops such rows from its target-conditioned fit, while
+        load_feedback_designs() keeps them as forward (params -> response) samples.
+        Rows whose simulation fails stay in the queue. Returns the number simulated.
+        """
+        rows = self.pending()
+        todo = rows if limit is None else rows[:limit]
+        done = 0
+        remaining = rows[len(todo):]
+        for i, row in enumerate(todo):
+            numeric = [float(row[f"param_{k}"]) for k in range(6)]
+            feed_type = int(row["feed_type"])
+            params = {
+                "patch_W": numeric[0], "patch_L": numeric[1], "eps_eff": numeric[2],
+                "substrate_h": numeric[3], "eps_r": numeric[4], "feed_width": numeric[5],
+                "substrate_W": numeric[0] + 6*numeric[3], "substrate_L": numeric[1] + 6*numeric[3],
+                "feed_type": feed_type,
+            }
+            try:
+                Fr, BW, S11 = simulate(params)
+            except Exception as e:
+                print("[AI][active] simulation failed:", e)
+                remaining = todo[i:] + remaining
+                break
+            if Fr is None:
+                remaining = todo[i:] + remaining
+                break
+            if self.ai is not None:
+                self.ai.log_feedback(float("nan"), float("nan"), numeric, str(feed_type), Fr, BW, S11)
+            done += 1
+
+        with open(self.queue_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=QUEUE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(remaining)
+        if done and self.ai is not None:
+            self.ai.retrain_if_needed()
+        return done
+
+
+def load_feedback_designs(path=FEEDBACK_FILE):
+    """(X, y) of every simulated row in the feedback CSV: X in PARAM_NAMES order, y = [Fr_GHz, BW_MHz]."""
+    if not os.path.exists(path):
+        return np.zeros((0, 7)), np.zeros((0, 2))
+    import pandas as pd
+    df = pd.read_csv(path, skipinitialspace=True)
+    df.columns = [c.strip() for c in df.columns]
+    # exploration rows (active learning) have no target, only the design and its response
+    df = df.dropna(subset=[f"param_{k}" for k in range(6)] + ["feed_type_label", "actual_Fr_GHz", "actual_BW_MHz"])
+    df = df[(df["actual_Fr_GHz"] > 0) & (df["actual_BW_MHz"] > 0)]
+    feed = df["feed_type_label"].astype(str).str.strip().astype(float).astype(int)
+    X = np.column_stack([df[[f"param_{k}" for k in range(6)]].values, feed.values])
+    y = df[["actual_Fr_GHz", "actual_BW_MHz"]].values
+    return X, y
+
+
+if __name__ == "__main__":
+    import argparse
+    from RDN_AI import TrainedAI
+    parser = argparse.ArgumentParser(description="Propose and queue the next designs to simulate.")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--eps-r", type=float, default=None)
+    parser.add_argument("--substrate-h", type=float, default=None)
+    args = parser.parse_args()
+
+    fixed = {}
+    if args.eps_r is not None:
+        fixed["eps_r"] = args.eps_r
+    if args.substrate_h is not None:
+        fixed["substrate_h"] = args.substrate_h
+    learner = ActiveLearner(TrainedAI()).fit_from_feedback()
+    designs, predicted = learner.propose(args.batch, **fixed)
+    learner.enqueue(designs, predicted)
+    print(f"[AI][active] queued {len(designs)} designs ({learner.n_rows} simulated rows so far) -> {learner.queue_path}")
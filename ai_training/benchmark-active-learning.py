@@ -0,0 +1,63 @@
+"""
+Surrogate error vs number of simulations, active learning vs random sampling,
+on the stand-in simulator. Run from the repository root:
+    python ai_training/benchmark-active-learning.py --budget 160 --batch 10
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from active_learning import ActiveLearner, sample_designs
+from cst_interface.stand_in_simulator import StandInSimulator
+
+
+def simulate_rows(sim, X):
+    Fr, BW, _ = sim.response(X[:, 0], X[:, 1], X[:, 4], X[:, 3], X[:, 5], X[:, 6].astype(int))
+    sim.n_simulations += len(X)
+    return np.column_stack([Fr, BW])
+
+
+def relative_error(learner, X_test, y_test):
+    pred = learner.predict(X_test).mean(axis=0)
+    return np.sqrt(np.mean(((pred - y_test) / y_test)**2, axis=0)) * 100
+
+
+def run(strategy, args, X_test, y_test):
+    sim = StandInSimulator()
+    rng = np.random.default_rng(args.seed)
+    learner = ActiveLearner(seed=args.seed)
+    X = sample_designs(args.initial, rng)
+    y = simulate_rows(sim, X)
+    curve = []
+    while True:
+        learner.fit(X, y)
+        if learner.members:
+            curve.append((sim.n_simulations, *relative_error(learner, X_test, y_test)))
+        if sim.n_simulations >= args.budget:
+            return curve
+        if strategy == "active":
+            X_new, _ = learner.propose(args.batch)
+        else:
+            X_new = sample_designs(args.batch, rng)
+        X = np.vstack([X, X_new])
+        y = np.vstack([y, simulate_rows(sim, X_new)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--initial", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=10)
+    parser.add_argument("--budget", type=int, default=160)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    X_test = sample_designs(2000, np.random.default_rng(1234))
+    y_test = simulate_rows(StandInSimulator(), X_test)
+
+    curves = {s: run(s, args, X_test, y_test) for s in ["random", "active"]}
+    print("surrogate RMS relative error (%) on 2000 held-out designs")
+    print(f"{'sims':>6}{'random Fr':>12}{'random BW':>12}{'active Fr':>12}{'active BW':>12}")
+    for (n, rf, rb), (_, af, ab) in zip(curves["random"], curves["active"]):
+        print(f"{n:>6}{rf:>12.2f}{rb:>12.2f}{af:>12.2f}{ab:>12.2f}")
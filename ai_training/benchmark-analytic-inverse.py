@@ -0,0 +1,80 @@
+"""
+Agreement between the analytic inverse (patch_analytic.analytic_inverse) and the neural
+inverse model on the dataset.csv targets, plus the cost per target of each. Run from the
+repository root:
+    python ai_training/benchmark-analytic-inverse.py
+    python ai_training/benchmark-analytic-inverse.py --inference-mode float16 --rows 2000
+Reported per design source:
+  * how well the design meets its own target under the transmission-line model (the same
+    equations that generated the dataset),
+  * W / L / eps_eff agreement when the analytic inverse is given the substrate (eps_r, h)
+    the network chose, and feed-type agreement,
+  * microseconds per target (vectorized analytic vs network predict).
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from patch_analytic import analytic_inverse, patch_resonance
+
+
+def self_consistency(name, params, f_t, b_t):
+    Fr, BW = patch_resonance(params[:, 0], params[:, 1], params[:, 4], params[:, 3], params[:, 6].astype(int))
+    fr_err = np.abs(Fr - f_t) / f_t * 100
+    bw_err = np.abs(BW - b_t) / b_t * 100
+    print(f"  {name:<18} Fr error mean {fr_err.mean():7.3f}%  p95 {np.percentile(fr_err, 95):7.3f}%   "
+          f"BW error mean {bw_err.mean():7.3f}%  p95 {np.percentile(bw_err, 95):7.3f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=None, help="use only the first N dataset rows")
+    parser.add_argument("--inference-mode", default=None, help="keras, float16 or int8 for the neural inverse")
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    df = pd.read_csv(os.path.join("dataset", "dataset.csv"))
+    if args.rows:
+        df = df.iloc[:args.rows]
+    f_t = df["freq_Hz"].values / 1e9
+    b_t = df["bandwidth_Hz"].values / 1e6
+    n = len(df)
+
+    t0 = time.perf_counter()
+    analytic, _ = analytic_inverse(f_t, b_t)
+    t_analytic = (time.perf_counter() - t0) / n * 1e6
+
+    from RDN_AI import TrainedAI
+    ai = TrainedAI(inference_mode=args.inference_mode, analytic_mode="fallback")
+    if not ai._inverse_loaded:
+        sys.exit("Neural inverse model not found; train it with ai_training/inverse-predict.py first.")
+    X = ai.inv_scaler.transform(np.column_stack([f_t, b_t]))
+    t0 = time.perf_counter()
+    out = np.asarray(ai.inv_model.predict(X, verbose=0) if hasattr(ai.inv_model, "count_params")
+                     else ai.inv_model.predict(X))
+    t_nn = (time.perf_counter() - t0) / n * 1e6
+    categories = np.asarray(ai.inv_encoder.categories_[0]).astype(float)
+    neural = np.column_stack([out[:, :6], categories[out[:, 6:].argmax(axis=1)]])
+
+    print(f"{n} targets from dataset.csv\n\nDesign meets its target (transmission-line model):")
+    self_consistency("analytic inverse", analytic, f_t, b_t)
+    self_consistency("neural inverse", neural, f_t, b_t)
+    self_consistency("dataset geometry", df[["patch_W", "patch_L", "eps_eff", "substrate_h", "eps_r",
+                                             "feed_width_m", "feed_type"]].values.astype(float), f_t, b_t)
+
+    # same substrate as the network picked -> dimensions should agree
+    on_nn_substrate, _ = analytic_inverse(f_t, b_t, eps_r=neural[:, 4], substrate_h=neural[:, 3])
+    print("\nAnalytic inverse on the network's substrate vs the network:")
+    for j, name in [(0, "patch_W"), (1, "patch_L"), (2, "eps_eff")]:
+        rel = np.abs(on_nn_substrate[:, j] - neural[:, j]) / np.abs(on_nn_substrate[:, j]) * 100
+        print(f"  {name:<10} mean {rel.mean():7.3f}%  p95 {np.percentile(rel, 95):7.3f}%  max {rel.max():7.3f}%")
+    print(f"  feed type agreement with dataset labels: analytic-on-substrate "
+          f"{np.mean(on_nn_substrate[:, 6] == df['feed_type'].values) * 100:.1f}%, "
+          f"network {np.mean(neural[:, 6] == df['feed_type'].values) * 100:.1f}%")
+
+    print(f"\nCost per target: analytic {t_analytic:.2f} us, neural ({ai.inference_mode}) {t_nn:.2f} us")
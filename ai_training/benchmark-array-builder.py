@@ -0,0 +1,67 @@
+"""
+Generation cost of N x N patch arrays: the looped "define array" macro (array_builder.py)
+against one "define brick" run_command per solid, the way the single patch is built.
+Reports CST history entries, macro text size and Python-side generation time for
+4 x 4 to 64 x 64, and checks the loop arithmetic reproduces the vectorized layout.
+No CST needed. Run from the repository root:
+    python ai_training/benchmark-array-builder.py
+    python ai_training/benchmark-array-builder.py --sizes 4 16 64 128 --freq 5.8
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cst_interface.cst_driver import CSTDriver
+from cst_interface.array_builder import array_layout, check_layout, brick_commands, array_boxes_from_loops
+from patch_analytic import patch_dimensions
+
+
+def best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--freq", type=float, default=2.4, help="GHz")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    driver = CSTDriver()
+    eps_r, h = 4.4, 0.0016
+    W, L, _, _ = patch_dimensions(args.freq * 1e9, eps_r, h)
+    element = dict(patch_W=float(W), patch_L=float(L), substrate_h=h, eps_r=eps_r, feed_width=0.003,
+                   substrate_W=float(W) + 6 * h, substrate_L=float(L) + 6 * h, feed_type=0)
+    sub, cond = "FR-4 (lossy)", "Copper (annealed)"
+
+    print(f"{'array':>8}{'elements':>10} | {'looped: entries':>16}{'bytes':>9}{'ms':>9} | "
+          f"{'per brick: entries':>19}{'bytes':>11}{'ms':>9} | {'max loop error':>15}")
+    for n in args.sizes:
+        params = dict(element, array_nx=n, array_ny=n)
+
+        def looped():
+            commands = driver.array_antenna_commands(args.freq, sub, cond, params)
+            return commands, [driver.format_command(name, **kw) for name, kw in commands]
+
+        def per_brick():
+            layout = array_layout(params, args.freq)
+            check_layout(layout)
+            commands = brick_commands(layout, sub, cond) + driver.array_antenna_commands(args.freq, sub, cond, params)[1:]
+            return [driver.format_command(name, **kw) for name, kw in commands]
+
+        t_loop, (commands, loop_macros) = best_time(looped, args.repeats)
+        t_brick, brick_macros = best_time(per_brick, max(1, args.repeats // 2))
+        layout = array_layout(params, args.freq)
+        P, S, B = array_boxes_from_loops(commands[0][1])
+        err = max(np.abs(P - layout["patches"][:, :4]).max(), np.abs(S - layout["stubs"][:, :4]).max(),
+                  np.abs(B - layout["buses"][:, :4]).max())
+        print(f"{f'{n}x{n}':>8}{n * n:>10} | {len(loop_macros):>16}{sum(map(len, loop_macros)):>9}{t_loop * 1e3:>9.2f} | "
+              f"{len(brick_macros):>19}{sum(map(len, brick_macros)):>11}{t_brick * 1e3:>9.1f} | {err * 1e3:>12.4f} um")
@@ -0,0 +1,71 @@
+"""
+Simulations-to-convergence of the design loop's correction step, "damped" vs "broyden",
+on the stand-in simulator (no CST needed). Run from the repository root:
+    python ai_training/benchmark-autocorrect.py --targets 200
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from RDN_AI import TrainedAI
+from patch_analytic import patch_dimensions
+from cst_interface.stand_in_simulator import StandInSimulator
+
+FREQ_TOLERANCE = 0.03   # GHz, same as interface.generate_antenna
+BW_TOLERANCE = 15       # MHz
+MAX_ITERATIONS = 30
+
+
+def random_targets(n, sim, rng):
+    # sample a reachable design and use its stand-in response as the target
+    f = rng.uniform(1.5e9, 4.5e9, n)
+    eps_r = rng.uniform(2.2, 6.0, n)
+    h = rng.uniform(0.0008, 0.0025, n)
+    W, L, _, _ = patch_dimensions(f, eps_r, h)
+    W = W * rng.uniform(0.9, 1.1, n)
+    L = L * rng.uniform(0.95, 1.05, n)
+    fw = rng.uniform(0.0015, 0.005, n)
+    ft = rng.integers(0, 4, n)
+    Fr, BW, _ = sim.response(W, L, eps_r, h, fw, ft)
+    return list(zip(Fr, BW, eps_r, h, ft))
+
+
+def run_design(ai, sim, target, mode):
+    Fr_t, BW_t, eps_r, h, ft = target
+    # the first proposal is the closed-form design, standing in for the surrogate's answer
+    W, L, eps_eff, _ = patch_dimensions(Fr_t * 1e9, eps_r, h)
+    numeric = [float(W), float(L), float(eps_eff), float(h), float(eps_r), 0.003]
+    history = []
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        params = {"patch_W": numeric[0], "patch_L": numeric[1], "substrate_h": numeric[3],
+                  "eps_r": numeric[4], "feed_width": numeric[5], "feed_type": int(ft)}
+        Fr, BW, _ = sim.simulate(params)
+        if abs(Fr - Fr_t) < FREQ_TOLERANCE and abs(BW - BW_t) < BW_TOLERANCE:
+            return iteration
+        history.append((numeric, Fr, BW))
+        numeric = ai.autocorrect_params(numeric, desired_Fr=Fr_t, actual_Fr=Fr, desired_BW=BW_t,
+                                        actual_BW=BW, history=history, mode=mode)
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", type=int, default=100)
+    parser.add_argument("--noise", type=float, default=0.0, help="relative simulator noise")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ai = TrainedAI()
+    rng = np.random.default_rng(args.seed)
+    targets = random_targets(args.targets, StandInSimulator(), rng)
+
+    print(f"{'mode':<10}{'converged':>12}{'mean sims':>12}{'median':>10}{'total sims':>12}")
+    for mode in ["damped", "broyden"]:
+        sim = StandInSimulator(noise=args.noise, seed=args.seed)
+        iters = [run_design(ai, sim, t, mode) for t in targets]
+        done = np.array([i for i in iters if i is not None])
+        mean = done.mean() if len(done) else float("nan")
+        median = np.median(done) if len(done) else float("nan")
+        print(f"{mode:<10}{len(done):>7}/{len(targets):<4}{mean:>12.2f}{median:>10.1f}{sim.n_simulations:>12}")
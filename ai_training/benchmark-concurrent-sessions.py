@@ -0,0 +1,111 @@
+"""
+Stress test of the multi-session serving path (serving.py): N threads each play a GUI
+session running the design loop (optimize -> solve -> log feedback -> retrain check ->
+autocorrect) against one shared InferencePool, with the stand-in simulator behind a
+semaphore of CST licences like interface.py. Reports throughput and pool contention, then
+checks the feedback CSV: every row present exactly once, none torn or interleaved.
+Run from the repository root:
+    python ai_training/benchmark-concurrent-sessions.py --sessions 16 --iterations 10 --pool 4
+The feedback log, retrain files and checkpoints are written to a temporary directory.
+"""
+import os
+import sys
+import csv
+import time
+import tempfile
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import RDN_AI
+from serving import InferencePool, SessionRegistry
+from design_checkpoint import new_job
+from cst_interface.stand_in_simulator import StandInSimulator
+
+
+def session(k, args, ai, registry, cst_slots, sim, errors):
+    """One session: its own targets (unique per session and iteration) and its own job id."""
+    try:
+        job_id = new_job(dict(family="Microstrip Patch", shape="Rectangular", freq=2.0, bandwidth=50,
+                              substrate="FR-4 (lossy)", conductor="Copper (annealed)"), session=f"s{k}")
+        if not registry.claim(job_id, f"s{k}"):
+            raise RuntimeError(f"job {job_id} claimed twice")
+        for i in range(args.iterations):
+            freq = 1.0 + k * 0.01 + i * 1e-4          # (freq, bw) identifies the row in the log
+            bw = 40.0 + i
+            opt = ai.optimize_parameters(freq, bw, eps_r=4.4, substrate_h=0.0016)
+            with cst_slots:
+                Fr, BW, S11 = sim.simulate(opt["dict"])
+            ai.log_feedback(freq, bw, opt["numeric"], opt["feed_type_label"], Fr, BW, S11)
+            if args.retrain:
+                ai.retrain_if_needed()
+            ai.autocorrect_params(opt["numeric"], desired_Fr=freq, actual_Fr=Fr, desired_BW=bw, actual_BW=BW)
+        registry.release(job_id, f"s{k}")
+    except Exception as e:
+        errors.append((k, repr(e)))
+
+
+def check_log(path, expected):
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    header, rows = rows[0], rows[1:]
+    torn = [r for r in rows if len(r) != len(header)]
+    seen = {}
+    for r in rows:
+        if len(r) == len(header):
+            key = (round(float(r[1]), 6), round(float(r[2]), 6))
+            seen[key] = seen.get(key, 0) + 1
+    return {"rows": len(rows), "torn": len(torn),
+            "missing": len(expected - set(seen)), "duplicated": sum(1 for c in seen.values() if c > 1),
+            "headers": sum(1 for r in rows if r and r[0].strip() == header[0].strip())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--pool", type=int, default=4, help="TrainedAI instances in the pool")
+    parser.add_argument("--cst-slots", type=int, default=2, help="concurrent stand-in solves")
+    parser.add_argument("--solve-delay", type=float, default=0.02, help="seconds per stand-in solve")
+    parser.add_argument("--retrain", action="store_true", help="also call retrain_if_needed every iteration")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    t0 = time.perf_counter()
+    ai = InferencePool(size=args.pool)
+    print(f"pool of {args.pool} TrainedAI instances built in {time.perf_counter() - t0:.1f} s")
+
+    # everything the loop writes (feedback CSV, retrain meta/model, checkpoints) goes to a scratch dir
+    workdir = tempfile.mkdtemp(prefix="rdn_sessions_")
+    os.chdir(workdir)
+    registry = SessionRegistry()
+    cst_slots = threading.BoundedSemaphore(args.cst_slots)
+    sim = StandInSimulator(delay=args.solve_delay)
+    errors = []
+
+    threads = [threading.Thread(target=session, args=(k, args, ai, registry, cst_slots, sim, errors))
+               for k in range(args.sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dt = time.perf_counter() - t0
+
+    n = args.sessions * args.iterations
+    expected = {(round(1.0 + k * 0.01 + i * 1e-4, 6), round(40.0 + i, 6))
+                for k in range(args.sessions) for i in range(args.iterations)}
+    print(f"{args.sessions} sessions x {args.iterations} iterations = {n} design steps in {dt:.2f} s "
+          f"({n / dt:.1f} steps/s)")
+    print(f"pool: {ai.calls} calls, {ai.waits} waited for a free instance ({ai.waits / max(ai.calls, 1) * 100:.1f}%)")
+    report = check_log(os.path.join(workdir, RDN_AI.FEEDBACK_FILE), expected)
+    print(f"feedback log: {report['rows']} rows (expected {n}), {report['torn']} torn, "
+          f"{report['missing']} missing, {report['duplicated']} duplicated, {report['headers']} stray headers")
+    print(f"unfinished jobs in the registry: {len(registry.running())}; session errors: {len(errors)}")
+    for k, e in errors[:5]:
+        print(f"  session {k}: {e}")
+    ok = (report["rows"] == n and not report["torn"] and not report["missing"] and not report["duplicated"]
+          and not report["headers"] and not errors and not registry.running())
+    print("PASS" if ok else "FAIL", f"(scratch dir {workdir})")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,121 @@
+"""
+What the pre-simulation gate (design_gate.py) costs and what it saves.
+  1. feasibility() on --candidates random designs from the optimizer's box, vectorized
+     against the same checks one design at a time in Python.
+  2. A batch as it would be enqueued for simulation: optimizer designs for --targets
+     targets, each also submitted --copies times with --jitter relative perturbations
+     (repeat requests, re-runs of a sweep), plus the random box designs.
+  3. The headless design loop (run_design_loop) with the stand-in simulator on the same
+     targets, with and without the gate: simulations, convergence and best objective.
+Run from the repository root:
+    python ai_training/benchmark-design-gate.py --candidates 1000000 --targets 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from RDN_AI import TrainedAI, PARAM_BOUNDS
+from design_gate import DesignGate, feasibility, GATE_REASONS
+from design_scheduler import DesignBudget, run_design_loop
+from cst_interface.stand_in_simulator import StandInSimulator
+
+
+def random_designs(n, rng):
+    """Uniform over RDN_AI.PARAM_BOUNDS, eps_eff from the other columns, as the optimizer's box allows."""
+    lo = np.array([b[0] for b in PARAM_BOUNDS[:6]])
+    hi = np.array([b[1] for b in PARAM_BOUNDS[:6]])
+    x = lo + (hi - lo) * rng.random((n, 6))
+    W, h, eps_r = x[:, 0], x[:, 3], x[:, 4]
+    x[:, 2] = (eps_r + 1) / 2 + (eps_r - 1) / 2 * (1 + 12 * h / W)**-0.5
+    return x, rng.integers(0, 4, n)
+
+
+def feasibility_loop(x):
+    """The checks of design_gate.feasibility for one design at a time."""
+    from RDN_AI import AUTOCORRECT_BOUNDS
+    import design_gate as g
+    codes = []
+    for W, L, eps_eff, h, eps_r, fw in x.tolist():
+        row = (W, L, eps_eff, h, eps_r, fw)
+        code = 0
+        if not all(np.isfinite(v) and v > 0 for v in row):
+            code = 1
+        elif fw > g.GATE_MAX_FEED_FRACTION * W:
+            code = 2
+        elif h < g.GATE_MIN_SUBSTRATE_H:
+            code = 3
+        elif not g.GATE_EPS_R_RANGE[0] <= eps_r <= g.GATE_EPS_R_RANGE[1]:
+            code = 4
+        elif not 1.0 <= eps_eff <= eps_r:
+            code = 5
+        elif any(row[i] <= AUTOCORRECT_BOUNDS[i][0] * (1 + g.GATE_CLIP_RTOL)
+                 or row[i] >= AUTOCORRECT_BOUNDS[i][1] * (1 - g.GATE_CLIP_RTOL) for i in g.GATE_CLIP_COLUMNS):
+            code = 6
+        codes.append(code)
+    return np.array(codes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=1000000)
+    parser.add_argument("--targets", type=int, default=200)
+    parser.add_argument("--copies", type=int, default=4, help="extra near-copies of every optimizer design")
+    parser.add_argument("--jitter", type=float, default=2e-4, help="relative perturbation of the copies")
+    parser.add_argument("--max-sims", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    # ----- 1. vectorized feasibility -----
+    x, feed = random_designs(args.candidates, rng)
+    t0 = time.perf_counter()
+    code = feasibility(x)
+    t_vec = time.perf_counter() - t0
+    n_loop = min(len(x), 50000)
+    t0 = time.perf_counter()
+    same = np.array_equal(feasibility_loop(x[:n_loop]), code[:n_loop])
+    t_loop = (time.perf_counter() - t0) * len(x) / n_loop
+    print(f"feasibility of {len(x)} random box designs: {t_vec * 1e3:.1f} ms vectorized, "
+          f"~{t_loop:.1f} s one at a time ({t_loop / t_vec:.0f}x), results {'identical' if same else 'DIFFER'}")
+    print("  " + ", ".join(f"{GATE_REASONS[c] or 'feasible'} {np.mean(code == c) * 100:.1f}%"
+                           for c in range(len(GATE_REASONS) - 1)))
+
+    # ----- 2. a simulation batch -----
+    ai = TrainedAI()
+    freqs, bws = rng.uniform(1.5, 5.5, args.targets), rng.uniform(40, 120, args.targets)
+    res = ai.optimize_parameters_batch(freqs, bws, eps_r=4.4, substrate_h=0.0016)
+    designs = res["params"][:, :6]
+    copies = np.repeat(designs, args.copies, axis=0) * np.exp(rng.normal(0, args.jitter, (len(designs) * args.copies, 6)))
+    n_box = args.targets
+    batch = np.vstack([designs, copies, x[:n_box]])
+    batch_feed = np.concatenate([res["params"][:, 6], np.repeat(res["params"][:, 6], args.copies), feed[:n_box]]).astype(int)
+    gate = DesignGate()
+    t0 = time.perf_counter()
+    keep, reasons = gate.filter(batch, batch_feed)
+    dt = time.perf_counter() - t0
+    print(f"batch of {len(batch)} ({args.targets} optimizer designs, {len(copies)} near-copies at "
+          f"{args.jitter:g} relative, {n_box} random box designs): {len(keep)} to solve in {dt * 1e3:.1f} ms")
+    print(f"  {gate.report()}")
+
+    # ----- 3. the design loop -----
+    for label, use_gate in (("no gate", False), ("gate", True)):
+        sim = StandInSimulator(seed=args.seed)
+        sims, ok, obj, prevented, stops = 0, 0, [], 0, {}
+        for f, bw in zip(freqs, bws):
+            opt = ai.optimize_parameters(f, bw, eps_r=4.4, substrate_h=0.0016)
+            g = DesignGate() if use_gate else None
+            budget, converged = run_design_loop(ai, sim.simulate, f, bw, opt["dict"], opt["numeric"],
+                                                opt["feed_type_label"],
+                                                DesignBudget(max_simulations=args.max_sims, max_iterations=args.max_sims),
+                                                gate=g)
+            sims += budget.simulations
+            ok += converged
+            obj.append(budget.best["objective"] if budget.best else np.inf)
+            prevented += g.prevented if g else 0
+            stops[budget.stop_reason] = stops.get(budget.stop_reason, 0) + 1
+        print(f"design loop, {label:<7}: {sims} simulations for {args.targets} targets, {ok} converged, "
+              f"best objective median {np.median(obj):.3g}, {prevented} solves prevented; stops {stops}")
@@ -0,0 +1,95 @@
+"""
+Time-to-accuracy of the fast training mode (fast_training.py) against the current fixed
+schedules: forward 50 epochs and inverse 100 epochs at batch size 64. Both runs use the
+same split, seed and thread settings, and every epoch's validation MSE is timestamped.
+Unless --target is given, the target is the final validation MSE of the current schedule
+(times --slack), so the question answered is "how long until fast mode is as good as
+what we ship today?".
+Run from the repository root:
+    python ai_training/benchmark-fast-training.py
+    python ai_training/benchmark-fast-training.py --model inverse --threads 4
+"""
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ai_training"))
+from fast_training import configure_runtime, fast_fit, epoch_timer, FAST_SEED
+
+BASELINE_EPOCHS = {"forward": 50, "inverse": 100}
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(ROOT, "ai_training", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def data_and_builder(kind):
+    df = pd.read_csv(os.path.join(ROOT, "dataset", "dataset.csv"))
+    if kind == "forward":
+        script = load_script("forward-predict")
+        X, y, _ = script.prepare_training_data(df)
+        build = lambda: script.build_model(X.shape[1])
+    else:
+        script = load_script("inverse-predict")
+        X, y, _ = script.prepare_inverse_training_data(df)
+        build = lambda: script.build_inverse_model(input_dim=X.shape[1], output_dim=y.shape[1])
+    X = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_train, X_test, y_train, y_test, build
+
+
+def run(kind, fast, seed):
+    import tensorflow as tf
+    X_train, X_test, y_train, y_test, build = data_and_builder(kind)
+    tf.keras.utils.set_random_seed(seed)
+    model = build()
+    timer = epoch_timer()
+    t0 = time.perf_counter()
+    if fast:
+        history = fast_fit(model, X_train, y_train, extra_callbacks=[timer])
+    else:
+        history = model.fit(X_train, y_train, epochs=BASELINE_EPOCHS[kind], batch_size=64,
+                            validation_split=0.1, callbacks=[timer], verbose=0)
+    total = time.perf_counter() - t0
+    test_mse = float(np.mean((model.predict(X_test, batch_size=4096, verbose=0) - y_test) ** 2))
+    return {"seconds": total, "epochs": len(history.history["loss"]),
+            "best_val": float(min(history.history["val_loss"])), "final_val": float(history.history["val_loss"][-1]),
+            "test_mse": test_mse, "timer": timer}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=["forward", "inverse", "both"], default="both")
+    parser.add_argument("--target", type=float, default=None, help="validation MSE to reach")
+    parser.add_argument("--slack", type=float, default=1.0, help="default target = baseline final val MSE x slack")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=FAST_SEED)
+    args = parser.parse_args()
+
+    threads = configure_runtime(args.threads, args.seed)
+    print(f"TensorFlow intra-op threads: {threads}")
+    kinds = ["forward", "inverse"] if args.model == "both" else [args.model]
+    for kind in kinds:
+        base = run(kind, fast=False, seed=args.seed)
+        fast = run(kind, fast=True, seed=args.seed)
+        target = args.target if args.target is not None else base["final_val"] * args.slack
+        for r in (base, fast):
+            r["ttt"], r["ttt_epoch"] = r["timer"].time_to(target)
+        print(f"\n{kind} model, target val MSE {target:.4g}")
+        print(f"  {'mode':<10}{'epochs':>7}{'total s':>9}{'to target s':>13}{'at epoch':>10}{'best val':>11}{'test MSE':>11}")
+        for name, r in [("current", base), ("fast", fast)]:
+            ttt = f"{r['ttt']:.1f}" if r["ttt"] is not None else "not reached"
+            at = str(r["ttt_epoch"]) if r["ttt_epoch"] is not None else "-"
+            print(f"  {name:<10}{r['epochs']:>7}{r['seconds']:>9.1f}{ttt:>13}{at:>10}{r['best_val']:>11.4g}{r['test_mse']:>11.4g}")
+        if base["ttt"] and fast["ttt"]:
+            print(f"  time-to-target speed-up: {base['ttt'] / fast['ttt']:.1f}x")
@@ -0,0 +1,89 @@
+"""
+Throughput and fault tolerance of the SQLite job queue (job_queue.py) with stand-in
+simulator workers in separate processes, as they would run on separate machines.
+For each worker count a fresh queue in a temporary directory gets --jobs design jobs.
+Optionally one worker is killed (SIGKILL, no clean-up) part-way through, so its job must
+come back through lease expiry. Afterwards the script checks that every job finished
+exactly once and that the central feedback export has one row per simulation.
+Run from the repository root:
+    python ai_training/benchmark-job-queue.py --workers 1 2 4 8 --jobs 64 --delay 0.2
+    python ai_training/benchmark-job-queue.py --workers 4 --kill-after 3
+"""
+import os
+import sys
+import csv
+import time
+import signal
+import tempfile
+import argparse
+import subprocess
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from job_queue import JobQueue
+
+
+def design_targets(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{"family": "Microstrip Patch", "shape": "Rectangular", "freq": float(f), "bandwidth": float(bw),
+             "substrate": "FR-4 (lossy)", "conductor": "Copper (annealed)"}
+            for f, bw in zip(rng.uniform(1.5, 4.5, n), rng.uniform(40, 120, n))]
+
+
+def run(n_workers, args):
+    workdir = tempfile.mkdtemp(prefix="rdn_queue_")
+    db = os.path.join(workdir, "job_queue.db")
+    queue = JobQueue(db)
+    queue.enqueue_many("design", design_targets(args.jobs))
+    cmd = [sys.executable, os.path.join(ROOT, "job_queue.py"), "--db", db, "worker", "--simulator", "stand-in",
+           "--delay", str(args.delay), "--idle-exit", "2", "--lease", str(args.lease), "--heartbeat", str(args.lease / 4)]
+    t0 = time.perf_counter()
+    procs = [subprocess.Popen(cmd + ["--worker-id", f"w{k}"], cwd=ROOT, stdout=subprocess.DEVNULL)
+             for k in range(n_workers)]
+    killed = None
+    while any(p.poll() is None for p in procs):
+        time.sleep(0.5)
+        if args.kill_after is not None and killed is None and time.perf_counter() - t0 > args.kill_after:
+            killed = procs[0]
+            killed.send_signal(signal.SIGKILL)
+            print(f"    killed worker w0 at {time.perf_counter() - t0:.1f} s")
+        if args.verbose:
+            s = queue.stats()
+            print(f"    t={time.perf_counter() - t0:5.1f}s queued {s['queued']:>4} running {s['leased']:>3} "
+                  f"done {s['done']:>4} workers busy {s['workers_busy']}/{s['workers_alive']}")
+    # the workers leave after 2 s idle
+    wall = time.perf_counter() - t0 - 2.0
+
+    s = queue.stats()
+    sims = sum(queue.job(i)["result"]["simulations"] for i in range(1, args.jobs + 1) if queue.job(i)["status"] == "done")
+    out = os.path.join(workdir, "feedback.csv")
+    exported = queue.export_feedback(out)
+    with open(out, newline="") as f:
+        csv_rows = sum(1 for _ in csv.reader(f)) - 1
+    with queue._lock:
+        retried = queue.db.execute("SELECT COUNT(*) FROM jobs WHERE attempts > 1").fetchone()[0]
+    alive = [w for w in s["workers"] if w["id"] != "w0" or killed is None]
+    util = sum(w["busy_seconds"] for w in alive) / max(sum(w["last_seen"] - w["started"] for w in alive), 1e-9)
+    ok = s["done"] == args.jobs and not s["failed"] and exported == sims == csv_rows
+    print(f"  {n_workers:>3} workers: {s['done']}/{args.jobs} done, {s['failed']} failed, {retried} re-leased, "
+          f"{wall:6.1f} s, {args.jobs / wall * 60:6.1f} jobs/min, {sims} sims, utilisation {util * 100:.0f}%, "
+          f"feedback {exported} exported / {csv_rows} in CSV  {'OK' if ok else 'MISMATCH'}")
+    queue.close()
+    return wall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds per stand-in solve")
+    parser.add_argument("--lease", type=float, default=4.0, help="lease seconds (heartbeat every lease / 4)")
+    parser.add_argument("--kill-after", type=float, default=None, help="SIGKILL worker w0 after this many seconds")
+    parser.add_argument("--verbose", action="store_true", help="print queue stats while running")
+    args = parser.parse_args()
+
+    print(f"{args.jobs} design jobs, stand-in solve {args.delay} s")
+    walls = {n: run(n, args) for n in args.workers}
+    base = walls[args.workers[0]]
+    print("speed-up: " + ", ".join(f"{n} workers {base / w:.2f}x" for n, w in walls.items()))
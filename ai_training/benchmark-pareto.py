@@ -0,0 +1,84 @@
+"""
+Cost and quality of the cached Pareto fronts (pareto.py). Times building the fronts of
+every substrate, loading them again from disk (a new process after a restart) and
+answering --queries random trade-off questions ("smallest board" / "widest band" within
+SCHED_FREQ_TOLERANCE of a target, on and between grid frequencies), against one
+optimize_parameters run per question. For quality, every optimizer design is scored
+with the same predictor and checked against the front: no optimizer design should
+dominate the front's answer.
+Run from the repository root:
+    python ai_training/benchmark-pareto.py --queries 200
+The fronts are written to a temporary directory.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from RDN_AI import TrainedAI
+from design_scheduler import SUBSTRATE_PROPERTIES, SCHED_FREQ_TOLERANCE
+from pareto import ParetoFronts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ai = TrainedAI()
+    print(f"forward model version: {ai.forward_model_version()}")
+    cache_dir = tempfile.mkdtemp(prefix="rdn_pareto_")
+
+    t0 = time.perf_counter()
+    ParetoFronts(ai, cache_dir).build_all()
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fronts = ParetoFronts(ai, cache_dir)
+    fronts.build_all()
+    t_load = time.perf_counter() - t0
+    size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+    print(f"{len(SUBSTRATE_PROPERTIES)} substrates: built in {t_build:.2f} s, reloaded from disk in "
+          f"{t_load:.2f} s, {size / 2**20:.1f} MB on disk")
+
+    rng = np.random.default_rng(args.seed)
+    substrates = list(SUBSTRATE_PROPERTIES)
+    queries = [(substrates[rng.integers(len(substrates))],
+                float(np.round(rng.uniform(1.2, 5.8), 2 if k % 2 else 3)),   # half on the 50 MHz grid, half between
+                ("footprint", "bandwidth")[k % 4 // 2]) for k in range(args.queries)]
+
+    answers, t_grid, t_between = [], [], []
+    for s, f, m in queries:
+        t0 = time.perf_counter()
+        answers.append(fronts.best(s, f, m))
+        (t_grid if abs(f * 20 - round(f * 20)) < 1e-9 else t_between).append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    dominated = unanswered = 0
+    for (substrate, freq, maximize), ans in zip(queries, answers):
+        eps_r, h = SUBSTRATE_PROPERTIES[substrate]
+        # ask the optimizer for the front answer's bandwidth: a smaller board at the same
+        # frequency and bandwidth would mean the front missed it
+        opt = ai.optimize_parameters(freq, ans["bw_mhz"] if ans else 100.0, eps_r=eps_r, substrate_h=h)
+        pred = ai.predict_output_batch([opt["numeric"]], opt["feed_type_index"])[0]
+        footprint = opt["dict"]["substrate_W"] * opt["dict"]["substrate_L"] * 1e6
+        if ans is None:
+            unanswered += 1
+            continue
+        if abs(pred[0] - freq) <= SCHED_FREQ_TOLERANCE and (
+                (maximize == "footprint" and footprint < ans["footprint_mm2"] and pred[1] >= ans["bw_mhz"])
+                or (maximize == "bandwidth" and pred[1] > ans["bw_mhz"] and footprint <= ans["footprint_mm2"])):
+            dominated += 1
+    t_opt = (time.perf_counter() - t0) / len(queries)
+
+    print(f"{len(queries)} trade-off queries:")
+    print(f"  front lookup       {np.mean(t_grid) * 1e3:8.3f} ms per query on the grid, "
+          f"{np.mean(t_between) * 1e3:.3f} ms between grid frequencies")
+    print(f"  optimize_parameters{t_opt * 1e3:8.3f} ms per query (one run; a trade-off sweep needs several)")
+    print(f"  front answers dominated by the optimizer design: {dominated}, no design within "
+          f"{SCHED_FREQ_TOLERANCE * 1e3:.0f} MHz on the front: {unanswered}")
+    print(f"(cache dir {cache_dir})")
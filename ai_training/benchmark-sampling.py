@@ -0,0 +1,108 @@
+"""
+Samples needed per sampling strategy (generate-dataset.py --sampling) for the forward model
+to reach a fixed validation error. For every strategy and training-set size the forward
+model is trained on a generated dataset (averaged over --repeats seeds) and scored on one
+large independent uniform test set; the error is the RMSE of (Fr, BW) divided by the test
+targets' standard deviation. Unless --target is given, the target is what "random" reaches
+at the largest size, i.e. "how much smaller can the dataset be for the same accuracy?".
+Run from the repository root:
+    python ai_training/benchmark-sampling.py                     # Keras forward model (forward-predict.py)
+    python ai_training/benchmark-sampling.py --learner mlp       # same 64-32 net in scikit-learn, no TensorFlow
+"""
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ai_training"))
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(ROOT, "ai_training", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+gen = load_script("generate-dataset")
+
+
+def features(df):
+    """Forward-model inputs and targets as in forward-predict.prepare_training_data."""
+    X = np.hstack([df[['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m']].values,
+                   np.eye(len(gen.FEED_TYPES))[df['feed_type'].values.astype(int)]])
+    y = np.column_stack([df['freq_Hz'].values / 1e9, df['bandwidth_Hz'].values / 1e6])
+    return X, y
+
+
+def train_and_score(learner, X, y, X_test, y_test, seed):
+    scaler = StandardScaler().fit(X)
+    if learner == "keras":
+        import tensorflow as tf
+        from fast_training import fast_fit
+        tf.keras.utils.set_random_seed(seed)
+        model = load_script("forward-predict").build_model(X.shape[1])
+        fast_fit(model, scaler.transform(X), y)
+        pred = model.predict(scaler.transform(X_test), batch_size=4096, verbose=0)
+    else:
+        from sklearn.neural_network import MLPRegressor
+        y_mean, y_std = y.mean(axis=0), y.std(axis=0) + 1e-9
+        model = MLPRegressor(hidden_layer_sizes=(64, 32), max_iter=2000, early_stopping=True,
+                             n_iter_no_change=30, random_state=seed)
+        model.fit(scaler.transform(X), (y - y_mean) / y_std)
+        pred = model.predict(scaler.transform(X_test)) * y_std + y_mean
+    return float(np.sqrt((((pred - y_test) / y_test.std(axis=0)) ** 2).mean()))
+
+
+def samples_to_target(sizes, errors, target):
+    """Smallest size reaching target, log-log interpolated between the measured sizes (None if never)."""
+    for k, (n, e) in enumerate(zip(sizes, errors)):
+        if e <= target:
+            if k == 0:
+                return float(n)
+            n0, e0 = sizes[k - 1], errors[k - 1]
+            t = (np.log(target) - np.log(e0)) / (np.log(e) - np.log(e0))
+            return float(np.exp(np.log(n0) + t * (np.log(n) - np.log(n0))))
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--learner", choices=["keras", "mlp"], default="keras")
+    parser.add_argument("--strategies", nargs="+", default=list(gen.SAMPLING_STRATEGIES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[125, 250, 500, 1000, 2000, 4000, 8000])
+    parser.add_argument("--repeats", type=int, default=3, help="datasets (seeds) per strategy and size")
+    parser.add_argument("--test-samples", type=int, default=20000)
+    parser.add_argument("--target", type=float, default=None, help="normalized RMSE to reach")
+    args = parser.parse_args()
+
+    X_test, y_test = features(gen.generate_dataset(args.test_samples, random_state=12345, sampling="random"))
+    results = {}
+    for strategy in args.strategies:
+        errors, seconds = [], []
+        for n in args.sizes:
+            t0 = time.perf_counter()
+            errs = [train_and_score(args.learner, *features(gen.generate_dataset(n, random_state=100 + r, sampling=strategy)),
+                                    X_test, y_test, seed=r)
+                    for r in range(args.repeats)]
+            errors.append(float(np.mean(errs)))
+            seconds.append((time.perf_counter() - t0) / args.repeats)
+            print(f"  {strategy:<7} n={n:<6} error {errors[-1]:.4f} (+/- {np.std(errs):.4f})  {seconds[-1]:.1f} s per run")
+        results[strategy] = (errors, seconds)
+
+    target = args.target if args.target is not None else results.get("random", next(iter(results.values())))[0][-1]
+    print(f"\ntarget normalized RMSE {target:.4f} ({args.learner} forward model)")
+    print(f"  {'strategy':<10}" + "".join(f"{n:>9}" for n in args.sizes) + f"{'to target':>12}")
+    needed = {}
+    for strategy, (errors, _) in results.items():
+        needed[strategy] = samples_to_target(args.sizes, errors, target)
+        reach = f"{needed[strategy]:.0f}" if needed[strategy] else "not reached"
+        print(f"  {strategy:<10}" + "".join(f"{e:>9.4f}" for e in errors) + f"{reach:>12}")
+    if needed.get("random"):
+        for strategy, n in needed.items():
+            if strategy != "random" and n:
+                print(f"  {strategy}: {needed['random'] / n:.2f}x fewer samples than random for the same error")
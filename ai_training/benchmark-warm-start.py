@@ -0,0 +1,137 @@
+"""
+Warm-starting from the design repository (design_repository.py) versus designing from
+scratch, with the stand-in simulator. First --stored random targets are designed cold
+(optimize_parameters + the simulate -> autocorrect loop) and stored with their simulated
+result. Then --retargets new targets are designed twice each: cold, and warm from the
+nearest stored design (search + warm_start + the loop seeded with its stored simulation).
+Reports, for both, the convergence rate, the simulations spent, the simulations until
+the resonance is within SCHED_FREQ_TOLERANCE and the best objective reached, and the
+search latency on a repository grown to --search-size designs.
+Run from the repository root:
+    python ai_training/benchmark-warm-start.py --stored 200 --retargets 100
+The repository is written to a temporary directory.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from RDN_AI import TrainedAI
+from design_scheduler import DesignBudget, run_design_loop, SCHED_FREQ_TOLERANCE
+from design_repository import DesignRepository, warm_start
+from cst_interface.stand_in_simulator import StandInSimulator
+
+SUBSTRATE = "FR-4 (lossy)"
+CONDUCTOR = "Copper (annealed)"
+
+
+class Recorder:
+    """Counts solves until the resonance first lands within SCHED_FREQ_TOLERANCE of freq."""
+    def __init__(self, sim, freq):
+        self.sim, self.freq, self.n, self.freq_hit = sim, freq, 0, None
+
+    def simulate(self, params):
+        Fr, BW, S11 = self.sim.simulate(params)
+        self.n += 1
+        if self.freq_hit is None and Fr is not None and abs(Fr - self.freq) < SCHED_FREQ_TOLERANCE:
+            self.freq_hit = self.n
+        return Fr, BW, S11
+
+
+def design(ai, sim, freq, bw, max_sims, start=None):
+    """Cold (start None) or warm (start = warm_start(...)) run; returns (opt, budget, converged, freq_hit)."""
+    rec = Recorder(sim, freq)
+    budget = DesignBudget(max_simulations=max_sims, max_iterations=max_sims)
+    if start is None:
+        opt = ai.optimize_parameters(freq, bw, eps_r=4.4, substrate_h=0.0016)
+        budget, converged = run_design_loop(ai, rec.simulate, freq, bw, opt["dict"], opt["numeric"],
+                                            opt["feed_type_label"], budget)
+    else:
+        opt = None
+        params, numeric, label, history, _ = start
+        budget, converged = run_design_loop(ai, rec.simulate, freq, bw, params, numeric, label, budget,
+                                            history=history)
+    return opt, budget, converged, rec.freq_hit
+
+
+def summary(name, runs, max_sims):
+    sims = np.array([r[0] for r in runs])
+    hits = np.array([r[2] if r[2] is not None else max_sims + 1 for r in runs])
+    print(f"  {name:<5} {np.mean([r[1] for r in runs]) * 100:5.1f}% converged, simulations mean {sims.mean():.2f}, "
+          f"to resonance within {SCHED_FREQ_TOLERANCE * 1e3:.0f} MHz mean {hits.mean():.2f} "
+          f"({np.mean([r[2] is not None for r in runs]) * 100:.0f}% reach it), "
+          f"best objective median {np.median([r[3] for r in runs]):.3g}")
+    return sims.sum()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stored", type=int, default=200, help="designs in the repository")
+    parser.add_argument("--retargets", type=int, default=100)
+    parser.add_argument("--shift", type=float, default=0.15, help="max relative change of the re-targeted freq / bw")
+    parser.add_argument("--max-sims", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.0, help="relative stand-in noise")
+    parser.add_argument("--search-size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ai = TrainedAI()
+    sim = StandInSimulator(noise=args.noise, seed=args.seed)
+    workdir = tempfile.mkdtemp(prefix="rdn_designs_")
+    repo = DesignRepository(os.path.join(workdir, "designs.db"))
+
+    # ----- fill the repository with cold-designed targets -----
+    for freq, bw in zip(rng.uniform(1.5, 4.5, args.stored), rng.uniform(40, 120, args.stored)):
+        opt, budget, converged, _ = design(ai, sim, freq, bw, args.max_sims)
+        best = budget.best
+        repo.add("Microstrip Patch", "Rectangular", SUBSTRATE, CONDUCTOR, freq, bw, best["params_dict"],
+                 feed_type_label=opt["feed_type_label"], actual=(best["Fr"], best["BW"], best["S11"]),
+                 converged=converged, simulations=budget.simulations, source="benchmark")
+    print(f"{len(repo)} stored designs")
+
+    # ----- re-target: cold versus warm from the nearest stored design -----
+    stored = repo.recent(args.stored)
+    cold_runs, warm_runs = [], []
+    for k in range(args.retargets):
+        base = stored[rng.integers(len(stored))]
+        freq = base["target_freq_ghz"] * (1 + rng.uniform(-args.shift, args.shift))
+        bw = base["target_bw_mhz"] * (1 + rng.uniform(-args.shift, args.shift))
+        runs = [(cold_runs, None)]
+        nearest = repo.search(freq, bw, SUBSTRATE, CONDUCTOR, limit=1)
+        # with no stored design nearby the warm run is a cold one
+        runs.append((warm_runs, warm_start(ai, nearest[0], freq, bw) if nearest else None))
+        for out, start in runs:
+            _, budget, converged, hit = design(ai, sim, freq, bw, args.max_sims, start)
+            out.append((budget.simulations, converged, hit, budget.best["objective"]))
+
+    print(f"{args.retargets} re-targeted designs (freq / bw shifted by up to {args.shift * 100:.0f}%), "
+          f"at most {args.max_sims} simulations each:")
+    cold_total = summary("cold", cold_runs, args.max_sims)
+    warm_total = summary("warm", warm_runs, args.max_sims)
+    print(f"  simulations saved: {cold_total - warm_total} of {cold_total} "
+          f"({(1 - warm_total / max(cold_total, 1)) * 100:.0f}%)")
+
+    # ----- search latency on a large repository -----
+    big = DesignRepository(os.path.join(workdir, "designs-large.db"))
+    params = stored[0]["params"]
+    with big.db:
+        big.db.executemany(
+            "INSERT INTO designs (created, family, shape, substrate, conductor, target_freq_ghz, target_bw_mhz, "
+            "actual_freq_ghz, actual_bw_mhz, converged, params) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+            [(time.time(), "Microstrip Patch", "Rectangular", SUBSTRATE, CONDUCTOR, f, b, f, b, json.dumps(params))
+             for f, b in zip(rng.uniform(1.0, 6.0, args.search_size), rng.uniform(20, 200, args.search_size))])
+    queries = list(zip(rng.uniform(1.5, 4.5, 200), rng.uniform(40, 120, 200)))
+    t0 = time.perf_counter()
+    for freq, bw in queries:
+        big.search(freq, bw, SUBSTRATE, CONDUCTOR, limit=1)
+    dt = (time.perf_counter() - t0) / len(queries)
+    plan = big.db.execute("EXPLAIN QUERY PLAN SELECT id FROM designs WHERE target_freq_ghz BETWEEN 1 AND 2 "
+                          "AND substrate = 'x' AND conductor = 'y'").fetchall()
+    print(f"search over {len(big)} designs: {dt * 1e3:.2f} ms per query ({plan[-1][-1]})")
+    print(f"(scratch dir {workdir})")
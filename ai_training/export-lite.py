@@ -0,0 +1,104 @@
+"""
+Export the Keras surrogates as float16 / int8 numpy models (lite_inference.py), report
+their accuracy against the float32 Keras outputs over dataset/dataset.csv, and compare
+the resident memory of a TrainedAI process in each inference mode. Run from the repo root:
+    python ai_training/export-lite.py
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+import joblib
+from tensorflow.keras.models import load_model
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from lite_inference import LITE_PRECISIONS, export_lite, load_lite
+from RDN_AI import (FORWARD_MODEL_PATH, FORWARD_SCALER_PATH, FORWARD_ENCODER_PATH, FORWARD_LITE_PATH,
+                    INVERSE_MODEL_PATH, INVERSE_SCALER_PATH, INVERSE_ENCODER_PATH, INVERSE_LITE_PATH)
+
+# measured in a fresh interpreter so each mode's imports are counted from scratch
+RSS_PROBE = r"""
+import sys, json
+from RDN_AI import TrainedAI
+ai = TrainedAI(inference_mode=sys.argv[1])
+ai.predict_output(0.038, 0.029, 4.0, 0.0016, 4.4, 0.003, 0)
+ai.predict_input(2.4, 100)
+try:
+    import resource
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+except ImportError:
+    import psutil
+    rss_mb = psutil.Process().memory_info().peak_wset / 2**20
+print(json.dumps({"rss_mb": rss_mb, "tensorflow": "tensorflow" in sys.modules, "sklearn": "sklearn" in sys.modules}))
+"""
+
+
+def forward_inputs(df, scaler, encoder):
+    numeric = df[['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m']].values
+    onehot = encoder.transform(df['feed_type'].values.reshape(-1, 1))
+    return scaler.transform(np.hstack([numeric, onehot]))
+
+
+def inverse_inputs(df, scaler):
+    freq_bw = df[['freq_Hz', 'bandwidth_Hz']].values / np.array([1e9, 1e6])
+    return scaler.transform(freq_bw)
+
+
+def report(name, ref, out, columns):
+    err = np.abs(out - ref)
+    rel = err / (np.abs(ref) + 1e-12)
+    for j, col in enumerate(columns):
+        print(f"  {name:<8} {col:<14} max abs {err[:, j].max():.3e}  mean abs {err[:, j].mean():.3e}  "
+              f"mean rel {rel[:, j].mean() * 100:.4f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-rss", action="store_true", help="skip the resident-memory comparison")
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    df = pd.read_csv(os.path.join("dataset", "dataset.csv"))
+    specs = [
+        ("forward", FORWARD_MODEL_PATH, FORWARD_SCALER_PATH, FORWARD_ENCODER_PATH, FORWARD_LITE_PATH,
+         ["Fr_GHz", "BW_MHz"]),
+        ("inverse", INVERSE_MODEL_PATH, INVERSE_SCALER_PATH, INVERSE_ENCODER_PATH, INVERSE_LITE_PATH,
+         ["patch_W", "patch_L", "eps_eff", "substrate_h", "eps_r", "feed_width"]),
+    ]
+    for kind, model_path, scaler_path, encoder_path, lite_template, columns in specs:
+        model = load_model(model_path)
+        scaler = joblib.load(scaler_path)
+        encoder = joblib.load(encoder_path)
+        X = forward_inputs(df, scaler, encoder) if kind == "forward" else inverse_inputs(df, scaler)
+        ref = model.predict(X, batch_size=4096, verbose=0)
+        print(f"{kind} model, {len(X)} rows of dataset.csv vs float32 Keras:")
+        for precision in LITE_PRECISIONS:
+            path = lite_template.format(precision=precision)
+            export_lite(model, scaler, encoder, path, precision)
+            lite_model, lite_scaler, lite_encoder = load_lite(path)
+            X_lite = (forward_inputs(df, lite_scaler, lite_encoder) if kind == "forward"
+                      else inverse_inputs(df, lite_scaler))
+            out = lite_model.predict(X_lite)
+            report(precision, ref[:, :len(columns)], out[:, :len(columns)], columns)
+            if kind == "inverse":
+                agree = np.mean(ref[:, 6:].argmax(axis=1) == out[:, 6:].argmax(axis=1)) * 100
+                print(f"  {precision:<8} feed_type argmax agreement {agree:.2f}%")
+            print(f"  {precision:<8} file size {os.path.getsize(path) / 1024:.1f} KiB")
+
+    if not args.no_rss:
+        print("\nResident memory of a TrainedAI process (both surrogates loaded, one prediction each):")
+        cpu = os.cpu_count() or 1
+        for mode in ("keras",) + LITE_PRECISIONS:
+            out = subprocess.run([sys.executable, "-c", RSS_PROBE, mode], cwd=ROOT,
+                                 capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f"  {mode:<8} failed: {out.stderr.strip().splitlines()[-1:]}")
+                continue
+            probe = json.loads(out.stdout.strip().splitlines()[-1])
+            per_8gb = int(8192 // probe["rss_mb"])
+            print(f"  {mode:<8} peak RSS {probe['rss_mb']:8.1f} MB  tensorflow loaded: {probe['tensorflow']!s:<5}  "
+                  f"sklearn loaded: {probe['sklearn']!s:<5}  workers per 8 GB: {per_8gb} (CPUs: {cpu})")
@@ -0,0 +1,74 @@
+"""
+Fast training mode shared by forward-predict.py and inverse-predict.py (--fast).
+
+Instead of a fixed 50/100 epochs at batch size 64, fast_fit() trains with large batches
+and a proportionally larger Adam learning rate, halves the rate when the validation loss
+plateaus, and stops once it has not improved for FAST_PATIENCE epochs (keeping the best
+weights). configure_runtime() fixes the CPU thread pools and all seeds so runs are
+repeatable and comparable. benchmark-fast-training.py measures the time to a target
+validation error against the current fixed schedules.
+"""
+import os
+import time
+
+FAST_BATCH_SIZE = 512
+FAST_LEARNING_RATE = 4e-3     # Adam default 1e-3 at batch 64, scaled sub-linearly for batch 512
+FAST_MAX_EPOCHS = 400
+FAST_PATIENCE = 20            # epochs without val_loss improvement before stopping
+FAST_LR_PATIENCE = 6          # epochs without improvement before halving the learning rate
+FAST_MIN_LR = 1e-5
+FAST_SEED = 42
+
+
+def configure_runtime(threads=None, seed=FAST_SEED):
+    """Pin TensorFlow's CPU thread pools (default: all cores, one inter-op thread) and seed python/numpy/TF."""
+    import tensorflow as tf
+    threads = threads or os.cpu_count() or 1
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError:   # the runtime is already initialised; keep its pools
+        pass
+    tf.keras.utils.set_random_seed(seed)
+    return threads
+
+
+def fast_callbacks(patience=FAST_PATIENCE, lr_patience=FAST_LR_PATIENCE):
+    from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+    return [
+        ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=lr_patience, min_lr=FAST_MIN_LR),
+        EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True),
+    ]
+
+
+def fast_fit(model, X, y, batch_size=FAST_BATCH_SIZE, learning_rate=FAST_LEARNING_RATE,
+             max_epochs=FAST_MAX_EPOCHS, patience=FAST_PATIENCE, validation_split=0.1,
+             extra_callbacks=(), verbose=0):
+    """Recompile `model` with the fast-mode optimizer (same loss) and train it; returns the History."""
+    from tensorflow.keras.optimizers import Adam
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss=model.loss)
+    return model.fit(X, y, epochs=max_epochs, batch_size=batch_size, validation_split=validation_split,
+                     callbacks=fast_callbacks(patience) + list(extra_callbacks), verbose=verbose)
+
+
+def epoch_timer():
+    """Keras callback logging (seconds since train start, val_loss) per epoch; .time_to(target) reads it back."""
+    from tensorflow.keras.callbacks import Callback
+
+    class EpochTimer(Callback):
+        def on_train_begin(self, logs=None):
+            self.t0 = time.perf_counter()
+            self.seconds, self.val_losses = [], []
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.seconds.append(time.perf_counter() - self.t0)
+            self.val_losses.append(logs.get("val_loss", float("inf")))
+
+        def time_to(self, target):
+            """(seconds, epoch) at which val_loss first reached target, or (None, None)."""
+            for k, loss in enumerate(self.val_losses):
+                if loss <= target:
+                    return self.seconds[k], k + 1
+            return None, None
+
+    return EpochTimer()
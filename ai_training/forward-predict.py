@@ -1,3 +1,6 @@
+import os
+import sys
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -6,6 +9,7 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense
 from tensorflow.keras.losses import MeanSquaredError
 import joblib
+from fast_training import configure_runtime, fast_fit
 
 def prepare_training_data(df):
     numeric_features = df[['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m']].values
@@ -27,7 +31,32 @@ def build_model(input_dim):
     model.compile(optimizer='adam', loss=MeanSquaredError())
     return model
 
+def train_ensemble(X_train, y_train, n_members, base_seed=42, fast=False):
+    """Train n_members copies of build_model() that differ only in their random seed."""
+    import tensorflow as tf
+    models = []
+    for k in range(n_members):
+        tf.keras.utils.set_random_seed(base_seed + k)
+        print(f"Training ensemble member {k + 1}/{n_members}...")
+        member = build_model(X_train.shape[1])
+        if fast:
+            fast_fit(member, X_train, y_train)
+        else:
+            member.fit(X_train, y_train, epochs=50, batch_size=64, validation_split=0.1, verbose=0)
+        models.append(member)
+    return models
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ensemble", type=int, default=0,
+                        help="also train an N-member seed ensemble (saved as stacked weights)")
+    parser.add_argument("--fast", action="store_true",
+                        help="large batches, LR schedule and early stopping instead of 50 fixed epochs")
+    parser.add_argument("--threads", type=int, default=None, help="TensorFlow CPU threads (with --fast)")
+    args = parser.parse_args()
+    if args.fast:
+        configure_runtime(args.threads)
+
     print("Loading dataset.csv...")
     df = pd.read_csv(r"dataset\dataset.csv")
     X, y, encoder = prepare_training_data(df)
@@ -39,7 +68,11 @@ if __name__ == "__main__":
 
     print("Training forward model...")
     model = build_model(X_train.shape[1])
-    model.fit(X_train, y_train, epochs=50, batch_size=64, validation_split=0.1)
+    if args.fast:
+        history = fast_fit(model, X_train, y_train, verbose=2)
+        print(f"Stopped after {len(history.history['loss'])} epochs")
+    else:
+        model.fit(X_train, y_train, epochs=50, batch_size=64, validation_split=0.1)
 
     test_loss = model.evaluate(X_test, y_test)
     print(f"Forward model test loss: {test_loss}")
@@ -49,3 +82,14 @@ if __name__ == "__main__":
     joblib.dump(scaler, r"models\forward-predict\forward_scaler.save")
     joblib.dump(encoder, r"models\forward-predict\forward_encoder.save")
     print("Forward model and preprocessors saved.")
+
+    if args.ensemble > 1:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from stacked_mlp import StackedMLP
+        members = train_ensemble(X_train, y_train, args.ensemble, fast=args.fast)
+        stacked = StackedMLP.from_keras(members)
+        pred = stacked.predict(X_test)
+        print(f"Ensemble mean test MSE: {np.mean((pred.mean(axis=0) - y_test)**2)}, "
+              f"mean predicted std (GHz, MHz): {np.sqrt(pred.var(axis=0)).mean(axis=0)}")
+        stacked.save(r"models\forward-predict\forward_ensemble.npz")
+        print("Forward ensemble saved.")
@@ -1,8 +1,23 @@
+import os
+import argparse
 import numpy as np
 import pandas as pd
 
 c = 3e8  # Speed of light in m/s
 
+# design-space ranges: freq_Hz, eps_r, substrate_h, feed_width_m
+SAMPLE_RANGES = np.array([
+    [1e9, 5e9],
+    [2.0, 10.0],
+    [0.0005, 0.003],
+    [0.001, 0.006],
+])
+FEED_TYPES = [0, 1, 2, 3]
+FEED_BW_FACTORS = {0: 1.0, 1: 0.9, 2: 1.1, 3: 1.05}
+# "random": independent uniform draws (the same draws as the original generator);
+# "sobol" / "lhs": scrambled Sobol / Latin hypercube points, stratified over feed_type
+SAMPLING_STRATEGIES = ("random", "sobol", "lhs")
+
 def calculate_patch_params(f_r, eps_r, h):
     W = (c / (2 * f_r)) * np.sqrt(2 / (eps_r + 1))
     eps_eff = (eps_r + 1)/2 + (eps_r - 1)/2 * (1 + 12*h/W)**-0.5
@@ -12,28 +27,60 @@ def calculate_patch_params(f_r, eps_r, h):
     BW = BW_frac * f_r
     return W, L, eps_eff, BW
 
-def generate_dataset(samples=10000, random_state=42):
-    np.random.seed(random_state)
-    freqs = np.random.uniform(1e9, 5e9, samples)
-    eps_r_vals = np.random.uniform(2.0, 10.0, samples)
-    h_vals = np.random.uniform(0.0005, 0.003, samples)
-    fw_vals = np.random.uniform(0.001, 0.006, samples)
-    feed_types = np.random.choice([0,1,2,3], samples)
-    feed_bw_factors = {0: 1.0, 1: 0.9, 2: 1.1, 3: 1.05}
-
-    data = []
-    for f_r, eps_r, h, fw, ft in zip(freqs, eps_r_vals, h_vals, fw_vals, feed_types):
-        W, L, eps_eff, BW = calculate_patch_params(f_r, eps_r, h)
-        BW_adj = BW * feed_bw_factors[ft]
-        data.append([f_r, eps_r, h, fw, ft, W, L, eps_eff, BW_adj])
-
-    df = pd.DataFrame(data, columns=[
-        'freq_Hz', 'eps_r', 'substrate_h', 'feed_width_m',
-        'feed_type', 'patch_W', 'patch_L', 'eps_eff', 'bandwidth_Hz'])
+def unit_samples(n, sampling, seed):
+    """(n, 4) points in the unit cube from a scrambled Sobol or Latin hypercube sequence."""
+    from scipy.stats import qmc
+    if sampling == "sobol":
+        # Sobol balance holds for powers of two: draw the next one and keep the leading n points
+        m = max(int(np.ceil(np.log2(max(n, 1)))), 0)
+        return qmc.Sobol(d=4, scramble=True, seed=seed).random_base2(m)[:n]
+    return qmc.LatinHypercube(d=4, scramble=True, seed=seed).random(n)
+
+def sample_design_space(samples, sampling="random", random_state=42):
+    """(freqs, eps_r, h, feed_width, feed_type) arrays of length `samples`."""
+    if sampling == "random":
+        np.random.seed(random_state)
+        freqs = np.random.uniform(1e9, 5e9, samples)
+        eps_r_vals = np.random.uniform(2.0, 10.0, samples)
+        h_vals = np.random.uniform(0.0005, 0.003, samples)
+        fw_vals = np.random.uniform(0.001, 0.006, samples)
+        feed_types = np.random.choice(FEED_TYPES, samples)
+        return freqs, eps_r_vals, h_vals, fw_vals, feed_types
+    if sampling not in SAMPLING_STRATEGIES:
+        raise ValueError(f"unknown sampling {sampling!r}, expected one of {SAMPLING_STRATEGIES}")
+
+    # equal share per feed type (the remainder goes to the first ones), each stratum its own sequence
+    counts = [samples // len(FEED_TYPES) + (k < samples % len(FEED_TYPES)) for k in range(len(FEED_TYPES))]
+    points, feed_types = [], []
+    for k, (ft, n) in enumerate(zip(FEED_TYPES, counts)):
+        points.append(unit_samples(n, sampling, seed=random_state + k))
+        feed_types.append(np.full(n, ft))
+    points = np.vstack(points)
+    feed_types = np.concatenate(feed_types)
+    order = np.random.default_rng(random_state).permutation(samples)   # interleave the strata
+    x = SAMPLE_RANGES[:, 0] + points[order] * (SAMPLE_RANGES[:, 1] - SAMPLE_RANGES[:, 0])
+    return x[:, 0], x[:, 1], x[:, 2], x[:, 3], feed_types[order]
+
+def generate_dataset(samples=10000, random_state=42, sampling="random"):
+    freqs, eps_r_vals, h_vals, fw_vals, feed_types = sample_design_space(samples, sampling, random_state)
+    W, L, eps_eff, BW = calculate_patch_params(freqs, eps_r_vals, h_vals)
+    BW_adj = BW * np.array([FEED_BW_FACTORS[ft] for ft in FEED_TYPES])[feed_types]
+
+    df = pd.DataFrame({
+        'freq_Hz': freqs, 'eps_r': eps_r_vals, 'substrate_h': h_vals, 'feed_width_m': fw_vals,
+        'feed_type': feed_types, 'patch_W': W, 'patch_L': L, 'eps_eff': eps_eff, 'bandwidth_Hz': BW_adj})
     return df
 
 if __name__ == "__main__":
-    print("Generating synthetic dataset...")
-    df = generate_dataset()
-    df.to_csv(r"dataset\dataset.csv", index=False)
-    print("Dataset saved to dataset.csv")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=10000)
+    parser.add_argument("--sampling", choices=SAMPLING_STRATEGIES, default="random",
+                        help="random: independent uniform draws; sobol/lhs: low-discrepancy, stratified by feed type")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=os.path.join("dataset", "dataset.csv"))
+    args = parser.parse_args()
+
+    print(f"Generating synthetic dataset ({args.samples} samples, {args.sampling} sampling)...")
+    df = generate_dataset(args.samples, args.seed, args.sampling)
+    df.to_csv(args.out, index=False)
+    print("Dataset saved to", args.out)
@@ -0,0 +1,193 @@
+"""
+Parallel hyperparameter search for the forward (forward-predict.py) and inverse
+(inverse-predict.py) networks with successive-halving pruning.
+
+Every configuration (hidden layers, learning rate, batch size) is trained for
+--min-epochs in a CPU process pool; only the best 1/eta by validation MSE go on to the
+next rung with eta times the epoch budget, continuing from their rung weights, until
+--max-epochs. Each (trial, rung) is appended to the CSV with validation MSE, mean relative
+test error, cumulative training time, parameter count and single-sample / batched
+inference latency. At the end every trial is ranked at the last rung it completed, and
+the smallest, fastest one whose validation MSE meets --target is printed: a small model
+pruned at an early rung can still be the answer if it already reached the target there.
+Run from the repository root:
+    python ai_training/hyperparameter-search.py --model forward --workers 4 --target 1e-3
+    python ai_training/hyperparameter-search.py --model inverse --trials 36 --target 1e-4
+"""
+import os
+import csv
+import time
+import json
+import argparse
+import itertools
+import importlib.util
+import multiprocessing
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_SPACE = {
+    "hidden": [(32,), (32, 32), (64, 32), (64, 64), (128, 64), (128, 64, 32)],
+    "learning_rate": [3e-4, 1e-3, 3e-3, 1e-2],
+    "batch_size": [32, 64, 128, 256],
+}
+TRIAL_COLUMNS = ["trial", "rung", "epochs", "hidden", "learning_rate", "batch_size", "n_params",
+                 "val_mse", "test_rel_err_pct", "train_seconds", "latency_1_ms", "latency_1024_ms"]
+
+_data = None
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(ROOT, "ai_training", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare(kind):
+    """Scaled (X_train, y_train, X_val, y_val, X_test, y_test) for the forward or inverse model."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    df = pd.read_csv(os.path.join(ROOT, "dataset", "dataset.csv"))
+    if kind == "forward":
+        X, y, _ = load_script("forward-predict").prepare_training_data(df)
+    else:
+        X, y, _ = load_script("inverse-predict").prepare_inverse_training_data(df)
+    X = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_val, y_train, y_val = train_test_split(X_train, y_train, test_size=0.1, random_state=42)
+    return X_train, y_train, X_val, y_val, X_test, y_test
+
+
+def _init_worker(kind, threads):
+    """One TensorFlow runtime per process, pinned to `threads` so workers do not oversubscribe."""
+    global _data
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _data = prepare(kind)
+
+
+def build(config, input_dim, output_dim):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Input
+    from tensorflow.keras.optimizers import Adam
+    model = Sequential([Input(shape=(input_dim,))]
+                       + [Dense(units, activation='relu') for units in config["hidden"]]
+                       + [Dense(output_dim)])
+    model.compile(optimizer=Adam(learning_rate=config["learning_rate"]), loss='mse')
+    return model
+
+
+def latency_ms(model, X, batch, repeats=30):
+    x = X[:batch]
+    model(x, training=False)   # build / trace once
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        model(x, training=False)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1e3)
+
+
+def run_trial(task):
+    """Train one configuration for `epochs` more epochs (from `weights` when continuing a rung)."""
+    import tensorflow as tf
+    trial, rung, config, epochs, weights, train_seconds, seed = task
+    X_train, y_train, X_val, y_val, X_test, y_test = _data
+    tf.keras.utils.set_random_seed(seed + trial)
+    model = build(config, X_train.shape[1], y_train.shape[1])
+    if weights is not None:
+        model.set_weights(weights)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train, epochs=epochs, batch_size=config["batch_size"], verbose=0)
+    train_seconds += time.perf_counter() - t0
+    val_mse = float(np.mean((model.predict(X_val, batch_size=4096, verbose=0) - y_val) ** 2))
+    pred = model.predict(X_test, batch_size=4096, verbose=0)
+    rel = np.abs(pred - y_test) / (np.abs(y_test) + 1e-12)
+    row = {
+        "trial": trial, "rung": rung, "hidden": "-".join(map(str, config["hidden"])),
+        "learning_rate": config["learning_rate"], "batch_size": config["batch_size"],
+        "n_params": int(model.count_params()), "val_mse": val_mse,
+        "test_rel_err_pct": float(rel.mean() * 100), "train_seconds": train_seconds,
+        "latency_1_ms": latency_ms(model, X_test, 1), "latency_1024_ms": latency_ms(model, X_test, 1024),
+    }
+    return row, model.get_weights()
+
+
+def sample_configs(n, seed):
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in rng.choice(len(grid), size=min(n, len(grid)), replace=False)]
+
+
+def successive_halving(args):
+    configs = sample_configs(args.trials, args.seed)
+    ctx = multiprocessing.get_context("spawn")   # fresh interpreters: TensorFlow is not fork-safe
+    pool = ctx.Pool(args.workers, initializer=_init_worker, initargs=(args.model, args.threads))
+    out_exists = os.path.exists(args.out)
+    out = open(args.out, "a", newline="")
+    writer = csv.DictWriter(out, fieldnames=TRIAL_COLUMNS + ["model", "started"])
+    if not out_exists:
+        writer.writeheader()
+    started = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    alive = {trial: (config, None, 0.0) for trial, config in enumerate(configs)}
+    rung, epochs_done, epochs = 0, 0, args.min_epochs
+    rows = {}
+    try:
+        while alive:
+            t0 = time.perf_counter()
+            tasks = [(trial, rung, config, epochs - epochs_done, weights, seconds, args.seed)
+                     for trial, (config, weights, seconds) in alive.items()]
+            results = pool.map(run_trial, tasks, chunksize=1)
+            for (trial, _, config, _, _, _, _), (row, weights) in zip(tasks, results):
+                row["epochs"] = epochs
+                writer.writerow(dict(row, model=args.model, started=started))
+                rows[trial] = row
+                alive[trial] = (config, weights, row["train_seconds"])
+            out.flush()
+            ranked = sorted(alive, key=lambda t: rows[t]["val_mse"])
+            print(f"[hpo] rung {rung}: {len(ranked)} trials x {epochs} epochs in {time.perf_counter() - t0:.1f} s, "
+                  f"best val MSE {rows[ranked[0]]['val_mse']:.4g} ({rows[ranked[0]]['hidden']})")
+            if epochs >= args.max_epochs or len(ranked) == 1:
+                break
+            keep = max(1, len(ranked) // args.eta)
+            alive = {t: alive[t] for t in ranked[:keep]}
+            rung, epochs_done, epochs = rung + 1, epochs, min(epochs * args.eta, args.max_epochs)
+    finally:
+        pool.terminate()
+        out.close()
+    # every trial at the last rung it completed
+    return sorted(rows.values(), key=lambda r: r["val_mse"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search on a process pool.")
+    parser.add_argument("--model", choices=["forward", "inverse"], default="forward")
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads", type=int, default=1, help="TensorFlow intra-op threads per worker")
+    parser.add_argument("--min-epochs", type=int, default=5)
+    parser.add_argument("--max-epochs", type=int, default=135)
+    parser.add_argument("--eta", type=int, default=3, help="keep the best 1/eta trials per rung")
+    parser.add_argument("--target", type=float, required=True,
+                        help="validation MSE the chosen model must reach")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="hparam_trials.csv")
+    args = parser.parse_args()
+
+    trials = successive_halving(args)
+    print(f"\n{'hidden':<12}{'lr':>8}{'batch':>7}{'epochs':>7}{'params':>8}{'val MSE':>11}{'rel err %':>11}"
+          f"{'train s':>9}{'lat 1 ms':>10}{'lat 1k ms':>11}")
+    for r in trials:
+        print(f"{r['hidden']:<12}{r['learning_rate']:>8g}{r['batch_size']:>7}{r['epochs']:>7}{r['n_params']:>8}"
+              f"{r['val_mse']:>11.4g}{r['test_rel_err_pct']:>11.3f}{r['train_seconds']:>9.1f}"
+              f"{r['latency_1_ms']:>10.3f}{r['latency_1024_ms']:>11.3f}")
+    meeting = [r for r in trials if r["val_mse"] <= args.target]
+    if meeting:
+        choice = min(meeting, key=lambda r: (r["n_params"], r["latency_1_ms"]))
+        print(f"\nSmallest model meeting val MSE <= {args.target:.4g}: " + json.dumps(choice))
+    else:
+        print(f"\nNo trial reached val MSE <= {args.target:.4g}; raise --max-epochs or widen SEARCH_SPACE.")
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -6,6 +7,7 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense
 from tensorflow.keras.losses import MeanSquaredError
 import joblib
+from fast_training import configure_runtime, fast_fit
 
 def prepare_inverse_training_data(df):
     freq_bw = df[['freq_Hz', 'bandwidth_Hz']].values
@@ -30,6 +32,14 @@ def build_inverse_model(input_dim, output_dim):
     return model
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fast", action="store_true",
+                        help="large batches, LR schedule and early stopping instead of 100 fixed epochs")
+    parser.add_argument("--threads", type=int, default=None, help="TensorFlow CPU threads (with --fast)")
+    args = parser.parse_args()
+    if args.fast:
+        configure_runtime(args.threads)
+
     print("Loading dataset.csv...")
     df = pd.read_csv(r"dataset\dataset.csv")
 
@@ -42,7 +52,11 @@ if __name__ == "__main__":
 
     print("Training inverse model...")
     inv_model = build_inverse_model(input_dim=2, output_dim=y_inv.shape[1])
-    inv_model.fit(X_train_inv, y_train_inv, epochs=100, batch_size=64, validation_split=0.1)
+    if args.fast:
+        history = fast_fit(inv_model, X_train_inv, y_train_inv, verbose=2)
+        print(f"Stopped after {len(history.history['loss'])} epochs")
+    else:
+        inv_model.fit(X_train_inv, y_train_inv, epochs=100, batch_size=64, validation_split=0.1)
 
     test_loss = inv_model.evaluate(X_test_inv, y_test_inv)
     print(f"Inverse model test loss: {test_loss}")
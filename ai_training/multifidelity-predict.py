@@ -0,0 +1,91 @@
+"""
+Train the multi-fidelity forward model (analytic prior + residual net, multifidelity.py)
+and compare it with the current forward network (build_model() of forward-predict.py,
+50 epochs) on the same number of high-fidelity samples. Run from the repository root:
+    python ai_training/multifidelity-predict.py --benchmark
+    python ai_training/multifidelity-predict.py --save          # fit on ai_feedback_log.csv
+High-fidelity labels for the benchmark come from the stand-in simulator applied to the
+dataset.csv geometries (swap in CST results when available).
+"""
+import os
+import sys
+import time
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from multifidelity import MultiFidelityForward, forward_rows, MF_MODEL_PATH
+from cst_interface.stand_in_simulator import StandInSimulator
+
+
+def load_forward_script():
+    spec = importlib.util.spec_from_file_location("forward_predict", os.path.join(ROOT, "ai_training", "forward-predict.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def high_fidelity_rows(df):
+    sim = StandInSimulator()
+    Fr, BW, _ = sim.response(df['patch_W'].values, df['patch_L'].values, df['eps_r'].values,
+                             df['substrate_h'].values, df['feed_width_m'].values, df['feed_type'].values)
+    numeric = df[['patch_W', 'patch_L', 'eps_eff', 'substrate_h', 'eps_r', 'feed_width_m']].values
+    return forward_rows(numeric, df['feed_type'].values), np.column_stack([Fr, BW])
+
+
+def errors(pred, y):
+    mae = np.abs(pred - y).mean(axis=0)
+    rel = (np.abs(pred - y) / y).mean(axis=0) * 100
+    return mae[0] * 1e3, mae[1], rel[0], rel[1]   # Fr MAE in MHz, BW MAE in MHz
+
+
+def benchmark(args):
+    from sklearn.preprocessing import StandardScaler
+    fp = load_forward_script()
+    df = pd.read_csv(os.path.join(ROOT, "dataset", "dataset.csv")).sample(frac=1.0, random_state=0)
+    X, y = high_fidelity_rows(df)
+    X_test, y_test = X[-2000:], y[-2000:]
+
+    print(f"{'samples':>8} | {'model':<14}{'train s':>9}{'Fr MAE MHz':>12}{'BW MAE MHz':>12}{'Fr rel %':>10}{'BW rel %':>10}")
+    for n in args.sizes:
+        X_tr, y_tr = X[:n], y[:n]
+        t0 = time.perf_counter()
+        mf = MultiFidelityForward().fit(X_tr, y_tr)
+        t_mf = time.perf_counter() - t0
+        e_mf = errors(mf.predict(X_test), y_test)
+
+        scaler = StandardScaler().fit(X_tr)
+        t0 = time.perf_counter()
+        nn = fp.build_model(X_tr.shape[1])
+        nn.fit(scaler.transform(X_tr), y_tr, epochs=50, batch_size=64, validation_split=0.1, verbose=0)
+        t_nn = time.perf_counter() - t0
+        e_nn = errors(nn.predict(scaler.transform(X_test), verbose=0), y_test)
+
+        for name, t, e in [("multifidelity", t_mf, e_mf), ("current nn", t_nn, e_nn)]:
+            print(f"{n:>8} | {name:<14}{t:>9.2f}{e[0]:>12.2f}{e[1]:>12.2f}{e[2]:>10.3f}{e[3]:>10.3f}")
+    lf = MultiFidelityForward().predict(X_test)
+    e_lf = errors(lf, y_test)
+    print(f"{0:>8} | {'analytic only':<14}{0:>9.2f}{e_lf[0]:>12.2f}{e_lf[1]:>12.2f}{e_lf[2]:>10.3f}{e_lf[3]:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 500, 1000, 4000])
+    parser.add_argument("--save", action="store_true", help="fit on the feedback log and save to " + MF_MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args)
+    if args.save:
+        from active_learning import load_feedback_designs
+        os.chdir(ROOT)
+        X_hf, y_hf = load_feedback_designs()
+        if len(X_hf) == 0:
+            sys.exit("No high-fidelity rows in the feedback log yet.")
+        mf = MultiFidelityForward().fit(forward_rows(X_hf[:, :6], X_hf[:, 6]), y_hf)
+        mf.save(MF_MODEL_PATH)
+        print(f"Multi-fidelity forward model fitted on {len(X_hf)} feedback rows and saved to {MF_MODEL_PATH}")
@@ -0,0 +1,97 @@
+"""
+Train the full-spectrum S11 surrogate (spectrum_surrogate.py) and report curve and
+band-metric accuracy plus screening throughput. Run from the repository root:
+    python ai_training/spectrum-predict.py                       # stand-in simulator traces
+    python ai_training/spectrum-predict.py --store s11_traces*.h5 --save
+Stand-in traces come from the StandInSimulator Lorentzian on designs drawn like the
+active-learning sampler; --store trains on the CST traces kept by S11Store instead (the
+GUI's store and every queue worker's, s11_traces-<worker>.h5).
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from spectrum_surrogate import SpectrumSurrogate, SPECTRUM_GRID_GHZ, SPECTRUM_MODEL_PATH, band_metrics
+from multifidelity import forward_rows
+from patch_analytic import effective_permittivity
+from cst_interface.stand_in_simulator import StandInSimulator, _feed_index
+
+
+def stand_in_data(n, seed=0):
+    """n designs whose stand-in resonance (and most of its band) falls inside the grid."""
+    from active_learning import sample_designs
+    rng = np.random.default_rng(seed)
+    sim = StandInSimulator()
+    lo, hi = SPECTRUM_GRID_GHZ[0], SPECTRUM_GRID_GHZ[-1]
+    kept = []
+    while sum(len(d) for d in kept) < n:
+        designs = sample_designs(4 * n, rng)
+        Fr, BW, _ = sim.response(designs[:, 0], designs[:, 1], designs[:, 4], designs[:, 3], designs[:, 5], designs[:, 6])
+        kept.append(designs[(Fr - BW / 1e3 > lo) & (Fr + BW / 1e3 < hi)])
+    designs = np.vstack(kept)[:n]
+    Fr, BW, S11 = sim.response(designs[:, 0], designs[:, 1], designs[:, 4], designs[:, 3], designs[:, 5], designs[:, 6])
+    return forward_rows(designs[:, :6], designs[:, 6]), sim.s11_trace(Fr, BW, S11, SPECTRUM_GRID_GHZ)
+
+
+def store_data(paths):
+    from cst_interface.s11_store import S11Store
+    S, rows = [], []
+    for path in paths:
+        with S11Store(path, "r") as store:
+            S.append(store.resampled(SPECTRUM_GRID_GHZ, fill=None))
+            for i in range(len(store)):
+                a = store.attrs(i)
+                eps_eff = a.get("eps_eff") or effective_permittivity(a["patch_W"], a["eps_r"], a["substrate_h"])
+                rows.append([a["patch_W"], a["patch_L"], eps_eff, a["substrate_h"], a["eps_r"], a["feed_width"],
+                             _feed_index(a.get("feed_type", 0))])
+    rows = np.asarray(rows, dtype=float).reshape(-1, 7)
+    return forward_rows(rows[:, :6], rows[:, 6]), np.vstack(S)
+
+
+def report(model, X, S):
+    pred = model.predict(X)
+    rmse = np.sqrt(((pred - S) ** 2).mean(axis=1))
+    m_true = band_metrics(model.grid, S)
+    m_pred = band_metrics(model.grid, pred)
+    print(f"  curve RMSE       mean {rmse.mean():.2f} dB, p95 {np.percentile(rmse, 95):.2f} dB")
+    print(f"  Fr error         MAE {np.abs(m_pred['Fr_GHz'] - m_true['Fr_GHz']).mean() * 1e3:.1f} MHz")
+    print(f"  -10 dB BW error  MAE {np.abs(m_pred['BW_MHz'] - m_true['BW_MHz']).mean():.1f} MHz")
+    print(f"  S11 min error    MAE {np.abs(m_pred['S11_min_dB'] - m_true['S11_min_dB']).mean():.2f} dB")
+    print(f"  band count agreement {np.mean(m_pred['n_bands'] == m_true['n_bands']) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=20000, help="stand-in designs to generate")
+    parser.add_argument("--store", nargs="+", default=None, help="train on S11Store files instead of the stand-in")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--screen", type=int, default=10000, help="candidates for the throughput test")
+    parser.add_argument("--save", action="store_true", help="save to " + SPECTRUM_MODEL_PATH)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    X, S = store_data(args.store) if args.store else stand_in_data(args.samples)
+    n_test = max(1, int(len(X) * args.test_fraction))
+    perm = np.random.default_rng(1).permutation(len(X))
+    test, train = perm[:n_test], perm[n_test:]
+    print(f"{len(train)} training / {len(test)} test curves on a {len(SPECTRUM_GRID_GHZ)}-point grid")
+
+    t0 = time.perf_counter()
+    model = SpectrumSurrogate().fit(X[train], S[train])
+    print(f"trained in {time.perf_counter() - t0:.1f} s\ntest set:")
+    report(model, X[test], S[test])
+
+    candidates = X[np.random.default_rng(2).integers(0, len(X), args.screen)]
+    t0 = time.perf_counter()
+    model.predict_metrics(candidates)
+    dt = time.perf_counter() - t0
+    print(f"screening {args.screen} candidates (curve + band metrics): {dt * 1e3:.0f} ms, "
+          f"{args.screen / dt:.0f} candidates/s")
+
+    if args.save:
+        model.save(SPECTRUM_MODEL_PATH)
+        print("Spectrum surrogate saved to", SPECTRUM_MODEL_PATH)
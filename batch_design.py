@@ -0,0 +1,192 @@
+"""
+Streaming batch design: target specs in, optimized designs out, one JSON object per line.
+
+    python batch_design.py -i targets.jsonl -o designs.jsonl --chunk 512 --workers 4
+    cat targets.jsonl | python batch_design.py -o designs.jsonl
+
+Input lines: {"id": "a1", "freq_ghz": 2.4, "bw_mhz": 100, "eps_r": 4.4, "substrate_h": 0.0016}
+(id, eps_r and substrate_h optional). Targets are read lazily and processed in fixed-size
+chunks through TrainedAI.optimize_parameters_batch, so memory stays bounded by
+chunk * (workers + queue) rows however long the input is. Results are written in input
+order and flushed chunk by chunk; <output>.progress records how many input lines are done,
+so rerunning the same command after an interruption resumes where it stopped.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+from collections import deque
+
+CHUNK_SIZE = 256
+PROGRESS_SUFFIX = ".progress"
+
+_worker_ai = None
+
+
+def _init_worker(inference_mode, forward_mode):
+    global _worker_ai
+    from RDN_AI import TrainedAI
+    _worker_ai = TrainedAI(inference_mode=inference_mode, forward_mode=forward_mode)
+
+
+def _positive(spec, key, optional=False):
+    """spec[key] as a finite positive float; NaN (free) when optional and not given."""
+    if optional and spec.get(key) is None:
+        return float("nan")
+    value = float(spec[key])
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"{key} must be a finite positive number, got {spec[key]!r}")
+    return value
+
+
+def _parse(line_no, line):
+    spec = json.loads(line)
+    return {
+        "id": spec.get("id", line_no),
+        "freq_ghz": _positive(spec, "freq_ghz"),
+        "bw_mhz": _positive(spec, "bw_mhz"),
+        "eps_r": _positive(spec, "eps_r", optional=True),
+        "substrate_h": _positive(spec, "substrate_h", optional=True),
+    }
+
+
+def design_chunk(args):
+    """Optimize one chunk of (line_no, raw line) pairs; returns its output JSON lines in input order."""
+    import numpy as np
+    start, lines, population, rounds = args
+    specs, slots = [], []
+    for line_no, line in lines:
+        try:
+            specs.append(_parse(line_no, line))
+            slots.append(len(specs) - 1)
+        except Exception as e:
+            slots.append(json.dumps({"id": line_no, "error": f"bad input: {e}"}))
+    designs = []
+    if specs:
+        res = _worker_ai.optimize_parameters_batch(
+            [s["freq_ghz"] for s in specs], [s["bw_mhz"] for s in specs],
+            eps_r=np.array([s["eps_r"] for s in specs]), substrate_h=np.array([s["substrate_h"] for s in specs]),
+            population=population, rounds=rounds, seed=start)
+        for k, spec in enumerate(specs):
+            if not res["valid"][k]:
+                designs.append(json.dumps({"id": spec["id"], "error": "no design for this target: freq_ghz, bw_mhz and substrate_h must be positive, eps_r >= 1"}))
+                continue
+            p = res["params"][k]
+            designs.append(json.dumps({
+                "id": spec["id"],
+                "freq_ghz": spec["freq_ghz"],
+                "bw_mhz": spec["bw_mhz"],
+                "patch_W": float(p[0]),
+                "patch_L": float(p[1]),
+                "eps_eff": float(p[2]),
+                "substrate_h": float(p[3]),
+                "substrate_W": float(p[0] + 6*p[3]),
+                "substrate_L": float(p[1] + 6*p[3]),
+                "eps_r": float(p[4]),
+                "feed_width": float(p[5]),
+                "feed_type": str(res["feed_type_label"][k]),
+                "pred_freq_ghz": float(res["predicted"][k][0]),
+                "pred_bw_mhz": float(res["predicted"][k][1]),
+                "objective": float(res["objective"][k]),
+            }))
+    return [designs[slot] if isinstance(slot, int) else slot for slot in slots]
+
+
+def read_progress(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"lines_done": 0, "output_bytes": 0}
+
+
+def write_progress(path, lines_done, output_bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"lines_done": lines_done, "output_bytes": output_bytes, "updated": time.time()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def chunks(stream, skip, size):
+    """Lazily yield (first_line_no, [(line_no, line), ...], next_line_no), skipping `skip` done lines."""
+    numbered = ((n, line) for n, line in enumerate(stream) if n >= skip)
+    while True:
+        block = list(itertools.islice(numbered, size))
+        if not block:
+            return
+        yield block[0][0], [(n, line) for n, line in block if line.strip()], block[-1][0] + 1
+
+
+def run(args):
+    progress_path = args.output + PROGRESS_SUFFIX
+    progress = read_progress(progress_path) if args.resume else {"lines_done": 0, "output_bytes": 0}
+    skip = progress["lines_done"]
+    mode = "r+b" if (args.resume and os.path.exists(args.output)) else "wb"
+    out = open(args.output, mode)
+    out.seek(progress["output_bytes"])
+    out.truncate()   # drop anything written after the last committed chunk
+    stream = sys.stdin if args.input == "-" else open(args.input)
+    if skip:
+        print(f"[batch] resuming after {skip} input lines", file=sys.stderr)
+
+    if args.workers > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(args.workers, initializer=_init_worker,
+                                    initargs=(args.inference_mode, args.forward_mode))
+        submit = lambda task: pool.apply_async(design_chunk, (task,))
+        collect = lambda handle: handle.get()
+    else:
+        _init_worker(args.inference_mode, args.forward_mode)
+        pool = None
+        submit = lambda task: task
+        collect = design_chunk
+
+    t0, done_rows = time.perf_counter(), 0
+    pending = deque()   # bounded window of in-flight chunks, written back in input order
+
+    def drain_one():
+        nonlocal done_rows
+        handle, lines_after, n_rows = pending.popleft()
+        for line in collect(handle):
+            out.write((line + "\n").encode())
+        out.flush()
+        os.fsync(out.fileno())
+        write_progress(progress_path, lines_after, out.tell())
+        done_rows += n_rows
+        rate = done_rows / max(time.perf_counter() - t0, 1e-9)
+        print(f"[batch] {skip + done_rows} lines done ({rate:.0f} targets/s)", file=sys.stderr)
+
+    try:
+        for first, lines, lines_after in chunks(stream, skip, args.chunk):
+            task = (first, lines, args.population, args.rounds)
+            pending.append((submit(task), lines_after, lines_after - first))
+            if len(pending) >= max(2 * args.workers, 1):
+                drain_one()
+        while pending:
+            drain_one()
+    finally:
+        if pool is not None:
+            pool.terminate()
+        out.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream target specs (JSONL) through the batched optimizer.")
+    parser.add_argument("-i", "--input", default="-", help="JSONL target file, '-' for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL output file")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="targets per vectorized chunk")
+    parser.add_argument("--workers", type=int, default=1, help="processes (each loads its own TrainedAI)")
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=25)
+    parser.add_argument("--inference-mode", default=None, help="keras, float16 or int8 (see lite_inference.py)")
+    parser.add_argument("--forward-mode", default=None, help="nn or multifidelity")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="start over instead of continuing from <output>.progress")
+    run(parser.parse_args())
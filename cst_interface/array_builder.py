@@ -0,0 +1,166 @@
+"""
+Geometry of an nx x ny rectangular patch array and the single looped CST macro that builds it.
+
+array_layout() computes every solid as a vectorized (n, 6) array of [x1, x2, y1, y2, z1, z2]
+boxes in mm: patches and their quarter-wave feed stubs on a uniform lattice, one bus line per
+row joining the stubs, a trunk at the left edge joining the buses to the port, and the
+substrate / ground sized to the array extent. Because the lattice is uniform, CST does not
+need the coordinates themselves: the "define array" macro (database/commands.json) rebuilds
+them from the lattice origin, pitch and element sizes in For loops, so the whole array is ONE
+history entry whose text does not grow with the element count (a 64 x 64 array adds ~8k
+history entries and ~2 MB of macro text the one-brick-per-run_command way).
+
+    layout = array_layout(params, freq_ghz, nx=8, ny=8)
+    driver.run_command("define array", **array_command_kwargs(layout, substrate, conductor))
+
+The arrays are what the rest of the code checks against (clearances, footprint, port
+position); the macro must produce the same boxes, which array_boxes_from_loops() verifies.
+"""
+import numpy as np
+
+C0 = 299792458.0
+ARRAY_DEFAULT_SHAPE = (4, 4)          # elements along x, y when params carry no array_nx / array_ny
+ARRAY_MIN_PITCH_WAVELENGTHS = 0.5     # lattice pitch at least this many free-space wavelengths
+ARRAY_MIN_GAP = 1.0                   # mm, minimum copper-to-copper clearance between neighbours
+ARRAY_EDGE_MARGIN_WAVELENGTHS = 0.25  # substrate margin around the copper
+ARRAY_COMPONENT = "component1"
+COPPER_T = 0.035                      # mm, conductor thickness used by the single patch too
+
+
+def array_shape(params):
+    return (int(params.get("array_nx", ARRAY_DEFAULT_SHAPE[0])),
+            int(params.get("array_ny", ARRAY_DEFAULT_SHAPE[1])))
+
+
+def array_layout(params, freq_ghz, nx=None, ny=None, pitch=None):
+    """
+    Vectorized geometry of the array in mm. params is a single-element design dict
+    (patch_W, patch_L, substrate_h, feed_width in m, as from TrainedAI.optimize_parameters);
+    pitch=(dx, dy) in mm overrides the lattice pitch. Returns a dict of scalars (lattice
+    description, what the looped macro needs) and box arrays (patches, stubs, buses,
+    trunk, substrate, ground).
+    """
+    if nx is None or ny is None:
+        nx, ny = array_shape(params)
+    pw, pl = params["patch_W"] * 1e3, params["patch_L"] * 1e3
+    h, fw = params["substrate_h"] * 1e3, params["feed_width"] * 1e3
+    lam0 = C0 / (float(freq_ghz) * 1e9) * 1e3
+    fl = pl / 2                                   # ~quarter guided wavelength (L ~ lambda_g / 2)
+    if pitch is None:
+        # the trunk sits half a pitch left of the first column: it needs its own gap to that patch
+        dx = max(ARRAY_MIN_PITCH_WAVELENGTHS * lam0, pw + ARRAY_MIN_GAP, pw + fw + 2 * ARRAY_MIN_GAP)
+        dy = max(ARRAY_MIN_PITCH_WAVELENGTHS * lam0, pl + fl + fw + ARRAY_MIN_GAP)
+    else:
+        dx, dy = pitch
+    # lattice centred on the origin
+    x0, y0 = -(nx - 1) * dx / 2, -(ny - 1) * dy / 2
+    xc, yc = np.meshgrid(x0 + dx * np.arange(nx), y0 + dy * np.arange(ny), indexing="ij")
+    xc, yc = xc.ravel(), yc.ravel()               # element k = i * ny + j
+    n = nx * ny
+    z_cu = np.array([h, h + COPPER_T])
+
+    def boxes(x1, x2, y1, y2, z):
+        x1, x2, y1, y2 = np.broadcast_arrays(x1, x2, y1, y2)
+        return np.column_stack([x1, x2, y1, y2, np.full(len(x1), z[0]), np.full(len(x1), z[1])])
+
+    patches = boxes(xc - pw / 2, xc + pw / 2, yc - pl / 2, yc + pl / 2, z_cu)
+    stubs = boxes(xc - fw / 2, xc + fw / 2, yc - pl / 2 - fl, yc - pl / 2, z_cu)
+    row_y = y0 + dy * np.arange(ny) - pl / 2 - fl             # top edge of each row's bus
+    trunk_x = x0 - dx / 2
+    buses = boxes(np.full(ny, trunk_x - fw / 2), x0 + (nx - 1) * dx + fw / 2, row_y - fw, row_y, z_cu)
+
+    copper = np.vstack([patches, stubs, buses])
+    margin = ARRAY_EDGE_MARGIN_WAVELENGTHS * lam0
+    sx1, sx2 = trunk_x - fw / 2 - margin, copper[:, 1].max() + margin
+    sy1, sy2 = copper[:, 2].min() - margin, copper[:, 3].max() + margin
+    trunk = boxes(np.array([trunk_x - fw / 2]), trunk_x + fw / 2, sy1, row_y[-1], z_cu)
+    substrate = np.array([[sx1, sx2, sy1, sy2, 0.0, h]])
+    ground = np.array([[sx1, sx2, sy1, sy2, -COPPER_T, 0.0]])
+
+    return {"nx": nx, "ny": ny, "n_elements": n, "dx": dx, "dy": dy, "x0": x0, "y0": y0,
+            "pw": pw, "pl": pl, "fw": fw, "fl": fl, "h": h, "lambda0": lam0, "trunk_x": trunk_x,
+            "patches": patches, "stubs": stubs, "buses": buses, "trunk": trunk,
+            "substrate": substrate, "ground": ground,
+            "footprint_mm2": (sx2 - sx1) * (sy2 - sy1)}
+
+
+def min_clearance(layout):
+    """Smallest copper gap (mm): patch to patch along x, patch to the next row's bus, first column to the trunk."""
+    gx = layout["dx"] - layout["pw"]
+    # row j's bus runs a stub length below its patches and above row j - 1's patches
+    gy = layout["dy"] - layout["pl"] - layout["fl"] - layout["fw"]
+    gt = layout["dx"] / 2 - layout["pw"] / 2 - layout["fw"] / 2
+    return float(min(gx, gy, gt))
+
+
+def check_layout(layout):
+    clearance = min_clearance(layout)
+    if clearance <= 0:
+        raise ValueError(f"array pitch too small: neighbouring copper overlaps by {-clearance:.3f} mm")
+    return clearance
+
+
+def _fmt(v, digits=4):
+    return "{:.{}f}".format(v, digits)
+
+
+def array_command_kwargs(layout, substrate, conductor, component_name=ARRAY_COMPONENT):
+    """Keyword arguments of the "define array" macro: lattice scalars only, independent of nx * ny."""
+    sub, gnd, trunk = layout["substrate"][0], layout["ground"][0], layout["trunk"][0]
+    return dict(component_name=component_name, substrate=substrate, conductor=conductor,
+                nx=layout["nx"], ny=layout["ny"],
+                # lattice scalars get extra digits: their rounding error grows with the element index
+                dx=_fmt(layout["dx"], 7), dy=_fmt(layout["dy"], 7), x0=_fmt(layout["x0"], 7), y0=_fmt(layout["y0"], 7),
+                pw=_fmt(layout["pw"]), pl=_fmt(layout["pl"]), fw=_fmt(layout["fw"]), fl=_fmt(layout["fl"]),
+                tx=_fmt(layout["trunk_x"]),
+                sx1=_fmt(sub[0]), sx2=_fmt(sub[1]), sy1=_fmt(sub[2]), sy2=_fmt(sub[3]),
+                h=_fmt(sub[5]), ht=_fmt(sub[5] + COPPER_T), gz=_fmt(gnd[4]),
+                ty2=_fmt(trunk[3]))
+
+
+def array_port_kwargs(layout):
+    """"select port" keyword arguments for the port on the trunk's lower end (the substrate edge)."""
+    tx, fw, h = layout["trunk_x"], layout["fw"], layout["h"]
+    y = layout["trunk"][0][2]
+    return dict(Xrange=_fmt(tx - fw / 2), XrangeEnd=_fmt(tx + fw / 2),
+                XrangeAdd=f"{7.92}*{h:.4f}", XrangeAddEnd=f"{7.92}*{h:.4f}",
+                Yrange=_fmt(y), YrangeEnd=_fmt(y),
+                YrangeAdd=f"{7.92}*{h:.4f}", YrangeAddEnd=f"{7.92}*{h:.4f}",
+                Zrange=_fmt(h), ZrangeEnd=_fmt(h + COPPER_T),
+                ZrangeAdd="0.0", ZrangeAddEnd=f"{7.92}*{h:.4f}")
+
+
+def array_boxes_from_loops(kwargs):
+    """
+    Boxes the "define array" macro creates, evaluated with the same loop arithmetic as the
+    VBA (from the formatted kwargs, so rounding matches). Returns (patches, stubs, buses).
+    """
+    f = {k: float(v) for k, v in kwargs.items() if k not in ("component_name", "substrate", "conductor")}
+    patches, stubs, buses = [], [], []
+    for i in range(int(f["nx"])):
+        xc = f["x0"] + i * f["dx"]
+        for j in range(int(f["ny"])):
+            yc = f["y0"] + j * f["dy"]
+            patches.append([xc - f["pw"] / 2, xc + f["pw"] / 2, yc - f["pl"] / 2, yc + f["pl"] / 2])
+            stubs.append([xc - f["fw"] / 2, xc + f["fw"] / 2, yc - f["pl"] / 2 - f["fl"], yc - f["pl"] / 2])
+    for j in range(int(f["ny"])):
+        yb = f["y0"] + j * f["dy"] - f["pl"] / 2 - f["fl"]
+        buses.append([f["tx"] - f["fw"] / 2, f["x0"] + (f["nx"] - 1) * f["dx"] + f["fw"] / 2, yb - f["fw"], yb])
+    return np.array(patches), np.array(stubs), np.array(buses)
+
+
+def brick_commands(layout, substrate, conductor, component_name=ARRAY_COMPONENT):
+    """
+    The same array as one "define brick" command per solid (the single-patch way), for
+    comparison: history entries and macro size grow with nx * ny.
+    """
+    cmds = []
+    for kind, material, key in (("substrate", substrate, "substrate"), ("ground", conductor, "ground"),
+                                ("patch", conductor, "patches"), ("feed", conductor, "stubs"),
+                                ("bus", conductor, "buses"), ("trunk", conductor, "trunk")):
+        for k, (x1, x2, y1, y2, z1, z2) in enumerate(layout[key]):
+            cmds.append(("define brick", dict(solid_name=f"{kind}_{k}" if len(layout[key]) > 1 else kind,
+                                              component_name=component_name, material=material,
+                                              x1=_fmt(x1), x2=_fmt(x2), y1=_fmt(y1), y2=_fmt(y2),
+                                              z1=_fmt(z1), z2=_fmt(z2))))
+    return cmds
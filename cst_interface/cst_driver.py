@@ -1,21 +1,102 @@
 import json
 import os
-from cst.interface import DesignEnvironment
-import cst.results
+import csv
 import  time
 import numpy as np
+from profiling import maybe_profile
+from cst_interface.sim_cache import design_key
+from cst_interface.array_builder import array_layout, check_layout, array_command_kwargs, array_port_kwargs, ARRAY_COMPONENT
+try:
+    from cst.interface import DesignEnvironment
+    import cst.results
+except ImportError:  # macro generation and S11 post-processing below work without CST installed
+    DesignEnvironment = None
+
+SOLVER_DEFAULT_HALF_SPAN = 1.0   # GHz, fixed freq ± 1 GHz window used when there is no prediction
+SOLVER_MIN_HALF_SPAN = 0.15      # GHz, narrowest window ever requested
+SOLVER_BW_FACTOR = 3.0           # half-span in multiples of the predicted -10 dB bandwidth
+SOLVER_SIGMA_FACTOR = 4.0        # extra half-span per std of the predicted Fr
+SOLVER_EDGE_FRACTION = 0.05      # S11 minimum this close (fraction of span) to an edge => widen
+SOLVER_EXPAND_FACTOR = 2.0       # the touched side grows by (factor - 1) * span
+SOLVER_MAX_EXPANSIONS = 3
+SOLVER_SPAN_LOG = "solver_span_log.csv"
+
+
+def solver_window(pred_Fr_ghz, pred_BW_mhz=None, fr_std_ghz=None, bw_std_mhz=None):
+    """
+    Solver frequency window (f_min, f_max) in GHz centred on the surrogate's predicted Fr.
+    The half-span covers SOLVER_BW_FACTOR predicted bandwidths (plus 2 std when known)
+    and SOLVER_SIGMA_FACTOR std of the Fr prediction.
+    """
+    if pred_Fr_ghz is None:
+        return None
+    half = SOLVER_MIN_HALF_SPAN
+    if pred_BW_mhz is not None and pred_BW_mhz > 0:
+        bw = pred_BW_mhz + 2 * (bw_std_mhz or 0.0)
+        half = max(half, SOLVER_BW_FACTOR * bw / 1e3)
+    if fr_std_ghz:
+        half += SOLVER_SIGMA_FACTOR * fr_std_ghz
+    return max(float(pred_Fr_ghz) - half, 0.1), float(pred_Fr_ghz) + half
+
+
+def expand_window_if_edge(freqs, s11_db, window, threshold=-10.0):
+    """
+    Return a widened (f_min, f_max) when the S11 minimum, or the below-threshold band,
+    touches an edge of the simulated window; None when the window already contains it.
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    s11_db = np.asarray(s11_db, dtype=float)
+    f_lo, f_hi = window
+    span = f_hi - f_lo
+    edge = SOLVER_EDGE_FRACTION * span
+    f_min = freqs[np.argmin(s11_db)]
+    grow_low = (f_min - f_lo) < edge or s11_db[0] <= threshold
+    grow_high = (f_hi - f_min) < edge or s11_db[-1] <= threshold
+    if not (grow_low or grow_high):
+        return None
+    grow = (SOLVER_EXPAND_FACTOR - 1) * span
+    return (max(f_lo - grow, 0.1) if grow_low else f_lo), (f_hi + grow if grow_high else f_hi)
+
+
+def s11_metrics(freqs, s11_db, threshold=-10.0):
+    """Resonant frequency (S11 minimum), bandwidth below `threshold` dB and the minimum, in the units of freqs."""
+    freqs = np.asarray(freqs, dtype=float)
+    s11_db = np.asarray(s11_db, dtype=float)
+    # --- Find Resonant Frequency (minimum S11) ---
+    min_idx = np.argmin(s11_db)
+    Fr = freqs[min_idx]
+    S11_min = s11_db[min_idx]
+
+    # --- Find Bandwidth (-10 dB crossing points) ---
+    below_10_mask = s11_db <= threshold
+    if np.any(below_10_mask):
+        indices = np.where(below_10_mask)[0]
+        f_low = freqs[indices[0]]
+        f_high = freqs[indices[-1]]
+        BW = f_high - f_low
+    else:
+        BW = 0.0  # no -10 dB crossings
+
+    return Fr, BW, S11_min
+
+
+@maybe_profile
 class CSTDriver:
-    def __init__(self, cst_project=None):
-        self.material_library = r"cst_interface\database\material_library.json"
+    def __init__(self, cst_project=None, cache=None, trace_store=None):
+        self.material_library = os.path.join(os.path.dirname(__file__), "database", "material_library.json")
         self.cst_project = cst_project
+        self.cache = cache    # optional sim_cache.SimulationCache
+        self.trace_store = trace_store    # optional s11_store.S11Store keeping every solved trace
+        self.de = None
 
         # Load macro commands
-        json_path = os.path.join(os.path.dirname(__file__), r"database\commands.json")
+        json_path = os.path.join(os.path.dirname(__file__), "database", "commands.json")
         with open(json_path, "r") as f:
             self.commands = json.load(f)
 
 
-    def add_material(self,m_name):
+    def material_macro(self, m_name):
+        """VBA macro that defines material m_name from the material library."""
         def json_to_macro(material_json, material_name):
             if material_name not in material_json:
                 raise ValueError("Material not found in JSON")
@@ -43,8 +124,10 @@ class CSTDriver:
         with open(self.material_library, "r") as f:
             loaded_json = json.load(f)
 
-        macro_reproduced = json_to_macro(loaded_json, m_name)
-        self.mws.model3d.add_to_history(m_name, macro_reproduced)
+        return json_to_macro(loaded_json, m_name)
+
+    def add_material(self,m_name):
+        self.mws.model3d.add_to_history(m_name, self.material_macro(m_name))
 
     def run_command(self, name: str, **kwargs):
         """
@@ -52,20 +135,21 @@ class CSTDriver:
         Example:
             driver.run_command("export_s11", filename="C:\\temp\\s11.txt")
         """
+        macro = self.format_command(name, **kwargs)
+        self.mws.model3d.add_to_history(name, macro)
+
+    def format_command(self, name: str, **kwargs):
+        """Macro text run_command would add to the history (no CST needed)."""
         if name not in self.commands:
             raise ValueError(f"Unknown command: {name}")
 
         macro = self.commands[name]
         if kwargs:
             macro = macro.format(**kwargs)
+        return macro
 
-        self.mws.model3d.add_to_history(name, macro)
-        
-    def extract_s11_results(self,cst_path: str):
-        """
-        Extract S11 from a CST .cst file and compute resonant frequency & bandwidth.
-        Returns: (Fr_GHz, BW_GHz, S11_min_dB)
-        """
+    def extract_s11_trace(self, cst_path: str):
+        """Frequencies (GHz) and S11 in dB of the S1,1 result of a CST .cst file."""
         # Load CST project results
         project = cst.results.ProjectFile(cst_path, allow_interactive=True)
         
@@ -80,106 +164,209 @@ class CSTDriver:
         # Extract S11 complex values from the data tuples
         s11_complex = np.array([d[1] for d in data])
         s11_db = 20 * np.log10(np.abs(s11_complex))
-        
-        # --- Find Resonant Frequency (minimum S11) ---
-        min_idx = np.argmin(s11_db)
-        Fr = freqs[min_idx]
-        S11_min = s11_db[min_idx]
-
-        # --- Find Bandwidth (-10 dB crossing points) ---
-        below_10_mask = s11_db <= -10
-        if np.any(below_10_mask):
-            indices = np.where(below_10_mask)[0]
-            f_low = freqs[indices[0]]
-            f_high = freqs[indices[-1]]
-            BW = f_high - f_low
-        else:
-            BW = 0.0  # no -10 dB crossings
-
-        return Fr, BW, S11_min
-        
-    def standard_antenna(self, family, shape, freq, substrate, conductor, params, retry=False, firsttime=True):
+        return freqs, s11_db
+
+    def extract_s11_results(self,cst_path: str):
+        """
+        Extract S11 from a CST .cst file and compute resonant frequency & bandwidth.
+        Returns: (Fr_GHz, BW_GHz, S11_min_dB)
+        """
+        freqs, s11_db = self.extract_s11_trace(cst_path)
+        return s11_metrics(freqs, s11_db)
+
+    def simulate(self, params, family, shape, freq, substrate, conductor, result_path,
+                 predicted=None, retry=False, firsttime=True):
+        """
+        Build + solve one design and return (Fr_GHz, BW_MHz, S11_min_dB).
+        predicted: optional (Fr_GHz, BW_MHz, Fr_std_GHz, BW_std_MHz) from the surrogate; the
+        solver then sweeps only solver_window() around it instead of freq ± 1 GHz. If the S11
+        minimum lands on a window edge the range is widened and only the solver is re-run,
+        up to SOLVER_MAX_EXPANSIONS times. Every solver run's span is logged to SOLVER_SPAN_LOG.
+        With a SimulationCache attached, a design whose macros were already solved over a
+        covering window is answered from the cache without touching CST. With an S11Store
+        attached, every solved trace is kept under the same content-hash design ID.
+        """
+        window = solver_window(*predicted) if predicted is not None else None
+        if window is None:
+            window = (float(freq) - SOLVER_DEFAULT_HALF_SPAN, float(freq) + SOLVER_DEFAULT_HALF_SPAN)
+        cache_key = None
+        if self.cache is not None or self.trace_store is not None:
+            cache_key = self.design_key(freq, substrate, conductor, params, family, shape)
+        if self.cache is not None:
+            hit = self.cache.get(cache_key, window)
+            if hit is not None:
+                print(f"[CST][cache] hit {cache_key[:12]}, solver skipped")
+                return hit["Fr"], hit["BW"] * 1e3, hit["S11_min"]
+        t0 = time.perf_counter()
+        self.standard_antenna(family, shape, freq, substrate, conductor, params,
+                              retry=retry, firsttime=firsttime, freq_window=window)
+        freqs, s11_db = self.extract_s11_trace(result_path)
+        for _ in range(SOLVER_MAX_EXPANSIONS):
+            wider = expand_window_if_edge(freqs, s11_db, window)
+            if wider is None:
+                break
+            print(f"[CST] S11 minimum at band edge, widening solver window {window} -> {wider}")
+            window = wider
+            self.run_command("set solver freq range", **self.solver_range_kwargs(window))
+            self.run_command("run Solver")
+            self._log_span(freq, window, "expanded")
+            freqs, s11_db = self.extract_s11_trace(result_path)
+        Fr, BW, S11_min = s11_metrics(freqs, s11_db)
+        if self.cache is not None:
+            self.cache.put(cache_key, freqs, s11_db, (Fr, BW, S11_min), window, time.perf_counter() - t0)
+        if self.trace_store is not None:
+            try:
+                self.trace_store.append(cache_key, freqs, s11_db, metrics=(Fr, BW, S11_min),
+                                        attrs=dict(params, family=family, shape=shape, target_Fr_GHz=float(freq),
+                                                   substrate=substrate, conductor=conductor, window=list(window)))
+            except Exception as e:
+                print("[CST][s11_store] append failed:", e)
+        return float(Fr), float(BW) * 1e3, float(S11_min)
+
+    def design_key(self, freq, substrate, conductor, params, family="Microstrip Patch", shape="Rectangular"):
+        """Content hash of the macros and materials standard_antenna would send (see sim_cache.py)."""
+        commands = self.antenna_commands(family, shape, freq, substrate, conductor, params)
+        if commands is None:
+            raise ValueError(f"No CST builder for {family} / {shape}")
+        macros = [(name, self.format_command(name, **kwargs)) for name, kwargs in commands]
+        return design_key(macros, [self.material_macro(substrate), self.material_macro(conductor)])
+
+    def solver_range_kwargs(self, window):
+        return {"resonant_frequency1": "{:.4f}".format(window[0]),
+                "resonant_frequency2": "{:.4f}".format(window[1])}
+
+    def _log_span(self, freq, window, reason):
+        try:
+            exists = os.path.exists(SOLVER_SPAN_LOG)
+            with open(SOLVER_SPAN_LOG, "a", newline="") as f:
+                writer = csv.writer(f)
+                if not exists:
+                    writer.writerow(["timestamp", "target_Fr_GHz", "f_min_GHz", "f_max_GHz", "span_GHz", "reason"])
+                writer.writerow([time.time(), float(freq), window[0], window[1], window[1] - window[0], reason])
+        except Exception as e:
+            print("[CST][log_span] failed:", e)
+
+    def patch_antenna_commands(self, freq, substrate, conductor, params, freq_window=None):
+        """
+        (command name, kwargs) pairs that build and solve a rectangular microstrip patch.
+        Pure function of its inputs, so the generated macros can be checked without CST
+        via format_command().
+        """
+        P_W = params['patch_W'] * 1e3  # m to mm
+        P_L = params['patch_L'] * 1e3  # m to mm
+        S_h = params['substrate_h'] * 1e3  # m to mm
+        S_W = params['substrate_W'] * 1e3  # m to mm
+        S_L = params['substrate_L'] * 1e3  # m to mm
+        F_W = params['feed_width'] * 1e3  # m to mm
+        freq = float(freq)  # GHz
+        if freq_window is None:
+            freq_window = (freq - SOLVER_DEFAULT_HALF_SPAN, freq + SOLVER_DEFAULT_HALF_SPAN)
+
+        return [
+            ("define brick", dict(solid_name="substrate",
+                                  component_name="component1",
+                                  material=substrate,
+                                  x1="-{:.4f}".format(S_W/2),
+                                  x2="{:.4f}".format(S_W/2),
+                                  y1="-{:.4f}".format(S_L/2),
+                                  y2="{:.4f}".format(S_L/2),
+                                  z1="0",
+                                  z2="{:.4f}".format(S_h))),
+            ("define brick", dict(solid_name="ground",
+                                  component_name="component1",
+                                  material=conductor,
+                                  x1="-{:.4f}".format(S_W/2),
+                                  x2="{:.4f}".format(S_W/2),
+                                  y1="-{:.4f}".format(S_L/2),
+                                  y2="{:.4f}".format(S_L/2),
+                                  z1="0",
+                                  z2="-0.035")),
+            ("define brick", dict(solid_name="patch",
+                                  component_name="component1",
+                                  material=conductor,
+                                  x1="-{:.4f}".format(P_W/2),
+                                  x2="{:.4f}".format(P_W/2),
+                                  y1="-{:.4f}".format(P_L/2),
+                                  y2="{:.4f}".format(P_L/2),
+                                  z1="{:.4f}".format(S_h),
+                                  z2="{:.4f}".format(0.035+S_h))),
+            ("define brick", dict(solid_name="feed",
+                                  component_name="component1",
+                                  material=conductor,
+                                  x1="-{:.4f}".format(F_W/2),
+                                  x2="{:.4f}".format(F_W/2),
+                                  y1="-{:.4f}".format(P_L/2),
+                                  y2="-{:.4f}".format(S_L/2),
+                                  z1="{sh:.4f}".format(sh=S_h),
+                                  z2="{:.4f}".format(S_h+0.035),)),
+            ("define boundary", {}),
+            ("set solver freq range", self.solver_range_kwargs(freq_window)),
+            ("pick face", dict(component_name="component1", solid_name="feed")),
+            ("select port", dict(Xrange=f"-{F_W/2:.4f}",    # start X
+                                 XrangeEnd=f"{F_W/2:.4f}",  # end X
+                                 XrangeAdd=f"{7.92}*{S_h:.4f}",  # as string (no evaluation)
+                                 XrangeAddEnd=f"{7.92}*{S_h:.4f}",
+
+                                 Yrange="0",    # start Y (single plane)
+                                 YrangeEnd="0", # end Y same as start
+                                 YrangeAdd="{7.92}*{S_h:.4f}",
+                                 YrangeAddEnd="{7.92}*{S_h:.4f}",
+
+                                 Zrange=f"{S_h:.4f}",       # start Z
+                                 ZrangeEnd=f"{(S_h + 0.035):.4f}",  # end Z small thickness (e.g., 0.035 mm)
+                                 ZrangeAdd="0.0",
+                                 ZrangeAddEnd=f"{7.92}*{S_h:.4f}")),
+            ("run Solver", {}),
+        ]
+
+    def array_antenna_commands(self, freq, substrate, conductor, params, freq_window=None):
+        """
+        (command name, kwargs) pairs that build and solve an nx x ny patch array of the
+        single-element design in params (array_nx / array_ny keys, see array_builder.py).
+        The whole array is one looped "define array" macro, whatever the element count.
+        """
+        freq = float(freq)  # GHz
+        if freq_window is None:
+            freq_window = (freq - SOLVER_DEFAULT_HALF_SPAN, freq + SOLVER_DEFAULT_HALF_SPAN)
+        layout = array_layout(params, freq)
+        check_layout(layout)
+        return [
+            ("define array", array_command_kwargs(layout, substrate, conductor)),
+            ("define boundary", {}),
+            ("set solver freq range", self.solver_range_kwargs(freq_window)),
+            ("pick face", dict(component_name=ARRAY_COMPONENT, solid_name="trunk")),
+            ("select port", array_port_kwargs(layout)),
+            ("run Solver", {}),
+        ]
+
+    def antenna_commands(self, family, shape, freq, substrate, conductor, params, freq_window=None):
+        """Build-and-solve commands for a supported (family, shape); None if there is no builder."""
+        if family == "Microstrip Patch" and shape == "Rectangular":
+            return self.patch_antenna_commands(freq, substrate, conductor, params, freq_window)
+        if family == "Array" and shape == "Rectangular":
+            return self.array_antenna_commands(freq, substrate, conductor, params, freq_window)
+        return None
+
+    def standard_antenna(self, family, shape, freq, substrate, conductor, params, retry=False, firsttime=True,
+                         freq_window=None):
         if retry and not firsttime:
             print("Retrying antenna creation with corrected parameters...", params)
-            self.de.close()
+            if self.de is not None:   # None when the previous design came from the cache
+                self.de.close()
 
-        if family == "Microstrip Patch" and shape == "Rectangular":
+        commands = self.antenna_commands(family, shape, freq, substrate, conductor, params, freq_window)
+        if commands is not None:
             self.de = DesignEnvironment()
             self.mws = self.de.new_mws() if self.cst_project is None else self.de.open_mws(self.cst_project)
             self.add_material(substrate)
             self.add_material(conductor)
             time.sleep(2)
-            P_W = params['patch_W'] * 1e3  # m to mm
-            P_L = params['patch_L'] * 1e3  # m to mm
-            S_h = params['substrate_h'] * 1e3  # m to mm
-            S_W = params['substrate_W'] * 1e3  # m to mm
-            S_L = params['substrate_L'] * 1e3  # m to mm
-            F_W = params['feed_width'] * 1e3  # m to mm
-            F_type = params['feed_type']
-            P_W = params['patch_W'] * 1e3  # m to mm
-            freq = float(freq)  # GHz
-            print(P_W, P_L, S_h, S_W, S_L, F_W, F_type, freq)
-
-            lambda_0 = 300.0 / freq  # approx wavelength in mm
-            k_val = lambda_0 / 4
-
-
-            self.run_command("define brick",solid_name="substrate",
-                             component_name="component1",
-                             material=substrate,
-                             x1="-{:.4f}".format(S_W/2),
-                             x2="{:.4f}".format(S_W/2),
-                             y1="-{:.4f}".format(S_L/2),
-                             y2="{:.4f}".format(S_L/2),
-                             z1="0",
-                             z2="{:.4f}".format(S_h))
-            
-            self.run_command("define brick",solid_name="ground",
-                             component_name="component1",
-                             material=conductor,
-                             x1="-{:.4f}".format(S_W/2),
-                             x2="{:.4f}".format(S_W/2),
-                             y1="-{:.4f}".format(S_L/2),
-                             y2="{:.4f}".format(S_L/2),
-                             z1="0",
-                             z2="-0.035")
-            
-            self.run_command("define brick",solid_name="patch",
-                             component_name="component1",
-                             material=conductor,
-                             x1="-{:.4f}".format(P_W/2),
-                             x2="{:.4f}".format(P_W/2),
-                             y1="-{:.4f}".format(P_L/2),
-                             y2="{:.4f}".format(P_L/2),
-                             z1="{:.4f}".format(S_h),
-                             z2="{:.4f}".format(0.035+S_h))
-
-            self.run_command("define brick",solid_name="feed",
-                             component_name="component1",
-                             material=conductor,
-                             x1="-{:.4f}".format(F_W/2),
-                             x2="{:.4f}".format(F_W/2),
-                             y1="-{:.4f}".format(P_L/2),
-                             y2="-{:.4f}".format(S_L/2),
-                             z1="{sh:.4f}".format(sh=S_h),
-                             z2="{:.4f}".format(S_h+0.035),)
-            self.run_command("define boundary")
-            self.run_command("set solver freq range",resonant_frequency1=float(freq)-1.0, resonant_frequency2=float(freq)+1.0)
-            self.run_command("pick face",component_name="component1",solid_name="feed")
-            self.run_command("select port",
-                            Xrange=f"-{F_W/2:.4f}",    # start X
-                            XrangeEnd=f"{F_W/2:.4f}",  # end X
-                            XrangeAdd=f"{7.92}*{S_h:.4f}",  # as string (no evaluation)
-                            XrangeAddEnd=f"{7.92}*{S_h:.4f}",
-
-                            Yrange="0",    # start Y (single plane)
-                            YrangeEnd="0", # end Y same as start
-                            YrangeAdd="{7.92}*{S_h:.4f}",
-                            YrangeAddEnd="{7.92}*{S_h:.4f}",
-
-                            Zrange=f"{S_h:.4f}",       # start Z
-                            ZrangeEnd=f"{(S_h + 0.035):.4f}",  # end Z small thickness (e.g., 0.035 mm)
-                            ZrangeAdd="0.0",
-                            ZrangeAddEnd=f"{7.92}*{S_h:.4f}")
-            self.run_command("run Solver")
+            print(params['patch_W'] * 1e3, params['patch_L'] * 1e3, params['substrate_h'] * 1e3,
+                  params['substrate_W'] * 1e3, params['substrate_L'] * 1e3, params['feed_width'] * 1e3,
+                  params['feed_type'], float(freq))
 
+            for name, kwargs in commands:
+                if name == "set solver freq range":
+                    self._log_span(freq, (float(kwargs["resonant_frequency1"]), float(kwargs["resonant_frequency2"])),
+                                   "initial")
+                self.run_command(name, **kwargs)
@@ -0,0 +1,189 @@
+"""
+Chunked, compressed HDF5 store for full S11 traces, indexed by design ID.
+
+Traces have different lengths (the solver window and sample count vary per design), so
+they are kept ragged: every trace is appended to two flat 1-D datasets (freqs_ghz,
+s11_db) and offsets[i]:offsets[i + 1] marks design i. Per-design rows hold the ID, the
+(Fr, BW, S11_min) metrics and a JSON blob of the parameters that produced it. All
+datasets are resizable, chunked and lzf-compressed with byte shuffling, so appends only
+touch the tail chunk, and a bulk read of many consecutive designs is one contiguous
+slice that is split with the offsets afterwards.
+
+    with S11Store() as store:
+        store.append(design_id, freqs, s11_db, metrics=(Fr, BW, S11_min), attrs=params)
+        freqs, s11_db = store.get(design_id)
+        traces = store.read_range(0, len(store))
+        grid_traces = store.resampled(np.linspace(1, 6, 501))
+
+The CST driver uses the simulation-cache content hash (sim_cache.design_key) as design ID.
+h5py handles are not safe to share between threads, so every public method runs under a
+per-store lock (concurrent GUI sessions share one store, see serving.py). HDF5 allows one
+writing process per file, so queue workers each write their own store (worker_store_path).
+"""
+import os
+import re
+import json
+import time
+import threading
+import numpy as np
+import h5py
+
+S11_STORE_PATH = "s11_traces.h5"
+S11_CHUNK_POINTS = 1 << 16      # samples per chunk of the flat trace datasets
+S11_CHUNK_ROWS = 1024           # designs per chunk of the per-design datasets
+
+
+def worker_store_path(worker_id, path=S11_STORE_PATH):
+    """Trace store of one queue worker: s11_traces-<worker_id>.h5 next to path."""
+    root, ext = os.path.splitext(path)
+    safe_id = re.sub(r"[^\w.-]", "_", str(worker_id))
+    return f"{root}-{safe_id}{ext}"
+
+
+class S11Store:
+    def __init__(self, path=S11_STORE_PATH, mode="a"):
+        self.path = path
+        self._lock = threading.RLock()
+        self.f = h5py.File(path, mode)
+        if "offsets" not in self.f:
+            if mode == "r":
+                raise ValueError(f"{path} is not an S11 store")
+            self._create()
+        self._index = {key.decode() if isinstance(key, bytes) else key: i
+                       for i, key in enumerate(self.f["design_id"][:])}
+
+    def _create(self):
+        flat = dict(maxshape=(None,), chunks=(S11_CHUNK_POINTS,), compression="lzf", shuffle=True)
+        self.f.create_dataset("freqs_ghz", shape=(0,), dtype="f4", **flat)
+        self.f.create_dataset("s11_db", shape=(0,), dtype="f4", **flat)
+        self.f.create_dataset("offsets", data=np.zeros(1, dtype="i8"), maxshape=(None,), chunks=(S11_CHUNK_ROWS,))
+        rows = dict(maxshape=(None,), chunks=(S11_CHUNK_ROWS,))
+        self.f.create_dataset("design_id", shape=(0,), dtype=h5py.string_dtype(), **rows)
+        self.f.create_dataset("attrs", shape=(0,), dtype=h5py.string_dtype(), compression="lzf", **rows)
+        self.f.create_dataset("created", shape=(0,), dtype="f8", **rows)
+        self.f.create_dataset("metrics", shape=(0, 3), dtype="f4", maxshape=(None, 3), chunks=(S11_CHUNK_ROWS, 3))
+        self.f.attrs["metrics_columns"] = "Fr_GHz,BW_GHz,S11_min_dB"
+
+    # ----- writing -----
+    def append(self, design_id, freqs, s11_db, metrics=None, attrs=None):
+        """Append one trace (replacing nothing: an existing ID keeps its first trace). Returns its row."""
+        return self.append_many([design_id], [freqs], [s11_db],
+                                None if metrics is None else [metrics],
+                                None if attrs is None else [attrs])[0]
+
+    def append_many(self, design_ids, freqs_list, s11_list, metrics=None, attrs=None):
+        """Append several traces with one resize per dataset; returns their rows."""
+        with self._lock:
+            return self._append_many(design_ids, freqs_list, s11_list, metrics, attrs)
+
+    def _append_many(self, design_ids, freqs_list, s11_list, metrics, attrs):
+        rows, keep = [], []
+        for k, design_id in enumerate(design_ids):
+            if design_id in self._index:
+                rows.append(self._index[design_id])
+            else:
+                rows.append(len(self) + len(keep))
+                keep.append(k)
+        if not keep:
+            return rows
+        lengths = np.array([len(freqs_list[k]) for k in keep], dtype="i8")
+        offsets = self.f["offsets"]
+        start_row, start_point = len(self), int(offsets[-1])
+        n_new, n_points = len(keep), int(lengths.sum())
+
+        for name, values in (("freqs_ghz", freqs_list), ("s11_db", s11_list)):
+            ds = self.f[name]
+            ds.resize((start_point + n_points,))
+            ds[start_point:] = np.concatenate([np.asarray(values[k], dtype="f4") for k in keep])
+        offsets.resize((start_row + n_new + 1,))
+        offsets[start_row + 1:] = start_point + np.cumsum(lengths)
+
+        for name in ("design_id", "attrs", "created"):
+            self.f[name].resize((start_row + n_new,))
+        self.f["metrics"].resize((start_row + n_new, 3))
+        self.f["design_id"][start_row:] = [design_ids[k] for k in keep]
+        self.f["attrs"][start_row:] = [json.dumps(attrs[k], default=str) if attrs is not None else "{}" for k in keep]
+        self.f["created"][start_row:] = time.time()
+        self.f["metrics"][start_row:] = (np.asarray([metrics[k] for k in keep], dtype="f4")
+                                         if metrics is not None else np.nan)
+        for k in keep:
+            self._index[design_ids[k]] = rows[k]
+        self.f.flush()
+        return rows
+
+    # ----- reading -----
+    def __len__(self):
+        with self._lock:
+            return len(self.f["offsets"]) - 1
+
+    def __contains__(self, design_id):
+        return design_id in self._index
+
+    def row(self, design_id):
+        return self._index[design_id]
+
+    def get(self, design_id):
+        """(freqs_ghz, s11_db) of one design."""
+        return self.get_row(self._index[design_id])
+
+    def get_row(self, i):
+        with self._lock:
+            lo, hi = self.f["offsets"][i:i + 2]
+            return self.f["freqs_ghz"][lo:hi], self.f["s11_db"][lo:hi]
+
+    def metrics(self, rows=slice(None)):
+        with self._lock:
+            return self.f["metrics"][rows]
+
+    def attrs(self, i):
+        with self._lock:
+            return json.loads(self.f["attrs"][i])
+
+    def read_range(self, start=0, stop=None):
+        """List of (freqs, s11_db) for designs start..stop-1, read as one slice per dataset."""
+        with self._lock:
+            stop = len(self) if stop is None else min(stop, len(self))
+            offsets = self.f["offsets"][start:stop + 1]
+            freqs = self.f["freqs_ghz"][offsets[0]:offsets[-1]]
+            s11 = self.f["s11_db"][offsets[0]:offsets[-1]]
+        cuts = offsets[1:-1] - offsets[0]
+        return list(zip(np.split(freqs, cuts), np.split(s11, cuts)))
+
+    def resampled(self, grid, start=0, stop=None, batch=8192, fill=0.0):
+        """
+        (n, len(grid)) float32 matrix of S11 in dB interpolated onto grid (GHz), read in
+        batches of contiguous designs; points outside a trace's solved range get `fill`
+        (None: the trace's edge value).
+        """
+        grid = np.asarray(grid, dtype="f4")
+        stop = len(self) if stop is None else min(stop, len(self))
+        out = np.empty((stop - start, len(grid)), dtype="f4")
+        for b in range(start, stop, batch):
+            for k, (freqs, s11) in enumerate(self.read_range(b, min(b + batch, stop))):
+                out[b - start + k] = np.interp(grid, freqs, s11, left=fill, right=fill)
+        return out
+
+    def close(self):
+        with self._lock:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize an S11 trace store.")
+    parser.add_argument("path", nargs="?", default=S11_STORE_PATH)
+    args = parser.parse_args()
+    with S11Store(args.path, "r") as store:
+        n = len(store)
+        points = int(store.f["offsets"][-1])
+        print(f"{args.path}: {n} designs, {points} samples ({points / max(n, 1):.0f} per trace)")
+        if n:
+            m = store.metrics()
+            print(f"  Fr {np.nanmin(m[:, 0]):.3f}..{np.nanmax(m[:, 0]):.3f} GHz, "
+                  f"S11 min {np.nanmin(m[:, 2]):.1f}..{np.nanmax(m[:, 2]):.1f} dB")
@@ -0,0 +1,200 @@
+"""
+Content-addressed cache of solved CST designs.
+
+The key is a sha256 over the canonical macro text CSTDriver would send to CST (the
+geometry bricks with their 4-decimal millimetre values, boundary, port and solver
+macros) plus the material definitions. Two requests that render to the same macros
+share one solve. The solver frequency range is left out of the key and stored with
+the entry instead: a cached trace answers any request whose window it covers, so a
+design re-requested with a narrower surrogate-driven window still hits.
+
+Each entry is <key>.npz (S11 trace + metrics) next to a JSON index holding sizes,
+last-access times and how long the original solve took; the least recently used
+entries are evicted once the directory grows past max_bytes.
+
+Several worker processes may share one cache directory: every index update re-reads
+index.json under an exclusive lock on index.lock and writes it back through a
+per-process temporary file, so no process overwrites entries or counts another added.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import contextlib
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:         # Windows
+    fcntl = None
+    import msvcrt
+
+SIM_CACHE_DIR = "sim_cache"
+SIM_CACHE_MAX_BYTES = 256 * 2**20
+SIM_CACHE_INDEX = "index.json"
+SIM_CACHE_LOCK = "index.lock"
+WINDOW_MACRO = "set solver freq range"
+
+
+def design_key(macros, materials=()):
+    """sha256 of the (name, macro text) pairs and material macros, ignoring the solver window macro."""
+    payload = {
+        "macros": [[name, text] for name, text in macros if name != WINDOW_MACRO],
+        "materials": list(materials),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SimulationCache:
+    def __init__(self, cache_dir=SIM_CACHE_DIR, max_bytes=SIM_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._read_index()
+
+    # ----- index -----
+    def _index_path(self):
+        return os.path.join(self.cache_dir, SIM_CACHE_INDEX)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("stats", {"hits": 0, "misses": 0, "saved_seconds": 0.0, "evicted": 0})
+        return index
+
+    def _write_index(self):
+        tmp = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self._index_path())
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """
+        Hold the thread lock and the inter-process lock on index.lock, with self.index
+        freshly re-read from disk; the index is written back on exit.
+        """
+        with self._lock, open(os.path.join(self.cache_dir, SIM_CACHE_LOCK), "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                self.index = self._read_index()
+                yield
+                self._write_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    # ----- lookup / store -----
+    def get(self, key, window=None):
+        """
+        Cached {"freqs", "s11_db", "Fr", "BW", "S11_min", "window"} for key, or None. With a
+        window (f_min, f_max) in GHz the entry only counts if its solved range covers it.
+        """
+        with self._locked():
+            entry = self.index["entries"].get(key)
+            covered = entry is not None and (window is None or
+                                             (entry["window"][0] <= window[0] + 1e-9 and
+                                              entry["window"][1] >= window[1] - 1e-9))
+            if not covered or not os.path.exists(self._entry_path(key)):
+                self.index["stats"]["misses"] += 1
+                return None
+            with np.load(self._entry_path(key)) as data:
+                result = {"freqs": data["freqs"], "s11_db": data["s11_db"]}
+                result["Fr"], result["BW"], result["S11_min"] = (float(v) for v in data["metrics"])
+            result["window"] = tuple(entry["window"])
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self.index["stats"]["hits"] += 1
+            self.index["stats"]["saved_seconds"] += entry["solve_seconds"]
+            return result
+
+    def put(self, key, freqs, s11_db, metrics, window, solve_seconds):
+        """Store one solved trace; metrics = (Fr, BW, S11_min) in the units of freqs."""
+        path = self._entry_path(key)
+        # written outside the lock under a per-process name, so readers never see half a file
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, freqs=np.asarray(freqs, dtype=float),
+                                s11_db=np.asarray(s11_db, dtype=float),
+                                metrics=np.asarray(metrics, dtype=float))
+        with self._locked():
+            os.replace(tmp, path)
+            self.index["entries"][key] = {
+                "size": os.path.getsize(path),
+                "window": [float(window[0]), float(window[1])],
+                "solve_seconds": float(solve_seconds),
+                "created": time.time(),
+                "last_used": time.time(),
+                "hits": 0,
+            }
+            self._evict()
+
+    def _evict(self):
+        entries = self.index["entries"]
+        total = sum(e["size"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]["size"]
+            del entries[key]
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+            self.index["stats"]["evicted"] += 1
+
+    # ----- reporting -----
+    def stats(self):
+        with self._lock:
+            self.index = self._read_index()
+        entries = self.index["entries"]
+        stats = dict(self.index["stats"])
+        stats["entries"] = len(entries)
+        stats["bytes"] = sum(e["size"] for e in entries.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def report(self):
+        s = self.stats()
+        return (f"{s['entries']} designs cached ({s['bytes'] / 2**20:.1f} MiB), "
+                f"{s['hits']} hits / {s['misses']} misses ({s['hit_rate'] * 100:.0f}%), "
+                f"{s['evicted']} evicted, solver time saved {s['saved_seconds'] / 60:.1f} min")
+
+    def clear(self):
+        with self._locked():
+            for key in list(self.index["entries"]):
+                try:
+                    os.remove(self._entry_path(key))
+                except OSError:
+                    pass
+            self.index["entries"] = {}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect the CST simulation cache.")
+    parser.add_argument("--dir", default=SIM_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+    cache = SimulationCache(args.dir)
+    if args.clear:
+        cache.clear()
+    print(cache.report())
@@ -0,0 +1,69 @@
+import time
+import numpy as np
+from patch_analytic import patch_resonance
+
+
+class StandInSimulator:
+    """
+    Cheap stand-in for a CST solve, used by benchmarks and offline experiments.
+    It starts from the closed-form patch model and adds systematic deviations
+    (frequency pull-down, feed-width dependent loading and bandwidth) so the
+    surrogate and the "simulator" disagree the way they do against real CST.
+    """
+    def __init__(self, freq_bias=0.96, bw_bias=1.2, noise=0.0, delay=0.0, seed=None):
+        self.freq_bias = freq_bias
+        self.bw_bias = bw_bias
+        self.noise = noise          # relative (log-normal) noise on Fr and BW
+        self.delay = delay          # seconds to sleep per solve, to mimic solver cost
+        self.rng = np.random.default_rng(seed)
+        self.n_simulations = 0
+
+    def response(self, patch_W, patch_L, eps_r, substrate_h, feed_width, feed_type=0):
+        """Vectorized noiseless response: returns (Fr_GHz, BW_MHz, S11_min_dB) arrays."""
+        W = np.asarray(patch_W, dtype=float)
+        fw = np.asarray(feed_width, dtype=float)
+        Fr, BW = patch_resonance(W, patch_L, eps_r, substrate_h, feed_type)
+        ratio = fw / W
+        Fr = Fr * self.freq_bias * (1 - 0.15 * ratio / (1 + ratio))
+        BW = BW * self.bw_bias * (fw / 0.003)**0.3
+        S11 = -10.0 - 25.0 * np.exp(-((ratio - 0.1) / 0.08)**2)
+        return Fr, BW, S11
+
+    def simulate(self, params, *args, **kwargs):
+        """
+        One "solve" of a params dict as produced by TrainedAI.optimize_parameters()["dict"].
+        Returns (Fr_GHz, BW_MHz, S11_min_dB) like CSTDriver.simulate, whose extra
+        arguments (family, materials, solver window, ...) are accepted and ignored.
+        """
+        self.n_simulations += 1
+        if self.delay:
+            time.sleep(self.delay)
+        Fr, BW, S11 = self.response(params["patch_W"], params["patch_L"], params["eps_r"],
+                                    params["substrate_h"], params["feed_width"],
+                                    _feed_index(params.get("feed_type", 0)))
+        if self.noise:
+            Fr = Fr * np.exp(self.rng.normal(0, self.noise))
+            BW = BW * np.exp(self.rng.normal(0, self.noise))
+        return float(Fr), float(BW), float(S11)
+
+    def s11_trace(self, Fr_GHz, BW_MHz, S11_min_dB, freqs_ghz):
+        """
+        Lorentzian |S11| curve with its minimum at Fr and a -10 dB width of BW.
+        Broadcasts over leading dimensions of Fr/BW/S11 against the frequency grid.
+        """
+        Fr = np.asarray(Fr_GHz, dtype=float)[..., None]
+        BW = np.asarray(BW_MHz, dtype=float)[..., None] / 1e3
+        g0 = 10**(np.minimum(np.asarray(S11_min_dB, dtype=float), -10.5)[..., None] / 20)
+        # half -10 dB width expressed in the normalised detuning x = 2 (f - Fr) / B0
+        x10 = np.sqrt((1 - g0**2) / 0.9 - 1)
+        B0 = np.maximum(BW, 1e-6) / x10
+        x = 2 * (np.asarray(freqs_ghz, dtype=float) - Fr) / B0
+        gamma2 = 1 - (1 - g0**2) / (1 + x**2)
+        return 10 * np.log10(np.maximum(gamma2, 1e-12))
+
+
+def _feed_index(feed_type):
+    try:
+        return int(float(feed_type))
+    except (TypeError, ValueError):
+        return 0
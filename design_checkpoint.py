@@ -0,0 +1,134 @@
+"""
+On-disk checkpoints for the interactive design loop (interface.generate_antenna).
+
+Every job is one JSON file in CHECKPOINT_DIR holding the target spec and the loop state
+after the last completed simulation: the design to simulate next, the surrogate
+prediction for it, the (params, Fr, BW) history the Broyden correction needs, the best
+result so far and the iteration / simulation counts. Files are replaced atomically
+(write to .tmp, fsync, os.replace), so a crash or a killed CST session leaves either the
+previous or the new state, never a torn one. Resuming picks up at the stored design
+without re-running the simulations already paid for.
+
+    python design_checkpoint.py list [--all]
+    python design_checkpoint.py show <job_id>
+    python design_checkpoint.py discard <job_id>
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import argparse
+
+CHECKPOINT_DIR = "design_jobs"
+SPEC_KEYS = ("family", "shape", "freq", "bandwidth", "substrate", "conductor")
+RESUMABLE_STATUSES = ("running",)
+
+
+def _path(job_id, checkpoint_dir=CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, job_id + ".json")
+
+
+def _plain(value):
+    """JSON-safe copy of numpy scalars/arrays nested in lists, tuples and dicts."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+def new_job(spec, checkpoint_dir=CHECKPOINT_DIR, session=None):
+    """Create a job for spec (dict with SPEC_KEYS) and return its id (unique across concurrent sessions)."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    digest = hashlib.sha1(json.dumps(_plain(spec), sort_keys=True).encode()).hexdigest()[:6]
+    job_id = f"{stamp}-{digest}-{uuid.uuid4().hex[:4]}"
+    save_checkpoint(job_id, {"spec": {k: spec[k] for k in SPEC_KEYS}, "status": "running", "session": session,
+                             "created": time.time(), "iteration": 0, "n_simulations": 0,
+                             "params_dict": None, "numeric_params": None, "feed_type_label": None,
+                             "predicted": None, "history": [], "best": None}, checkpoint_dir)
+    return job_id
+
+
+def save_checkpoint(job_id, state, checkpoint_dir=CHECKPOINT_DIR):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    state = _plain(state)
+    state["updated"] = time.time()
+    path = _path(job_id, checkpoint_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(job_id, checkpoint_dir=CHECKPOINT_DIR):
+    with open(_path(job_id, checkpoint_dir)) as f:
+        return json.load(f)
+
+
+def update_checkpoint(job_id, checkpoint_dir=CHECKPOINT_DIR, **fields):
+    state = load_checkpoint(job_id, checkpoint_dir)
+    state.update(fields)
+    save_checkpoint(job_id, state, checkpoint_dir)
+    return state
+
+
+def list_jobs(resumable_only=True, checkpoint_dir=CHECKPOINT_DIR):
+    """(job_id, state) pairs, most recently updated first."""
+    if not os.path.isdir(checkpoint_dir):
+        return []
+    jobs = []
+    for name in os.listdir(checkpoint_dir):
+        if not name.endswith(".json"):
+            continue
+        job_id = name[:-len(".json")]
+        try:
+            state = load_checkpoint(job_id, checkpoint_dir)
+        except (OSError, ValueError):
+            continue
+        if resumable_only and state.get("status") not in RESUMABLE_STATUSES:
+            continue
+        jobs.append((job_id, state))
+    return sorted(jobs, key=lambda job: job[1].get("updated", 0), reverse=True)
+
+
+def describe(job_id, state):
+    """One-line summary used by the GUI dropdown and the CLI listing."""
+    spec = state["spec"]
+    line = (f"{job_id}  {spec['family']}/{spec['shape']} {float(spec['freq']):.3f} GHz "
+            f"{float(spec['bandwidth']):.0f} MHz on {spec['substrate']}  [{state['status']}] "
+            f"iter {state['iteration']}, {state['n_simulations']} sims")
+    if state.get("best"):
+        line += f", best {state['best']['Fr']:.3f} GHz / {state['best']['BW']:.1f} MHz"
+    return line
+
+
+def discard_job(job_id, checkpoint_dir=CHECKPOINT_DIR):
+    os.remove(_path(job_id, checkpoint_dir))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List, inspect or discard checkpointed design jobs.")
+    parser.add_argument("--dir", default=CHECKPOINT_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list")
+    p_list.add_argument("--all", action="store_true", help="include finished jobs")
+    sub.add_parser("show").add_argument("job_id")
+    sub.add_parser("discard").add_argument("job_id")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        jobs = list_jobs(resumable_only=not args.all, checkpoint_dir=args.dir)
+        if not jobs:
+            print("No resumable design jobs." if not args.all else "No design jobs.")
+        for job_id, state in jobs:
+            print(describe(job_id, state))
+    elif args.command == "show":
+        print(json.dumps(load_checkpoint(args.job_id, args.dir), indent=2))
+    elif args.command == "discard":
+        discard_job(args.job_id, args.dir)
+        print(f"Discarded {args.job_id}")
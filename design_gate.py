@@ -0,0 +1,163 @@
+"""
+Feasibility and near-duplicate gate between the optimizer and the solver.
+
+Every design costs a full CST solve once it reaches CSTDriver.standard_antenna, even
+when it cannot be a sensible antenna or is the design just solved with a last digit
+changed. The gate checks whole (n, 6) arrays of numeric vectors
+[W, L, eps_eff, h, eps_r, feed_width] at once:
+
+  - non-finite or non-positive values
+  - a feed line wider than GATE_MAX_FEED_FRACTION of the patch
+  - a substrate thinner than GATE_MIN_SUBSTRATE_H or eps_r outside GATE_EPS_R_RANGE
+  - eps_eff outside [1, eps_r]
+  - patch_W or patch_L sitting on its AUTOCORRECT_BOUNDS clip limit (the correction
+    wanted a patch outside the design space; the clipped one is not what it asked for)
+
+and collapses designs that agree within GATE_DEDUPE_RTOL in every dimension (same feed
+type), within a batch and against everything the gate has already let through: designs
+are clustered by single linkage at that distance (a KD-tree query on log values) and
+only the first design of each cluster is solved.
+
+    gate = DesignGate()
+    reason = gate.admit(numeric, feed_type)      # None: go ahead and solve
+    keep = gate.filter(numeric, feed_types)      # indices of a batch worth solving
+    print("[AI][gate]", gate.report())
+"""
+import threading
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from RDN_AI import AUTOCORRECT_BOUNDS
+
+GATE_MAX_FEED_FRACTION = 0.5       # feed_width / patch_W; wider and the line is no longer a feed
+GATE_MIN_SUBSTRATE_H = 0.0005      # m, thinnest substrate of the design space (RDN_AI.PARAM_BOUNDS)
+GATE_EPS_R_RANGE = (1.0, 12.0)
+GATE_CLIP_RTOL = 1e-6              # relative distance from a clip limit that counts as "on" it
+# AUTOCORRECT_BOUNDS columns whose clip limit makes a design infeasible. feed_width is left
+# out: it saturates first when a bandwidth target is out of reach, while the frequency
+# correction of patch_W / patch_L keeps improving the design.
+GATE_CLIP_COLUMNS = (0, 1)
+GATE_DEDUPE_RTOL = 1e-3            # designs closer than this in every dimension are one solve
+# rejection reasons, by code; 0 is "feasible"
+GATE_REASONS = ("", "non-finite", "feed too wide", "substrate too thin", "eps_r out of range",
+                "eps_eff out of range", "at clip limit", "duplicate")
+# numeric columns that identify a design for deduplication (eps_eff follows from them)
+GATE_KEY_COLUMNS = [0, 1, 3, 4, 5]
+
+
+def feed_index(feed_type):
+    """Feed type as an int, whatever label form the optimizer returned (0 when unknown)."""
+    try:
+        return int(float(feed_type))
+    except (TypeError, ValueError):
+        return 0
+
+
+def feasibility(numeric):
+    """
+    Reason code (index into GATE_REASONS) of every row of numeric (n, 6), 0 when the design
+    passes; the first failing check wins.
+    """
+    x = np.atleast_2d(np.asarray(numeric, dtype=float))[:, :6]
+    W, L, eps_eff, h, eps_r, fw = x.T
+    code = np.zeros(len(x), dtype=np.int8)
+    at_clip = np.zeros(len(x), dtype=bool)
+    for i in GATE_CLIP_COLUMNS:
+        lo, hi = AUTOCORRECT_BOUNDS[i]
+        at_clip |= (x[:, i] <= lo * (1 + GATE_CLIP_RTOL)) | (x[:, i] >= hi * (1 - GATE_CLIP_RTOL))
+    checks = [
+        ~np.isfinite(x).all(axis=1) | (x <= 0).any(axis=1),
+        fw > GATE_MAX_FEED_FRACTION * W,
+        h < GATE_MIN_SUBSTRATE_H,
+        (eps_r < GATE_EPS_R_RANGE[0]) | (eps_r > GATE_EPS_R_RANGE[1]),
+        (eps_eff < 1.0) | (eps_eff > eps_r),
+        at_clip,
+    ]
+    # assign in reverse so the earliest failing check is the one reported
+    for k in range(len(checks), 0, -1):
+        code[checks[k - 1]] = k
+    return code
+
+
+def design_points(numeric, feed_types=0):
+    """
+    Log of the identifying columns plus the feed type: two designs are within rtol of each
+    other in every dimension (same feed type) when their points are within log1p(rtol)
+    in the max norm. numeric must be positive (feasible).
+    """
+    x = np.log(np.atleast_2d(np.asarray(numeric, dtype=float))[:, GATE_KEY_COLUMNS])
+    feed_types = np.broadcast_to(np.asarray(feed_types, dtype=float), (len(x),))
+    return np.column_stack([x, feed_types])
+
+
+def first_of_clusters(points, rtol=GATE_DEDUPE_RTOL):
+    """True for the first row of every single-linkage cluster of points at distance log1p(rtol)."""
+    n = len(points)
+    if n < 2:
+        return np.ones(n, dtype=bool)
+    pairs = cKDTree(points).query_pairs(np.log1p(rtol), p=np.inf, output_type="ndarray")
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    n_clusters, labels = connected_components(graph, directed=False)
+    first = np.full(n_clusters, n)
+    np.minimum.at(first, labels, np.arange(n))
+    return first[labels] == np.arange(n)
+
+
+class DesignGate:
+    """
+    Stateful gate for one design job or batch: remembers the designs it let through and
+    counts what it stopped (stats: checked, passed, and one count per GATE_REASONS entry).
+    """
+    def __init__(self, rtol=GATE_DEDUPE_RTOL):
+        self.rtol = rtol
+        self._seen = np.empty((0, len(GATE_KEY_COLUMNS) + 1))
+        self._lock = threading.Lock()
+        self.stats = {"checked": 0, "passed": 0, **{r: 0 for r in GATE_REASONS[1:]}}
+
+    @property
+    def prevented(self):
+        """Solves the gate stopped."""
+        return self.stats["checked"] - self.stats["passed"]
+
+    def remember(self, numeric, feed_types=0):
+        """Mark designs as already solved (e.g. the history of a resumed job)."""
+        numeric = np.asarray(numeric, dtype=float).reshape(-1, 6)
+        ok = feasibility(numeric) == 0
+        with self._lock:
+            self._seen = np.vstack([self._seen, design_points(numeric[ok], np.broadcast_to(feed_types, ok.shape)[ok])])
+
+    def filter(self, numeric, feed_types=0):
+        """
+        Gate a batch that would otherwise be solved in full. Returns (kept indices, reasons):
+        the feasible designs that are neither near-duplicates of an earlier row of the batch
+        nor of a design already let through, and each row's reason ("" when kept).
+        """
+        numeric = np.atleast_2d(np.asarray(numeric, dtype=float))
+        feed_types = np.broadcast_to(np.asarray(feed_types), (len(numeric),))
+        code = feasibility(numeric)
+        ok = np.flatnonzero(code == 0)
+        points = design_points(numeric[ok], feed_types[ok])
+        with self._lock:
+            # the designs already solved come first, so a cluster that contains one is solved
+            first = first_of_clusters(np.vstack([self._seen, points]), self.rtol)[len(self._seen):]
+            code[ok[~first]] = GATE_REASONS.index("duplicate")
+            keep = np.flatnonzero(code == 0)
+            self._seen = np.vstack([self._seen, points[first]])
+            self.stats["checked"] += len(numeric)
+            self.stats["passed"] += len(keep)
+            for c, n in zip(*np.unique(code[code > 0], return_counts=True)):
+                self.stats[GATE_REASONS[c]] += int(n)
+        return keep, np.array(GATE_REASONS, dtype=object)[code]
+
+    def admit(self, numeric, feed_type=0):
+        """Gate the one design about to be solved: None to go ahead, else the reason it should not be."""
+        keep, reasons = self.filter([numeric], feed_index(feed_type))
+        return None if len(keep) else reasons[0]
+
+    def report(self):
+        s = self.stats
+        rejected = ", ".join(f"{r} {s[r]}" for r in GATE_REASONS[1:] if s[r])
+        return (f"{s['checked']} designs checked, {s['passed']} passed, {self.prevented} solves prevented"
+                + (f" ({rejected})" if rejected else ""))
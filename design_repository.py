@@ -0,0 +1,213 @@
+"""
+Persistent, indexed store of finished designs (SQLite, DESIGN_DB).
+
+Every design the GUI loop or a queue worker finishes is kept with its target, materials,
+parameters (the params dict and the numeric vector the correction works on), simulated
+metrics and the S11 reference (the content-hash design ID of its trace in s11_store.py).
+Indexes on target frequency and bandwidth, and on (substrate, conductor, frequency),
+make "designs near 2.45 GHz / 80 MHz on FR-4" a range scan instead of a table scan.
+
+warm_start() turns a stored design into the starting point of a new run for another
+target: the stored simulation is already one observation of the design, so the first
+correction is taken from it without simulating the stored design again, and the
+correction history starts with it (design_scheduler.run_design_loop).
+
+    python design_repository.py list [--limit 20]
+    python design_repository.py search --freq 2.45 --bw 80 [--substrate "FR-4 (lossy)"]
+    python design_repository.py show <id>
+"""
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+DESIGN_DB = "designs.db"
+SEARCH_FREQ_WINDOW = 0.5      # GHz either side of the target scanned by search()
+SEARCH_BW_WEIGHT = 1e-3       # GHz of frequency distance per MHz of bandwidth distance when ranking
+# params dict keys of the numeric vector the correction step works on
+NUMERIC_KEYS = ("patch_W", "patch_L", "eps_eff", "substrate_h", "eps_r", "feed_width")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    family TEXT, shape TEXT,
+    substrate TEXT NOT NULL, conductor TEXT NOT NULL,
+    target_freq_ghz REAL NOT NULL, target_bw_mhz REAL NOT NULL,
+    actual_freq_ghz REAL, actual_bw_mhz REAL, s11_db REAL,
+    converged INTEGER NOT NULL DEFAULT 0,
+    params TEXT NOT NULL,            -- params dict sent to the simulator (JSON)
+    numeric TEXT,                    -- [W, L, eps_eff, h, eps_r, feed_width] (JSON)
+    feed_type_label TEXT,
+    s11_ref TEXT,                    -- S11Store / SimulationCache design ID of the trace
+    simulations INTEGER,
+    source TEXT,                     -- gui, queue, ...
+    job_id TEXT,
+    parent_id INTEGER REFERENCES designs(id)
+);
+CREATE INDEX IF NOT EXISTS designs_target_freq ON designs (target_freq_ghz);
+CREATE INDEX IF NOT EXISTS designs_target_bw ON designs (target_bw_mhz);
+CREATE INDEX IF NOT EXISTS designs_materials ON designs (substrate, conductor, target_freq_ghz);
+CREATE INDEX IF NOT EXISTS designs_actual_freq ON designs (actual_freq_ghz);
+"""
+
+
+def numeric_from_params(params):
+    """Numeric vector in NUMERIC_KEYS order; eps_eff is derived from W, eps_r and h when params lacks it."""
+    if params.get("eps_eff") is None:
+        from patch_analytic import effective_permittivity
+        params = dict(params, eps_eff=effective_permittivity(float(params["patch_W"]), float(params["eps_r"]),
+                                                              float(params["substrate_h"])))
+    return [float(params[k]) for k in NUMERIC_KEYS]
+
+
+def payload_numeric(payload):
+    """Numeric vector of a simulate job payload: its "numeric" when given, else from its params dict."""
+    if payload.get("numeric") is not None:
+        return [float(v) for v in payload["numeric"]]
+    return numeric_from_params(payload["params"])
+
+
+class DesignRepository:
+    def __init__(self, path=DESIGN_DB, timeout=30):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()   # shared by the GUI sessions
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(SCHEMA)
+
+    def add(self, family, shape, substrate, conductor, target_freq, target_bw, params, numeric=None,
+            feed_type_label=None, actual=None, converged=False, s11_ref=None, simulations=None,
+            source=None, job_id=None, parent_id=None):
+        """Store one design; actual = (Fr_GHz, BW_MHz, S11_dB) of its simulation. Returns its id."""
+        Fr, BW, S11 = actual if actual is not None else (None, None, None)
+        if numeric is None:
+            numeric = numeric_from_params(params)
+        with self._lock, self.db:
+            return self.db.execute(
+                "INSERT INTO designs (created, family, shape, substrate, conductor, target_freq_ghz, target_bw_mhz, "
+                "actual_freq_ghz, actual_bw_mhz, s11_db, converged, params, numeric, feed_type_label, s11_ref, "
+                "simulations, source, job_id, parent_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), family, shape, substrate, conductor, float(target_freq), float(target_bw),
+                 None if Fr is None else float(Fr), None if BW is None else float(BW),
+                 None if S11 is None else float(S11), int(bool(converged)),
+                 json.dumps(params, default=float), json.dumps([float(x) for x in numeric]),
+                 feed_type_label, s11_ref, simulations, source, job_id, parent_id)).lastrowid
+
+    def _decode(self, row):
+        if row is None:
+            return None
+        d = dict(row)
+        d["params"] = json.loads(d["params"])
+        d["numeric"] = json.loads(d["numeric"]) if d["numeric"] else None
+        return d
+
+    def get(self, design_id):
+        with self._lock:
+            return self._decode(self.db.execute("SELECT * FROM designs WHERE id = ?", (int(design_id),)).fetchone())
+
+    def recent(self, limit=100):
+        with self._lock:
+            return [self._decode(r) for r in self.db.execute("SELECT * FROM designs ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def search(self, freq, bw=None, substrate=None, conductor=None, freq_window=SEARCH_FREQ_WINDOW,
+               simulated_only=True, limit=10):
+        """
+        Stored designs whose target lies within freq_window GHz of freq (index range scan),
+        nearest first by |Fr - freq| + SEARCH_BW_WEIGHT * |BW - bw|, using the simulated
+        Fr / BW where known (what a warm start begins from) and the target otherwise.
+        """
+        where = ["target_freq_ghz BETWEEN ? AND ?"]
+        args = [float(freq) - freq_window, float(freq) + freq_window]
+        if substrate is not None:
+            where.append("substrate = ?")
+            args.append(substrate)
+        if conductor is not None:
+            where.append("conductor = ?")
+            args.append(conductor)
+        if simulated_only:
+            where.append("actual_freq_ghz IS NOT NULL")
+        bw_term = "+ ? * ABS(COALESCE(actual_bw_mhz, target_bw_mhz) - ?)" if bw is not None else ""
+        order_args = [float(freq)] + ([SEARCH_BW_WEIGHT, float(bw)] if bw is not None else [])
+        with self._lock:
+            rows = self.db.execute(f"SELECT * FROM designs WHERE {' AND '.join(where)} "
+                                   f"ORDER BY ABS(COALESCE(actual_freq_ghz, target_freq_ghz) - ?) {bw_term} LIMIT ?",
+                                   (*args, *order_args, limit)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM designs").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+def describe(design):
+    """One-line summary used by the GUI dropdown and the CLI."""
+    line = (f"#{design['id']} {design['family'] or ''} {design['target_freq_ghz']:.3f} GHz / "
+            f"{design['target_bw_mhz']:.0f} MHz on {design['substrate']}")
+    if design["actual_freq_ghz"] is not None:
+        line += (f" -> {design['actual_freq_ghz']:.3f} GHz / {design['actual_bw_mhz']:.1f} MHz"
+                 + (" (converged)" if design["converged"] else ""))
+    return line
+
+
+def warm_start(ai, design, freq, bandwidth, substrate=None):
+    """
+    Starting point for re-targeting a stored design to (freq GHz, bandwidth MHz).
+    Returns (params_dict, numeric_params, feed_type_label, history, predicted): the design
+    after one correction from its stored simulation toward the new target, the correction
+    history seeded with that simulation, and the (Fr, BW, Fr_std, BW_std) guess for the
+    solver window. On another substrate the stored simulation no longer applies, so the
+    geometry is reused with the new eps_r / height and no correction or history.
+    """
+    from design_scheduler import corrected_design, SUBSTRATE_PROPERTIES
+    from patch_analytic import effective_permittivity
+    numeric = [float(x) for x in design["numeric"]]
+    params = dict(design["params"])
+    freq, bandwidth = float(freq), float(bandwidth)
+    # rows stored without a label (older queue results) still carry the feed type in params
+    label = design["feed_type_label"]
+    if label is None:
+        label = str(params.get("feed_type", 0))
+    if (substrate is not None and substrate != design["substrate"]) or design["actual_freq_ghz"] is None:
+        if substrate in SUBSTRATE_PROPERTIES:
+            numeric[4], numeric[3] = SUBSTRATE_PROPERTIES[substrate]
+            numeric[2] = float(effective_permittivity(numeric[0], numeric[4], numeric[3]))
+        return corrected_design(params, numeric), numeric, label, [], None
+    Fr, BW = design["actual_freq_ghz"], design["actual_bw_mhz"]
+    history = [(numeric, Fr, BW)]
+    corrected = [float(x) for x in ai.autocorrect_params(numeric, desired_Fr=freq, actual_Fr=Fr, desired_BW=bandwidth,
+                                                         actual_BW=BW, history=history)]
+    predicted = (freq, bandwidth, abs(Fr - freq), abs(BW - bandwidth))
+    return corrected_design(params, corrected), corrected, label, history, predicted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List and search the stored designs.")
+    parser.add_argument("--db", default=DESIGN_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list").add_argument("--limit", type=int, default=20)
+    p_search = sub.add_parser("search")
+    p_search.add_argument("--freq", type=float, required=True)
+    p_search.add_argument("--bw", type=float, default=None)
+    p_search.add_argument("--substrate", default=None)
+    p_search.add_argument("--conductor", default=None)
+    p_search.add_argument("--limit", type=int, default=10)
+    sub.add_parser("show").add_argument("design_id", type=int)
+    args = parser.parse_args()
+
+    repo = DesignRepository(args.db)
+    if args.command == "list":
+        print(f"{len(repo)} designs in {args.db}")
+        for d in repo.recent(args.limit):
+            print(describe(d))
+    elif args.command == "search":
+        for d in repo.search(args.freq, args.bw, args.substrate, args.conductor, limit=args.limit):
+            print(describe(d))
+    elif args.command == "show":
+        print(json.dumps(repo.get(args.design_id), indent=2))
@@ -0,0 +1,177 @@
+"""
+Budgets for the interactive design loop.
+
+DesignBudget caps one generate_antenna job by wall-clock time, loop iterations and CST
+simulations, keeps the best simulated design under a configurable objective, and stops
+early once the best objective has not improved by SCHED_MIN_IMPROVEMENT (relative) for
+SCHED_STALL_PATIENCE simulations in a row. The loop asks exhausted() before every solve
+and returns budget.best when it gives up, instead of the last iterate.
+run_design_loop() is the same simulate -> correct loop without the GUI, for queue workers.
+"""
+import time
+from RDN_AI import design_objective
+from design_gate import feed_index
+
+SCHED_MAX_SECONDS = 30 * 60       # wall clock per job, including the optimizer and CST start-up
+SCHED_MAX_ITERATIONS = 8
+SCHED_MAX_SIMULATIONS = 8
+SCHED_STALL_PATIENCE = 3          # simulations without improvement before stopping
+SCHED_MIN_IMPROVEMENT = 0.05      # relative decrease of the best objective that counts as progress
+SCHED_FREQ_TOLERANCE = 0.03       # GHz, used by the "tolerance" objective
+SCHED_BW_TOLERANCE = 15.0         # MHz
+# GUI substrate name -> (eps_r, height in m)
+SUBSTRATE_PROPERTIES = {
+    'FR-4 (lossy)': (4.4, 0.0016),
+    'Rogers RT-duroid 5880 (lossy)': (2.2, 0.001524),
+    'Taconic TLY-3 (lossy)': (2.3, 0.00157),
+}
+
+
+def tolerance_objective(Fr, BW, desired_Fr, desired_BW):
+    """Worst miss in units of the loop's acceptance tolerances (< 1 means accepted)."""
+    return max(abs(Fr - desired_Fr) / SCHED_FREQ_TOLERANCE, abs(BW - desired_BW) / SCHED_BW_TOLERANCE)
+
+
+def frequency_objective(Fr, BW, desired_Fr, desired_BW):
+    return abs(Fr - desired_Fr)
+
+
+OBJECTIVES = {
+    "weighted": design_objective,       # same weighting as TrainedAI.optimize_parameters
+    "tolerance": tolerance_objective,
+    "frequency": frequency_objective,
+}
+
+
+class DesignBudget:
+    def __init__(self, max_seconds=SCHED_MAX_SECONDS, max_iterations=SCHED_MAX_ITERATIONS,
+                 max_simulations=SCHED_MAX_SIMULATIONS, patience=SCHED_STALL_PATIENCE,
+                 min_improvement=SCHED_MIN_IMPROVEMENT, objective="weighted"):
+        self.max_seconds = max_seconds
+        self.max_iterations = max_iterations
+        self.max_simulations = max_simulations
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.objective_name = objective if isinstance(objective, str) else getattr(objective, "__name__", "custom")
+        self.objective = OBJECTIVES[objective] if isinstance(objective, str) else objective
+        self.elapsed_before = 0.0   # seconds spent in earlier sessions of a resumed job
+        self.iterations = 0
+        self.simulations = 0
+        self.stalled = 0
+        self.best = None
+        self.stop_reason = None
+        self._t0 = time.monotonic()
+
+    def elapsed(self):
+        return self.elapsed_before + time.monotonic() - self._t0
+
+    def record(self, params_dict, Fr, BW, S11, desired_Fr, desired_BW):
+        """Count one simulation; returns True when it is the new best design."""
+        self.simulations += 1
+        value = float(self.objective(Fr, BW, desired_Fr, desired_BW))
+        if self.best is None:
+            self.stalled = 0
+        elif value < self.best["objective"] * (1 - self.min_improvement):
+            self.stalled = 0
+        else:
+            self.stalled += 1
+        if self.best is None or value < self.best["objective"]:
+            self.best = {"params_dict": dict(params_dict), "Fr": float(Fr), "BW": float(BW),
+                         "S11": float(S11), "objective": value, "simulation": self.simulations}
+            return True
+        return False
+
+    def next_iteration(self):
+        self.iterations += 1
+
+    def exhausted(self):
+        """Reason the job must stop before another solve ("time", "iterations", "simulations", "stalled"), or None."""
+        if self.stop_reason is None:
+            if self.elapsed() >= self.max_seconds:
+                self.stop_reason = "time"
+            elif self.iterations >= self.max_iterations:
+                self.stop_reason = "iterations"
+            elif self.simulations >= self.max_simulations:
+                self.stop_reason = "simulations"
+            elif self.patience and self.stalled >= self.patience:
+                self.stop_reason = "stalled"
+        return self.stop_reason
+
+    def summary(self):
+        line = (f"{self.simulations} sims, {self.iterations} iterations, {self.elapsed():.0f} s"
+                + (f", stopped: {self.stop_reason}" if self.stop_reason else ""))
+        if self.best is not None:
+            line += (f", best {self.best['Fr']:.3f} GHz / {self.best['BW']:.1f} MHz "
+                     f"({self.objective_name} {self.best['objective']:.4g})")
+        return line
+
+    # ----- checkpointing (design_checkpoint.py) -----
+    def state(self):
+        return {"max_seconds": self.max_seconds, "max_iterations": self.max_iterations,
+                "max_simulations": self.max_simulations, "patience": self.patience,
+                "min_improvement": self.min_improvement, "objective": self.objective_name,
+                "elapsed": self.elapsed(), "iterations": self.iterations, "simulations": self.simulations,
+                "stalled": self.stalled}
+
+    @classmethod
+    def from_state(cls, state, best=None):
+        budget = cls(state["max_seconds"], state["max_iterations"], state["max_simulations"], state["patience"],
+                     state["min_improvement"], state["objective"] if state["objective"] in OBJECTIVES else "weighted")
+        budget.elapsed_before = state["elapsed"]
+        budget.iterations = state["iterations"]
+        budget.simulations = state["simulations"]
+        budget.stalled = state["stalled"]
+        budget.best = best
+        return budget
+
+
+def corrected_design(params_dict, numeric):
+    """params_dict with the numeric vector [W, L, eps_eff, h, eps_r, feed_width] written back, as the GUI loop does."""
+    params = dict(params_dict)
+    params.update(patch_W=numeric[0], patch_L=numeric[1], eps_eff=numeric[2], substrate_h=numeric[3],
+                  eps_r=numeric[4], feed_width=numeric[5],
+                  substrate_W=numeric[0] + 6 * numeric[3], substrate_L=numeric[1] + 6 * numeric[3])
+    return params
+
+
+def run_design_loop(ai, simulate, freq, bandwidth, params_dict, numeric_params, feed_type_label,
+                    budget=None, on_simulation=None, history=None, gate=None):
+    """
+    The simulate -> autocorrect loop of interface.generate_antenna without the GUI, starting
+    from the given design (a fresh optimizer result or a stored design to warm-start from).
+    simulate(params_dict) returns (Fr_GHz, BW_MHz, S11_dB), Fr None on failure;
+    on_simulation(numeric_params, Fr, BW, S11) runs after every solve (feedback logging).
+    history seeds the correction with earlier (numeric_params, Fr, BW) observations, e.g. the
+    stored result a warm start begins from (design_repository.warm_start).
+    gate (design_gate.DesignGate) is asked before every solve; a design it rejects (infeasible,
+    or a near-duplicate of one already solved) ends the loop instead of being simulated.
+    Stops within SCHED_FREQ_TOLERANCE / SCHED_BW_TOLERANCE or when the budget is exhausted.
+    Returns (budget, converged); budget.best holds the best simulated design.
+    """
+    budget = budget if budget is not None else DesignBudget()
+    freq, bandwidth = float(freq), float(bandwidth)
+    numeric_params = [float(x) for x in numeric_params]
+    history = list(history or [])
+    if gate is not None:
+        gate.remember([h[0] for h in history], feed_index(feed_type_label))
+    while not budget.exhausted():
+        if gate is not None:
+            reason = gate.admit(numeric_params, feed_type_label)
+            if reason is not None:
+                budget.stop_reason = f"gate ({reason})"
+                break
+        Fr, BW, S11 = simulate(params_dict)
+        if Fr is None:
+            budget.stop_reason = "simulation failed"
+            break
+        if on_simulation is not None:
+            on_simulation(numeric_params, Fr, BW, S11)
+        budget.record(params_dict, Fr, BW, S11, freq, bandwidth)
+        budget.next_iteration()
+        if abs(Fr - freq) < SCHED_FREQ_TOLERANCE and abs(BW - bandwidth) < SCHED_BW_TOLERANCE:
+            return budget, True
+        history.append((numeric_params, Fr, BW))
+        numeric_params = [float(x) for x in ai.autocorrect_params(numeric_params, desired_Fr=freq, actual_Fr=Fr,
+                                                                  desired_BW=bandwidth, actual_BW=BW, history=history)]
+        params_dict = corrected_design(params_dict, numeric_params)
+    return budget, False
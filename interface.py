@@ -1,8 +1,21 @@
 import flet as ft
 from cst_interface.cst_driver import CSTDriver
-from RDN_AI import TrainedAI
+from cst_interface.sim_cache import SimulationCache
+from cst_interface.s11_store import S11Store
+from serving import InferencePool, SessionRegistry, CST_CONCURRENT_SOLVES
+from design_checkpoint import new_job, load_checkpoint, save_checkpoint, update_checkpoint, list_jobs, describe
+from design_scheduler import DesignBudget, SUBSTRATE_PROPERTIES
+from design_repository import DesignRepository, describe as describe_design, warm_start
+from design_gate import DesignGate, feasibility, feed_index
 import time
-ai = TrainedAI()
+import threading
+ai = InferencePool()           # bounded pool of TrainedAI instances, one per in-flight call (serving.py)
+sessions = SessionRegistry()   # which browser session drives which design job
+cst_slots = threading.BoundedSemaphore(CST_CONCURRENT_SOLVES)
+sim_cache = SimulationCache()  # solved designs, shared by every generate_antenna call
+s11_store = S11Store()         # full S11 trace of every solve, keyed by the same design hash
+designs = DesignRepository()   # every finished design, searchable by target and materials
+REFINE_MAX_SIMULATIONS = 4     # simulation cap when refining a stored design for a new target
 
 def main(page: ft.Page):
     # Window configuration
@@ -40,28 +53,119 @@ def main(page: ft.Page):
         )
 
     # ---- Function to handle antenna generation ----
-    def generate_antenna(family, shape, freq, bandwidth, substrate, conductor, looprun=True):
-        substrates = {
-            'FR-4 (lossy)': (4.4, 0.0016),
-            'Rogers RT-duroid 5880 (lossy)': (2.2, 0.001524),
-            'Taconic TLY-3 (lossy)': (2.3, 0.00157)
-        }
-        er = substrates[substrate][0]
-        sh = substrates[substrate][1]
+    def generate_antenna(family, shape, freq, bandwidth, substrate, conductor, looprun=True,
+                         skip_if_certain=True, ensemble_candidates=32, resume_job=None, budget=None):
+        # every run is a checkpointed job owned by this session while it runs
+        job_id = resume_job or new_job(dict(family=family, shape=shape, freq=freq, bandwidth=bandwidth,
+                                            substrate=substrate, conductor=conductor), session=page.session_id)
+        if not sessions.claim(job_id, page.session_id):
+            page.open(ft.SnackBar(ft.Text(f"Job {job_id} is already running in another session.")))
+            page.update()
+            return None
+        try:
+            return run_design_job(job_id, family, shape, freq, bandwidth, substrate, conductor, looprun,
+                                  skip_if_certain, ensemble_candidates, budget)
+        finally:
+            sessions.release(job_id, page.session_id)
+
+    def run_design_job(job_id, family, shape, freq, bandwidth, substrate, conductor, looprun,
+                       skip_if_certain, ensemble_candidates, budget):
+        er, sh = SUBSTRATE_PROPERTIES[substrate]
         # 2) Build in CST
-        cst = CSTDriver()
+        cst = CSTDriver(cache=sim_cache, trace_store=s11_store)
         firsttime = True
+        # wall-clock / iteration / simulation caps and best-so-far (design_scheduler.py)
+        budget = budget if budget is not None else DesignBudget()
+        state = load_checkpoint(job_id)
+        history = [tuple(h) for h in state["history"]]  # (numeric_params, actual_Fr, actual_BW) of every simulated iterate
+        if state.get("budget") is not None:
+            budget = DesignBudget.from_state(state["budget"], best=state["best"])
+        if state["params_dict"] is not None:
+            # continue a checkpointed job at the design it was about to simulate
+            params_dict = state["params_dict"]
+            numeric_params = state["numeric_params"]
+            feed_type_label = state["feed_type_label"]
+            predicted = tuple(state["predicted"]) if state["predicted"] is not None else None
+            print(f"[AI][checkpoint] resuming {job_id} at iteration {budget.iterations} ({budget.simulations} sims done)")
+        # infeasible designs and near-repeats of a solved one never reach CST (design_gate.py)
+        gate = DesignGate()
+        gate.remember([h[0] for h in history], feed_index(state["feed_type_label"]))
+
+        def store_design(params, actual=None, converged=False):
+            # keep the finished design (and the ID of its S11 trace) for later re-targeting
+            try:
+                s11_ref = cst.design_key(freq, substrate, conductor, params, family, shape)
+            except ValueError:
+                s11_ref = None
+            designs.add(family, shape, substrate, conductor, float(freq), float(bandwidth), params,
+                        feed_type_label=feed_type_label, actual=actual, converged=converged, s11_ref=s11_ref,
+                        simulations=budget.simulations, source="gui", job_id=job_id,
+                        parent_id=state.get("parent_design"))
+
+        def checkpoint(status="running"):
+            state.update(status=status, iteration=budget.iterations, n_simulations=budget.simulations,
+                         best=budget.best, budget=budget.state(),
+                         params_dict=params_dict, numeric_params=numeric_params,
+                         feed_type_label=feed_type_label, predicted=predicted, history=history)
+            save_checkpoint(job_id, state)
+
         # 1) Ask AI for params
         while looprun or firsttime:
-            opt = ai.optimize_parameters(float(freq), float(bandwidth), eps_r=er, substrate_h=sh)
-            params_dict = opt["dict"]
-            numeric_params = opt["numeric"]  # [W,L,eps_eff,substrate_h,eps_r,feed_width]
-            feed_type_label = opt["feed_type_label"]
+            if firsttime and state["params_dict"] is None:
+                opt = ai.optimize_parameters(float(freq), float(bandwidth), eps_r=er, substrate_h=sh)
+                params_dict = opt["dict"]
+                numeric_params = opt["numeric"]  # [W,L,eps_eff,substrate_h,eps_r,feed_width]
+                feed_type_label = opt["feed_type_label"]
+                # surrogate estimate of this design, used to narrow the solver's sweep window
+                try:
+                    predicted = ai.predict_output(*numeric_params, opt["feed_type_index"]) + (None, None)
+                except Exception:
+                    predicted = None
 
-            cst.standard_antenna(family, shape, freq, substrate, conductor, params_dict, retry=looprun, firsttime=firsttime)
+                # With a forward ensemble: send the best-EI candidate around the optimum to CST,
+                # or accept it outright when the ensemble is confident it meets the target.
+                if ai.has_ensemble():
+                    candidates = ai.jitter_candidates(numeric_params, n=ensemble_candidates)
+                    feasible = feasibility(candidates) == 0
+                    if feasible.any():
+                        candidates = candidates[feasible]
+                    order, ei, mean, var = ai.rank_candidates(float(freq), float(bandwidth), candidates,
+                                                              opt["feed_type_index"])
+                    best = order[0]
+                    numeric_params = candidates[best].tolist()
+                    params_dict = params_dict.copy()
+                    params_dict.update({
+                        "patch_W": numeric_params[0],
+                        "patch_L": numeric_params[1],
+                        "feed_width": numeric_params[5],
+                        "substrate_W": numeric_params[0] + 6*numeric_params[3],
+                        "substrate_L": numeric_params[1] + 6*numeric_params[3],
+                    })
+                    predicted = (mean[best][0], mean[best][1], var[best][0]**0.5, var[best][1]**0.5)
+                    if skip_if_certain and ai.surrogate_is_confident(mean[best], var[best], float(freq), float(bandwidth)):
+                        page.open(ft.SnackBar(ft.Text(
+                            f"Accepted without simulation: {mean[best][0]:.3f} ± {var[best][0]**0.5:.3f} GHz, "
+                            f"{mean[best][1]:.1f} ± {var[best][1]**0.5:.1f} MHz (surrogate ensemble)")))
+                        page.update()
+                        update_checkpoint(job_id, status="accepted", params_dict=params_dict)
+                        store_design(params_dict)
+                        return params_dict
+                checkpoint()
 
-            # 3) Export + parse S11 (best-effort)
-            actual_Fr, actual_BW, s11_dip = cst.extract_s11_results(r"C:\Users\donde\AppData\Local\Temp\CSTDE1\Temp\DE\Untitled_0.cst")
+            if budget.exhausted():
+                break
+            reason = gate.admit(numeric_params, feed_type_label)
+            if reason is not None:
+                budget.stop_reason = f"gate ({reason})"
+                page.open(ft.SnackBar(ft.Text(f"Design not simulated: {reason}.")))
+                page.update()
+                break
+
+            # 2) + 3) Build, solve in an adaptive window, export + parse S11 (BW in MHz)
+            with cst_slots:   # sessions queue here for a CST licence
+                actual_Fr, actual_BW, s11_dip = cst.simulate(params_dict, family, shape, freq, substrate, conductor,
+                                                             r"C:\Users\donde\AppData\Local\Temp\CSTDE1\Temp\DE\Untitled_0.cst",
+                                                             predicted=predicted, retry=looprun, firsttime=firsttime)
 
             # If parsing failed, set placeholders and notify
             if actual_Fr is None:
@@ -71,9 +175,12 @@ def main(page: ft.Page):
 
             # 4) Log feedback to CSV
             ai.log_feedback(float(freq), float(bandwidth), numeric_params, feed_type_label, actual_Fr, actual_BW, s11_dip)
-            # 5) Auto-correct predicted numeric params using the observed error
+            budget.record(params_dict, actual_Fr, actual_BW, s11_dip, float(freq), float(bandwidth))
+            # 5) Auto-correct predicted numeric params using the observed error (and, in broyden mode, the history)
+            history.append((numeric_params, actual_Fr, actual_BW))
             corrected_numeric = ai.autocorrect_params(numeric_params, desired_Fr=float(freq), actual_Fr=actual_Fr,
-                                                    desired_BW=float(bandwidth), actual_BW=actual_BW)
+                                                    desired_BW=float(bandwidth), actual_BW=actual_BW,
+                                                    history=history)
             # Build corrected param dict for a re-run
             corrected_params = params_dict.copy()
             corrected_params["patch_W"] = corrected_numeric[0]
@@ -82,6 +189,8 @@ def main(page: ft.Page):
             corrected_params["substrate_h"] = corrected_numeric[3]
             corrected_params["eps_r"] = corrected_numeric[4]
             corrected_params["feed_width"] = corrected_numeric[5]
+            corrected_params["substrate_W"] = corrected_numeric[0] + 6*corrected_numeric[3]
+            corrected_params["substrate_L"] = corrected_numeric[1] + 6*corrected_numeric[3]
             
             # Optionally re-run in CST to see corrected result (set to True to auto-run)
             AUTO_RERUN_AFTER_CORRECT = False
@@ -111,13 +220,41 @@ def main(page: ft.Page):
             bw_tolerance = 15      # MHz, e.g., within 15 MHz
 
             if abs(actual_Fr - float(freq)) < freq_tolerance and abs(actual_BW - float(bandwidth)) < bw_tolerance:
-                return
+                print("[CST][cache]", sim_cache.report())
+                print("[AI][gate]", gate.report())
+                budget.next_iteration()
+                checkpoint("converged")
+                store_design(params_dict, (actual_Fr, actual_BW, s11_dip), converged=True)
+                return params_dict
             else:
                 print("\nretring again!!!\n")
+            # next iteration simulates the corrected design instead of re-running the optimizer;
+            # the correction aims at the target, with the last miss as its uncertainty
+            numeric_params = corrected_numeric
+            params_dict = corrected_params
+            predicted = (float(freq), float(bandwidth), abs(actual_Fr - float(freq)), abs(actual_BW - float(bandwidth)))
             firsttime = False
+            budget.next_iteration()
+            checkpoint()
+
+        checkpoint("stopped")
+        print("[AI][budget]", budget.summary())
+        print("[AI][gate]", gate.report())
+        if budget.best is None:
+            return params_dict
+        store_design(budget.best["params_dict"], (budget.best["Fr"], budget.best["BW"], budget.best["S11"]))
+        if budget.stop_reason:
+            page.open(ft.SnackBar(ft.Text(
+                f"Stopped ({budget.stop_reason}{'' if budget.stop_reason.startswith('gate') else ' budget'}): best {budget.best['Fr']:.3f} GHz / "
+                f"{budget.best['BW']:.1f} MHz after {budget.simulations} simulations")))
+            page.update()
+        # return the best simulated design for any further use
+        return budget.best["params_dict"]
 
-        # return params for any further use
-        return params_dict
+    def resume_antenna(job_id):
+        spec = load_checkpoint(job_id)["spec"]
+        return generate_antenna(spec["family"], spec["shape"], spec["freq"], spec["bandwidth"],
+                                spec["substrate"], spec["conductor"], resume_job=job_id)
 
 
     # ---- HOME PAGE ----
@@ -235,6 +372,14 @@ def main(page: ft.Page):
             bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
         )
 
+        # Interrupted design loops (design_checkpoint.py), newest first
+        resume_dropdown = ft.Dropdown(
+            label="Resume Interrupted Job",
+            options=[ft.dropdown.Option(key=job_id, text=describe(job_id, state)) for job_id, state in list_jobs()],
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+        )
+
         return ft.View(
             route="/create",
             controls=[
@@ -270,6 +415,7 @@ def main(page: ft.Page):
                                         bandwidth_field,
                                         substrate_dropdown,
                                         conductor_dropdown,
+                                        resume_dropdown,
                                         ft.Row(
                                             alignment=ft.MainAxisAlignment.CENTER,
                                             spacing=20,
@@ -291,6 +437,17 @@ def main(page: ft.Page):
                                                         conductor_dropdown.value
                                                     ),
                                                 ),
+                                                ft.ElevatedButton(
+                                                    text="Resume",
+                                                    style=ft.ButtonStyle(
+                                                        bgcolor=ft.Colors.TEAL_ACCENT_700,
+                                                        color=ft.Colors.WHITE,
+                                                        shape=ft.RoundedRectangleBorder(radius=20),
+                                                        padding=20,
+                                                    ),
+                                                    on_click=lambda e: resume_antenna(resume_dropdown.value)
+                                                    if resume_dropdown.value else None,
+                                                ),
                                                 ft.ElevatedButton(
                                                     text="Back",
                                                     style=ft.ButtonStyle(
@@ -314,7 +471,76 @@ def main(page: ft.Page):
 
     # ---- OPTIMIZE ANTENNA PAGE ----
     def optimize_view():
-        existing_antennas = ["Antenna 1", "Antenna 2", "Antenna 3"]  # Example list
+        substrates = ["FR-4 (lossy)", "Rogers RT-duroid 5880 (lossy)", "Taconic TLY-3 (lossy)"]
+        conductors = ["Copper (annealed)", "Aluminum", "Silver"]
+
+        # Stored designs (design_repository.py), newest first
+        antenna_dropdown = ft.Dropdown(
+            label="Select Antenna",
+            options=[ft.dropdown.Option(key=str(d["id"]), text=describe_design(d)) for d in designs.recent()],
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+        )
+
+        freq_field = ft.TextField(
+            label="Target Resonant Frequency (GHz)",
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+            color=ft.Colors.WHITE,
+        )
+
+        bandwidth_field = ft.TextField(
+            label="Target Bandwidth (MHz)",
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+            color=ft.Colors.WHITE,
+        )
+
+        substrate_dropdown = ft.Dropdown(
+            label="Substrate Material",
+            options=[ft.dropdown.Option(i) for i in substrates],
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+        )
+
+        conductor_dropdown = ft.Dropdown(
+            label="Conductor Material",
+            options=[ft.dropdown.Option(i) for i in conductors],
+            width=400,
+            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
+        )
+
+        def select_antenna(e):
+            # start from the stored design's own target and materials
+            design = designs.get(antenna_dropdown.value)
+            freq_field.value = f"{design['target_freq_ghz']:g}"
+            bandwidth_field.value = f"{design['target_bw_mhz']:g}"
+            substrate_dropdown.value = design["substrate"]
+            conductor_dropdown.value = design["conductor"]
+            page.update()
+
+        antenna_dropdown.on_change = select_antenna
+
+        def optimize_antenna(e):
+            if not antenna_dropdown.value:
+                page.open(ft.SnackBar(ft.Text("Select a stored antenna first.")))
+                page.update()
+                return None
+            design = designs.get(antenna_dropdown.value)
+            freq, bandwidth = float(freq_field.value), float(bandwidth_field.value)
+            substrate = substrate_dropdown.value or design["substrate"]
+            conductor = conductor_dropdown.value or design["conductor"]
+            # seed a checkpointed job with the stored design, corrected toward the new target
+            # from its stored simulation, so the loop starts where that design left off
+            params_dict, numeric_params, feed_type_label, history, predicted = warm_start(
+                ai, design, freq, bandwidth, substrate)
+            job_id = new_job(dict(family=design["family"], shape=design["shape"], freq=freq, bandwidth=bandwidth,
+                                  substrate=substrate, conductor=conductor), session=page.session_id)
+            update_checkpoint(job_id, params_dict=params_dict, numeric_params=numeric_params,
+                              feed_type_label=feed_type_label, predicted=predicted, history=history,
+                              parent_design=design["id"])
+            return generate_antenna(design["family"], design["shape"], freq, bandwidth, substrate, conductor,
+                                    resume_job=job_id, budget=DesignBudget(max_simulations=REFINE_MAX_SIMULATIONS))
 
         return ft.View(
             route="/optimize",
@@ -345,36 +571,11 @@ def main(page: ft.Page):
                                             weight=ft.FontWeight.BOLD,
                                             color=ft.Colors.WHITE,
                                         ),
-                                        ft.Dropdown(
-                                            label="Select Antenna",
-                                            options=[ft.dropdown.Option(i) for i in existing_antennas],
-                                            width=400,
-                                            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
-                                        ),
-                                        ft.TextField(
-                                            label="Target Resonant Frequency (GHz)",
-                                            width=400,
-                                            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
-                                            color=ft.Colors.WHITE,
-                                        ),
-                                        ft.TextField(
-                                            label="Target Bandwidth (MHz)",
-                                            width=400,
-                                            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
-                                            color=ft.Colors.WHITE,
-                                        ),
-                                        ft.Dropdown(
-                                            label="Substrate Material",
-                                            options=[ft.dropdown.Option(i) for i in ["FR4", "Rogers 5880", "Duroid", "Taconic"]],
-                                            width=400,
-                                            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
-                                        ),
-                                        ft.Dropdown(
-                                            label="Conductor Material",
-                                            options=[ft.dropdown.Option(i) for i in ["Copper", "Aluminum", "Silver"]],
-                                            width=400,
-                                            bgcolor=ft.Colors.with_opacity(0.2, ft.Colors.WHITE),
-                                        ),
+                                        antenna_dropdown,
+                                        freq_field,
+                                        bandwidth_field,
+                                        substrate_dropdown,
+                                        conductor_dropdown,
                                         ft.Row(
                                             alignment=ft.MainAxisAlignment.CENTER,
                                             spacing=20,
@@ -387,9 +588,7 @@ def main(page: ft.Page):
                                                         shape=ft.RoundedRectangleBorder(radius=20),
                                                         padding=20,
                                                     ),
-                                                    on_click=lambda e: page.snack_bar.open(
-                                                        ft.SnackBar(ft.Text("Optimization coming soon!"))
-                                                    ),
+                                                    on_click=optimize_antenna,
                                                 ),
                                                 ft.ElevatedButton(
                                                     text="Back",
@@ -0,0 +1,559 @@
+"""
+Design / simulation job queue on a SQLite broker, so any number of worker processes share
+the CST licences: on this machine, or on several machines when the database file sits on
+a network share they all mount.
+
+Jobs are rows in QUEUE_DB. A worker claims the oldest queued job of the highest priority
+inside one IMMEDIATE transaction and holds it under a lease that its heartbeat thread
+extends every QUEUE_HEARTBEAT_SECONDS. If a worker dies, its lease runs out and the next
+claim hands the job to another worker (up to QUEUE_MAX_ATTEMPTS attempts). A completion
+from a worker that has lost its lease is rejected, so each job's result is written once.
+Results and the feedback rows of every solve land in the same database; export_feedback()
+appends the new feedback rows to the AI feedback CSV from this one place, so workers never
+write the CSV themselves. An export first claims the pending rows as a batch (recording
+the CSV text and the file size it appends at), then writes and marks it in a second
+transaction; concurrent exporters serialize on the database lock, and one that crashed
+between the two is finished by the next export without writing its rows twice.
+
+Job kinds:
+  simulate  payload: params (design dict), family, shape, freq, substrate, conductor, and
+            optionally bandwidth / numeric / feed_type_label for a feedback row; the gate
+            checks numeric when given, else the params dict (eps_eff derived if missing)
+  design    payload: family, shape, freq, bandwidth, substrate, conductor (optionally
+            eps_r, substrate_h, max_simulations); optimize, then the headless
+            simulate -> correct loop (design_scheduler.run_design_loop)
+
+    python job_queue.py enqueue -i targets.jsonl            # design jobs, one JSON spec per line
+    python job_queue.py enqueue --kind simulate -i designs.jsonl   # infeasible / duplicate designs dropped
+    python job_queue.py worker --simulator stand-in --delay 0.5
+    python job_queue.py worker --simulator cst --result-path C:\\...\\Untitled_0.cst
+    python job_queue.py stats
+    python job_queue.py export-feedback
+
+Journal mode: on a local disk the queue uses WAL (readers never block the claiming
+writer). WAL keeps its index in shared memory, which only works between processes on one
+host, so on a network share (detected by on_network_share(), or forced with --no-wal) the
+database stays in SQLite's rollback-journal mode. Every process opening the same file must
+agree, so give all workers the same --no-wal setting if detection cannot see the share.
+SQLite also needs working file locks: fine on SMB shares, not on most NFS mounts.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import contextlib
+
+QUEUE_DB = "job_queue.db"
+QUEUE_LEASE_SECONDS = 120        # a claimed job goes back to the queue after this long without a heartbeat
+QUEUE_HEARTBEAT_SECONDS = 30
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_POLL_SECONDS = 1.0
+QUEUE_STATS_WINDOW = 600         # seconds of history used for throughput and utilisation
+JOB_KINDS = ("simulate", "design")
+# /proc/mounts file system types on which WAL's shared-memory index does not work
+NETWORK_FILESYSTEMS = ("cifs", "smb3", "smbfs", "nfs", "nfs4", "fuse.sshfs")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',     -- queued, leased, done, failed
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    enqueued REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, id);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    exported INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS feedback_pending ON feedback (exported, id);
+CREATE TABLE IF NOT EXISTS feedback_exports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    path TEXT NOT NULL,
+    csv_offset INTEGER NOT NULL,     -- size of the CSV when the batch was claimed
+    csv_text TEXT NOT NULL,          -- exactly what the batch appends
+    n_rows INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    host TEXT, pid INTEGER, simulator TEXT,
+    started REAL, last_seen REAL,
+    busy_seconds REAL NOT NULL DEFAULT 0,
+    jobs_done INTEGER NOT NULL DEFAULT 0,
+    current_job INTEGER,
+    status TEXT
+);
+"""
+
+
+def on_network_share(path):
+    """True when path is on a network file system (UNC path / remote drive, or a cifs / nfs mount)."""
+    path = os.path.abspath(path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
+        import ctypes
+        DRIVE_REMOTE = 4
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == DRIVE_REMOTE
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    # the longest mount point containing path decides
+    containing = [(point, fs) for point, fs in mounts if path == point or path.startswith(point.rstrip("/") + "/")]
+    return bool(containing) and max(containing, key=lambda m: len(m[0]))[1] in NETWORK_FILESYSTEMS
+
+
+class JobQueue:
+    def __init__(self, path=QUEUE_DB, timeout=60, wal=None):
+        """wal: None chooses WAL unless the database is on a network share (on_network_share)."""
+        self.path = path
+        self.wal = not on_network_share(path) if wal is None else wal
+        # autocommit mode; writes go through _transaction(). The worker's heartbeat thread
+        # shares the connection under self._lock.
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        with self._lock:
+            if self.wal:
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+            else:
+                self.db.execute("PRAGMA journal_mode=DELETE")
+                self.db.execute("PRAGMA synchronous=FULL")
+            self.db.executescript(SCHEMA)
+            columns = [r["name"] for r in self.db.execute("PRAGMA table_info(feedback)")]
+            if "export_batch" not in columns:
+                self.db.execute("ALTER TABLE feedback ADD COLUMN export_batch INTEGER")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    # ----- producers -----
+    def enqueue(self, kind, payload, priority=0, max_attempts=QUEUE_MAX_ATTEMPTS):
+        return self.enqueue_many(kind, [payload], priority, max_attempts)[0]
+
+    def enqueue_many(self, kind, payloads, priority=0, max_attempts=QUEUE_MAX_ATTEMPTS):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind {kind!r}, expected one of {JOB_KINDS}")
+        now = time.time()
+        with self._transaction() as db:
+            return [db.execute("INSERT INTO jobs (kind, payload, priority, max_attempts, enqueued) VALUES (?, ?, ?, ?, ?)",
+                               (kind, json.dumps(p, default=float), priority, max_attempts, now)).lastrowid
+                    for p in payloads]
+
+    def job(self, job_id):
+        with self._lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # ----- workers -----
+    def claim(self, worker_id, kinds=JOB_KINDS, lease_seconds=QUEUE_LEASE_SECONDS):
+        """Lease the next job for worker_id: (job_id, kind, payload, attempt), or None if nothing is claimable."""
+        marks = ",".join("?" * len(kinds))
+        with self._transaction() as db:
+            now = time.time()
+            # jobs whose worker stopped heartbeating and that have no attempts left fail here
+            db.execute("UPDATE jobs SET status = 'failed', finished = ?, error = 'lease expired' "
+                       "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts", (now, now))
+            row = db.execute(f"SELECT id, kind, payload, attempts, worker FROM jobs WHERE kind IN ({marks}) AND "
+                             f"(status = 'queued' OR (status = 'leased' AND lease_expires < ?)) "
+                             f"ORDER BY priority DESC, id LIMIT 1", (*kinds, now)).fetchone()
+            if row is None:
+                return None
+            if row["worker"] is not None:   # taken over from a worker that stopped heartbeating
+                db.execute("UPDATE workers SET current_job = NULL, status = 'lost lease' WHERE id = ? AND current_job = ?",
+                           (row["worker"], row["id"]))
+            db.execute("UPDATE jobs SET status = 'leased', worker = ?, attempts = attempts + 1, "
+                       "lease_expires = ?, started = ? WHERE id = ?", (worker_id, now + lease_seconds, now, row["id"]))
+            db.execute("UPDATE workers SET current_job = ?, last_seen = ?, status = 'busy' WHERE id = ?",
+                       (row["id"], now, worker_id))
+        return row["id"], row["kind"], json.loads(row["payload"]), row["attempts"] + 1
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=QUEUE_LEASE_SECONDS):
+        """Extend the lease; False when the job is no longer this worker's (expired and re-claimed)."""
+        with self._transaction() as db:
+            now = time.time()
+            owned = db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                               (now + lease_seconds, job_id, worker_id)).rowcount == 1
+            db.execute("UPDATE workers SET last_seen = ? WHERE id = ?", (now, worker_id))
+        return owned
+
+    def complete(self, job_id, worker_id, result, feedback_rows=(), busy_seconds=0.0):
+        """Store the result and feedback rows; False (nothing stored) if the lease was lost."""
+        with self._transaction() as db:
+            now = time.time()
+            owned = db.execute("UPDATE jobs SET status = 'done', result = ?, finished = ?, lease_expires = NULL "
+                               "WHERE id = ? AND worker = ? AND status = 'leased'",
+                               (json.dumps(result, default=float), now, job_id, worker_id)).rowcount == 1
+            if owned:
+                db.executemany("INSERT INTO feedback (job_id, row) VALUES (?, ?)",
+                               [(job_id, json.dumps(r, default=float)) for r in feedback_rows])
+            db.execute("UPDATE workers SET busy_seconds = busy_seconds + ?, jobs_done = jobs_done + ?, "
+                       "current_job = NULL, last_seen = ?, status = 'idle' WHERE id = ?",
+                       (busy_seconds, int(owned), now, worker_id))
+        return owned
+
+    def fail(self, job_id, worker_id, error, busy_seconds=0.0):
+        """Requeue the job, or mark it failed once it has used max_attempts."""
+        with self._transaction() as db:
+            now = time.time()
+            db.execute("UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+                       "error = ?, finished = ?, lease_expires = NULL, worker = NULL "
+                       "WHERE id = ? AND worker = ? AND status = 'leased'", (str(error), now, job_id, worker_id))
+            db.execute("UPDATE workers SET busy_seconds = busy_seconds + ?, current_job = NULL, last_seen = ?, "
+                       "status = 'idle' WHERE id = ?", (busy_seconds, now, worker_id))
+
+    def register_worker(self, worker_id, simulator=""):
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO workers (id, host, pid, simulator, started, last_seen, status) "
+                       "VALUES (?, ?, ?, ?, ?, ?, 'idle')", (worker_id, socket.gethostname(), os.getpid(), simulator, now, now))
+
+    def worker_seen(self, worker_id, status=None):
+        with self._transaction() as db:
+            db.execute("UPDATE workers SET last_seen = ?, status = COALESCE(?, status) WHERE id = ?",
+                       (time.time(), status, worker_id))
+
+    # ----- central write-back and reporting -----
+    def export_feedback(self, path=None):
+        """
+        Append feedback rows not exported yet to the AI feedback CSV (default
+        RDN_AI.FEEDBACK_FILE); returns how many rows were exported. A batch left unfinished
+        by a crashed exporter is completed first.
+        """
+        import RDN_AI
+        path = path or RDN_AI.FEEDBACK_FILE
+        exported = 0
+        with RDN_AI.FEEDBACK_LOCK:
+            while True:
+                with self._transaction() as db:
+                    batch = db.execute("SELECT * FROM feedback_exports WHERE done = 0 ORDER BY id LIMIT 1").fetchone()
+                    if batch is None:
+                        batch = self._claim_export_batch(db, path)
+                if batch is None:
+                    return exported
+                with self._transaction() as db:
+                    # re-checked under the write lock: another exporter may have finished it meanwhile
+                    if db.execute("SELECT done FROM feedback_exports WHERE id = ?", (batch["id"],)).fetchone()[0]:
+                        continue
+                    _append_once(batch["path"], batch["csv_offset"], batch["csv_text"])
+                    db.execute("UPDATE feedback_exports SET done = 1 WHERE id = ?", (batch["id"],))
+                    db.execute("UPDATE feedback SET exported = 1 WHERE export_batch = ?", (batch["id"],))
+                exported += batch["n_rows"]
+
+    def _claim_export_batch(self, db, path):
+        """Assign every unclaimed feedback row to a new export batch (inside a transaction); None if there are none."""
+        import io
+        import csv
+        import RDN_AI
+        rows = db.execute("SELECT id, row FROM feedback WHERE exported = 0 AND export_batch IS NULL "
+                          "ORDER BY id").fetchall()
+        if not rows:
+            return None
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        text = io.StringIO(newline="")
+        writer = csv.writer(text)
+        if offset == 0:
+            writer.writerow(RDN_AI.feedback_header())
+        writer.writerows(json.loads(r["row"]) for r in rows)
+        batch_id = db.execute("INSERT INTO feedback_exports (created, path, csv_offset, csv_text, n_rows) "
+                              "VALUES (?, ?, ?, ?, ?)",
+                              (time.time(), os.path.abspath(path), offset, text.getvalue(), len(rows))).lastrowid
+        db.execute("UPDATE feedback SET export_batch = ? WHERE exported = 0 AND export_batch IS NULL AND id <= ?",
+                   (batch_id, rows[-1]["id"]))
+        return db.execute("SELECT * FROM feedback_exports WHERE id = ?", (batch_id,)).fetchone()
+
+    def stats(self, window=QUEUE_STATS_WINDOW, lease_seconds=QUEUE_LEASE_SECONDS):
+        """Queue depth by status and kind, throughput over `window` seconds and per-worker utilisation."""
+        now = time.time()
+        with self._lock:
+            depth = {(r["kind"], r["status"]): r["n"] for r in self.db.execute(
+                "SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status")}
+            oldest = self.db.execute("SELECT MIN(enqueued) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            recent = self.db.execute("SELECT COUNT(*), AVG(finished - started) FROM jobs "
+                                     "WHERE status = 'done' AND finished > ?", (now - window,)).fetchone()
+            pending_feedback = self.db.execute("SELECT COUNT(*) FROM feedback WHERE exported = 0").fetchone()[0]
+            workers = [dict(r) for r in self.db.execute("SELECT * FROM workers ORDER BY started")]
+        for w in workers:
+            w["alive"] = now - w["last_seen"] < 2 * lease_seconds
+            w["utilisation"] = w["busy_seconds"] / max(w["last_seen"] - w["started"], 1e-9)
+        alive = [w for w in workers if w["alive"]]
+        return {
+            "queued": sum(n for (k, s), n in depth.items() if s == "queued"),
+            "leased": sum(n for (k, s), n in depth.items() if s == "leased"),
+            "done": sum(n for (k, s), n in depth.items() if s == "done"),
+            "failed": sum(n for (k, s), n in depth.items() if s == "failed"),
+            "by_kind": {f"{k}/{s}": n for (k, s), n in sorted(depth.items())},
+            "oldest_queued_seconds": now - oldest if oldest else 0.0,
+            "done_per_minute": recent[0] * 60.0 / window,
+            "mean_job_seconds": recent[1] or 0.0,
+            "feedback_pending_export": pending_feedback,
+            "workers_alive": len(alive),
+            "workers_busy": sum(1 for w in alive if w["current_job"] is not None and w["status"] == "busy"),
+            "utilisation": (sum(w["busy_seconds"] for w in alive) /
+                            max(sum(w["last_seen"] - w["started"] for w in alive), 1e-9)) if alive else 0.0,
+            "workers": workers,
+        }
+
+    def report(self):
+        s = self.stats()
+        lines = [f"queue: {s['queued']} queued, {s['leased']} running, {s['done']} done, {s['failed']} failed "
+                 f"(oldest queued {s['oldest_queued_seconds']:.0f} s); {s['done_per_minute']:.1f} jobs/min, "
+                 f"mean {s['mean_job_seconds']:.1f} s/job; {s['feedback_pending_export']} feedback rows to export",
+                 f"workers: {s['workers_alive']} alive, {s['workers_busy']} busy, utilisation {s['utilisation'] * 100:.0f}%"]
+        for w in s["workers"]:
+            lines.append(f"  {w['id']:<28} {w['simulator']:<9} {'alive' if w['alive'] else 'gone ':<6}"
+                         f"{w['jobs_done']:>5} jobs  {w['utilisation'] * 100:5.1f}% busy"
+                         + (f"  on job {w['current_job']}" if w["current_job"] is not None else ""))
+        return "\n".join(lines)
+
+    def close(self):
+        self.db.close()
+
+
+def _append_once(path, offset, text):
+    """
+    Append text to path unless it is already there after offset (an exporter that crashed
+    after writing). A partial write of it at the end of the file is replaced.
+    """
+    data = text.encode("utf-8")
+    with open(path, "a+b") as f:
+        f.seek(offset)
+        tail = f.read()
+        if data in tail:
+            return
+        if data.startswith(tail):
+            f.truncate(offset)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Worker:
+    """
+    Claims jobs from a JobQueue and runs them against `simulator` (anything with
+    simulate(params, family, shape, freq, substrate, conductor, ...) like CSTDriver or
+    StandInSimulator). Design jobs need `ai` (a TrainedAI).
+    """
+    def __init__(self, queue, simulator, ai=None, worker_id=None, kinds=JOB_KINDS, simulator_name="",
+                 lease_seconds=QUEUE_LEASE_SECONDS, heartbeat_seconds=QUEUE_HEARTBEAT_SECONDS, result_path=None,
+                 repository=None):
+        self.queue = queue
+        self.simulator = simulator
+        self.ai = ai
+        self.worker_id = worker_id or default_worker_id()
+        self.kinds = kinds
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.result_path = result_path
+        self.repository = repository    # optional design_repository.DesignRepository for finished designs
+        self.jobs_done = 0
+        queue.register_worker(self.worker_id, simulator_name)
+
+    def _simulate(self, params, spec):
+        return self.simulator.simulate(params, spec["family"], spec["shape"], spec["freq"], spec["substrate"],
+                                       spec["conductor"], self.result_path)
+
+    def execute(self, kind, payload):
+        """Run one job; returns (result, feedback_rows)."""
+        from RDN_AI import feedback_row
+        if kind == "simulate":
+            from design_gate import feasibility, GATE_REASONS
+            from design_repository import payload_numeric
+            # jobs come from elsewhere, so only feasibility is checked here; enqueue deduplicates
+            code = feasibility([payload_numeric(payload)])[0]
+            if code:
+                print(f"[queue][{self.worker_id}] not simulating an infeasible design ({GATE_REASONS[code]})")
+                return {"Fr": None, "BW": None, "S11": None, "gated": GATE_REASONS[code]}, []
+            Fr, BW, S11 = self._simulate(payload["params"], payload)
+            rows = []
+            if Fr is not None and payload.get("numeric") is not None and payload.get("bandwidth") is not None:
+                rows.append(feedback_row(payload["freq"], payload["bandwidth"], payload["numeric"],
+                                         payload.get("feed_type_label", ""), Fr, BW, S11))
+            return {"Fr": Fr, "BW": BW, "S11": S11}, rows
+
+        from design_scheduler import DesignBudget, run_design_loop, SUBSTRATE_PROPERTIES
+        from design_gate import DesignGate
+        from design_repository import numeric_from_params
+        freq, bandwidth = float(payload["freq"]), float(payload["bandwidth"])
+        eps_r, h = SUBSTRATE_PROPERTIES.get(payload["substrate"], (None, None))
+        eps_r, h = payload.get("eps_r", eps_r), payload.get("substrate_h", h)
+        fixed = {k: v for k, v in (("eps_r", eps_r), ("substrate_h", h)) if v is not None}
+        opt = self.ai.optimize_parameters(freq, bandwidth, **fixed)
+        rows = []
+        budget = DesignBudget(max_simulations=payload.get("max_simulations", DesignBudget().max_simulations))
+        gate = DesignGate()
+        budget, converged = run_design_loop(
+            self.ai, lambda params: self._simulate(params, payload), freq, bandwidth,
+            opt["dict"], opt["numeric"], opt["feed_type_label"], budget,
+            on_simulation=lambda numeric, Fr, BW, S11: rows.append(
+                feedback_row(freq, bandwidth, numeric, opt["feed_type_label"], Fr, BW, S11)), gate=gate)
+        best = budget.best
+        return {"converged": converged, "stop_reason": budget.stop_reason, "simulations": budget.simulations,
+                "solves_prevented": gate.prevented, "best": best, "summary": budget.summary(),
+                "feed_type_label": str(opt["feed_type_label"]),
+                "numeric": numeric_from_params(best["params_dict"]) if best is not None else None}, rows
+
+    def run_one(self):
+        """Claim and run one job; False when the queue had nothing for this worker."""
+        claimed = self.queue.claim(self.worker_id, self.kinds, self.lease_seconds)
+        if claimed is None:
+            return False
+        job_id, kind, payload, attempt = claimed
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat_seconds):
+                if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    print(f"[queue][{self.worker_id}] lost the lease on job {job_id}")
+                    return
+
+        threading.Thread(target=beat, daemon=True).start()
+        t0 = time.perf_counter()
+        try:
+            result, rows = self.execute(kind, payload)
+        except Exception as e:
+            stop.set()
+            print(f"[queue][{self.worker_id}] job {job_id} ({kind}, attempt {attempt}) failed: {e}")
+            self.queue.fail(job_id, self.worker_id, repr(e), time.perf_counter() - t0)
+            return True
+        stop.set()
+        if self.queue.complete(job_id, self.worker_id, result, rows, time.perf_counter() - t0):
+            self.jobs_done += 1
+            if kind == "design" and self.repository is not None and result["best"] is not None:
+                best = result["best"]
+                self.repository.add(payload["family"], payload["shape"], payload["substrate"], payload["conductor"],
+                                    payload["freq"], payload["bandwidth"], best["params_dict"],
+                                    numeric=result["numeric"], feed_type_label=result["feed_type_label"],
+                                    actual=(best["Fr"], best["BW"], best["S11"]), converged=result["converged"],
+                                    simulations=result["simulations"], source="queue", job_id=str(job_id))
+        else:
+            print(f"[queue][{self.worker_id}] job {job_id} was re-assigned, result dropped")
+        return True
+
+    def run(self, max_jobs=None, idle_exit=None, poll=QUEUE_POLL_SECONDS):
+        """Work until max_jobs are done or the queue has been empty for idle_exit seconds (None: forever)."""
+        idle_since = time.monotonic()
+        while max_jobs is None or self.jobs_done < max_jobs:
+            if self.run_one():
+                idle_since = time.monotonic()
+                continue
+            if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                break
+            self.queue.worker_seen(self.worker_id)
+            time.sleep(poll)
+        self.queue.worker_seen(self.worker_id, status="stopped")
+
+
+def make_simulator(name, delay=0.0, noise=0.0, seed=None, worker_id=None):
+    if name == "stand-in":
+        from cst_interface.stand_in_simulator import StandInSimulator
+        return StandInSimulator(delay=delay, noise=noise, seed=seed)
+    from cst_interface.cst_driver import CSTDriver
+    from cst_interface.sim_cache import SimulationCache
+    from cst_interface.s11_store import S11Store, S11_STORE_PATH, worker_store_path
+    # one HDF5 writer per file: every worker keeps its own trace store; the cache is shared
+    trace_path = worker_store_path(worker_id) if worker_id else S11_STORE_PATH
+    return CSTDriver(cache=SimulationCache(), trace_store=S11Store(trace_path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite job queue for design and simulation jobs.")
+    parser.add_argument("--db", default=QUEUE_DB)
+    parser.add_argument("--no-wal", action="store_true",
+                        help="rollback-journal mode, for a database on a network share shared by several machines")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_enq = sub.add_parser("enqueue", help="enqueue jobs from JSONL (one payload per line)")
+    p_enq.add_argument("-i", "--input", default="-")
+    p_enq.add_argument("--kind", choices=JOB_KINDS, default="design")
+    p_enq.add_argument("--priority", type=int, default=0)
+    p_enq.add_argument("--no-gate", action="store_true",
+                       help="enqueue simulate jobs without dropping infeasible and near-duplicate designs")
+    p_work = sub.add_parser("worker", help="claim and run jobs")
+    p_work.add_argument("--simulator", choices=["stand-in", "cst"], default="cst")
+    p_work.add_argument("--result-path", default=None, help=".cst file the S11 is read from (cst simulator)")
+    p_work.add_argument("--delay", type=float, default=0.0, help="seconds per stand-in solve")
+    p_work.add_argument("--noise", type=float, default=0.0, help="relative stand-in noise")
+    p_work.add_argument("--kinds", nargs="+", choices=JOB_KINDS, default=list(JOB_KINDS))
+    p_work.add_argument("--max-jobs", type=int, default=None)
+    p_work.add_argument("--idle-exit", type=float, default=None, help="stop after this many idle seconds")
+    p_work.add_argument("--lease", type=float, default=QUEUE_LEASE_SECONDS)
+    p_work.add_argument("--heartbeat", type=float, default=QUEUE_HEARTBEAT_SECONDS)
+    p_work.add_argument("--worker-id", default=None)
+    p_work.add_argument("--repository", default=None, help="also store finished designs in this design repository")
+    sub.add_parser("stats", help="queue depth and worker utilisation")
+    p_exp = sub.add_parser("export-feedback", help="append new feedback rows to the AI feedback CSV")
+    p_exp.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db, wal=False if args.no_wal else None)
+    if args.command == "enqueue":
+        stream = sys.stdin if args.input == "-" else open(args.input)
+        payloads = [json.loads(line) for line in stream if line.strip()]
+        if args.kind == "simulate" and payloads and not args.no_gate:
+            from design_gate import DesignGate, feed_index
+            from design_repository import payload_numeric
+            gate = DesignGate()
+            keep, _ = gate.filter([payload_numeric(p) for p in payloads],
+                                  [feed_index(p["params"].get("feed_type", 0)) for p in payloads])
+            payloads = [payloads[i] for i in keep]
+            print("[AI][gate]", gate.report())
+        ids = queue.enqueue_many(args.kind, payloads, args.priority)
+        print(f"Enqueued {len(ids)} {args.kind} jobs" + (f" ({ids[0]}..{ids[-1]})" if ids else ""))
+    elif args.command == "worker":
+        ai = None
+        if "design" in args.kinds:
+            from RDN_AI import TrainedAI
+            ai = TrainedAI()
+        repository = None
+        if args.repository:
+            from design_repository import DesignRepository
+            repository = DesignRepository(args.repository)
+        worker_id = args.worker_id or default_worker_id()
+        worker = Worker(queue, make_simulator(args.simulator, args.delay, args.noise, worker_id=worker_id), ai, worker_id,
+                        tuple(args.kinds), args.simulator, args.lease, args.heartbeat, args.result_path, repository)
+        print(f"[queue] worker {worker.worker_id} on {args.db} ({args.simulator}, "
+              f"{'WAL' if queue.wal else 'rollback journal'})")
+        worker.run(args.max_jobs, args.idle_exit)
+        print(f"[queue] worker {worker.worker_id} done, {worker.jobs_done} jobs")
+    elif args.command == "stats":
+        print(queue.report())
+    elif args.command == "export-feedback":
+        print(f"Exported {queue.export_feedback(args.out)} feedback rows")
@@ -0,0 +1,93 @@
+"""
+Reduced-precision, numpy-only copies of the forward/inverse surrogates.
+
+The Keras MLPs hold a few thousand weights, but loading them pulls in the whole
+TensorFlow runtime. export_lite() writes one .npz per model and precision holding
+the Dense kernels (float16, or int8 with a float32 scale per output unit), the biases,
+and the StandardScaler/OneHotEncoder state. load_lite() returns objects with the same
+predict/transform/categories_ interface TrainedAI already uses, so neither TensorFlow
+nor scikit-learn is imported at inference time.
+"""
+import numpy as np
+
+LITE_PRECISIONS = ("float16", "int8")
+
+
+class LiteMLP:
+    """Dense ReLU network (linear last layer) evaluated with numpy in float32."""
+    def __init__(self, kernels, biases, scales=None):
+        self.kernels = kernels          # float16 or int8 arrays (n_in, n_out)
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.scales = scales            # per-output-unit float32 scales for int8 kernels, else None
+
+    def _kernel(self, i):
+        k = self.kernels[i].astype(np.float32)
+        return k * self.scales[i] if self.scales is not None else k
+
+    def predict(self, X, verbose=None):
+        h = np.asarray(X, dtype=np.float32)
+        for i in range(len(self.kernels)):
+            if i:
+                h = np.maximum(h, 0.0)
+            h = h @ self._kernel(i) + self.biases[i]
+        return h
+
+
+class LiteScaler:
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class LiteEncoder:
+    def __init__(self, categories):
+        self.categories_ = [np.asarray(categories)]
+
+    def transform(self, X):
+        values = np.asarray(X).reshape(-1)
+        cats = self.categories_[0]
+        match = values[:, None] == cats[None, :]
+        if not match.any(axis=1).all():
+            raise ValueError(f"Found unknown categories {values[~match.any(axis=1)]} during transform")
+        return match.astype(np.float64)
+
+
+def quantize_int8(kernel):
+    """Symmetric per-output-unit int8 quantization: kernel ≈ q * scale."""
+    kernel = np.asarray(kernel, dtype=np.float32)
+    scale = np.abs(kernel).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.round(kernel / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def export_lite(model, scaler, encoder, path, precision="float16"):
+    """Write a Keras Dense model plus its fitted scaler/encoder as a lite .npz."""
+    if precision not in LITE_PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    arrays = {"precision": np.array(precision),
+              "x_mean": scaler.mean_, "x_scale": scaler.scale_,
+              "categories": np.asarray(encoder.categories_[0])}
+    layers = [layer.get_weights() for layer in model.layers if layer.get_weights()]
+    for i, (kernel, bias) in enumerate(layers):
+        if precision == "int8":
+            arrays[f"kernel_{i}"], arrays[f"scale_{i}"] = quantize_int8(kernel)
+        else:
+            arrays[f"kernel_{i}"] = kernel.astype(np.float16)
+        arrays[f"bias_{i}"] = bias.astype(np.float32)
+    np.savez(path, **arrays)
+
+
+def load_lite(path):
+    """Returns (model, scaler, encoder) drop-in replacements for the Keras/joblib artifacts."""
+    with np.load(path) as data:
+        n_layers = len([k for k in data.files if k.startswith("kernel_")])
+        kernels = [data[f"kernel_{i}"] for i in range(n_layers)]
+        biases = [data[f"bias_{i}"] for i in range(n_layers)]
+        scales = [data[f"scale_{i}"] for i in range(n_layers)] if str(data["precision"]) == "int8" else None
+        scaler = LiteScaler(data["x_mean"], data["x_scale"])
+        encoder = LiteEncoder(data["categories"])
+    return LiteMLP(kernels, biases, scales), scaler, encoder
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+from patch_analytic import patch_resonance
+
+MF_MODEL_PATH = os.path.join("models", "multifidelity", "mf_forward.save")
+
+
+def _split_inputs(X):
+    """Forward-network input layout [W, L, eps_eff, h, eps_r, feed_width, one-hot feed] -> columns."""
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    feed_type = X[:, 6:].argmax(axis=1) if X.shape[1] > 6 else np.zeros(len(X), dtype=int)
+    return X[:, 0], X[:, 1], X[:, 3], X[:, 4], X[:, 5], feed_type
+
+
+class MultiFidelityForward:
+    """
+    Forward surrogate = closed-form transmission-line model (low fidelity, evaluated
+    vectorized by patch_analytic.patch_resonance) x learned correction. The network only
+    learns log(high / low) for Fr and BW from high-fidelity rows (CST results or the
+    feedback log), which is a much smaller, smoother target than Fr/BW themselves.
+
+    predict() takes the same unscaled input vector as the forward network
+    ([W, L, eps_eff, h, eps_r, feed_width] + one-hot feed type), so TrainedAI can use it
+    in place of the Keras model with an identity scaler.
+    """
+    def __init__(self, hidden_layer_sizes=(32, 32), alpha=1e-3, random_state=42):
+        self.hidden_layer_sizes = hidden_layer_sizes
+        self.alpha = alpha
+        self.random_state = random_state
+        self.net = None
+
+    def low_fidelity(self, X):
+        W, L, h, eps_r, fw, feed_type = _split_inputs(X)
+        return np.column_stack(patch_resonance(W, L, eps_r, h, feed_type))
+
+    def _features(self, X, lf):
+        W, L, h, eps_r, fw, feed_type = _split_inputs(X)
+        onehot = np.eye(4)[np.clip(feed_type, 0, 3)]
+        return np.column_stack([np.log(W), np.log(L), np.log(h), np.log(eps_r), np.log(fw),
+                                np.log(lf), onehot])
+
+    def fit(self, X, y):
+        """X: forward-network input rows, y: high-fidelity [Fr_GHz, BW_MHz]."""
+        from sklearn.neural_network import MLPRegressor
+        lf = self.low_fidelity(X)
+        F = self._features(X, lf)
+        R = np.log(np.maximum(np.asarray(y, dtype=float), 1e-9) / lf)
+        self.f_mean, self.f_std = F.mean(axis=0), F.std(axis=0) + 1e-9
+        self.r_mean, self.r_std = R.mean(axis=0), R.std(axis=0) + 1e-9
+        self.net = MLPRegressor(hidden_layer_sizes=self.hidden_layer_sizes, alpha=self.alpha,
+                                solver="lbfgs", max_iter=3000, random_state=self.random_state)
+        self.net.fit((F - self.f_mean) / self.f_std, (R - self.r_mean) / self.r_std)
+        return self
+
+    def predict(self, X, verbose=None):
+        lf = self.low_fidelity(X)
+        if self.net is None:
+            return lf
+        F = (self._features(X, lf) - self.f_mean) / self.f_std
+        R = self.net.predict(F).reshape(-1, 2) * self.r_std + self.r_mean
+        return lf * np.exp(R)
+
+    def save(self, path=MF_MODEL_PATH):
+        import joblib
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=MF_MODEL_PATH):
+        import joblib
+        return joblib.load(path)
+
+
+def forward_rows(numeric, feed_types):
+    """Build forward-network input rows from (n, 6) numeric params and integer feed types."""
+    numeric = np.atleast_2d(np.asarray(numeric, dtype=float))[:, :6]
+    feed_types = np.broadcast_to(np.asarray(feed_types, dtype=int), (len(numeric),))
+    return np.hstack([numeric, np.eye(4)[np.clip(feed_types, 0, 3)]])
@@ -0,0 +1,249 @@
+"""
+Precomputed Pareto fronts of frequency error, bandwidth and footprint, per substrate.
+
+For every substrate of design_scheduler.SUBSTRATE_PROPERTIES a fixed Sobol set of
+PARETO_CANDIDATES patch designs (W, L, feed width, feed type; eps_r and h from the
+substrate) is evaluated once with TrainedAI.predict_output_batch, in PARETO_BATCH-row
+passes. For each target frequency of PARETO_FREQ_GRID the designs predicted within
+PARETO_MAX_FREQ_ERROR of the target are reduced to their non-dominated set under
+(|Fr - target|, -BW, substrate_W * substrate_L). Candidates, predictions and fronts are
+written to PARETO_DIR as one .npz per substrate, named by the forward model version
+(TrainedAI.forward_model_version) and the sampling settings; a retrained model or other
+settings give a new file, so stale fronts are never read. Only the predictions and the
+fronts are stored: the candidates themselves are regenerated from the Sobol seed.
+
+Trade-off questions then read the cached arrays instead of re-running the optimizer:
+
+    fronts = ParetoFronts(ai)
+    fronts.best("FR-4 (lossy)", 2.4, "footprint")   # smallest board resonating at 2.4 GHz
+    fronts.best("FR-4 (lossy)", 2.4, "bandwidth")   # widest band at 2.4 GHz
+
+Targets between grid points are answered from the same cached candidate evaluations
+(a non-dominated filter over at most a few thousand rows, no model call).
+
+    python pareto.py build [--substrate "FR-4 (lossy)"]
+    python pareto.py front --substrate "FR-4 (lossy)" --freq 2.4 [--limit 20]
+    python pareto.py best --substrate "FR-4 (lossy)" --freq 2.4 --maximize bandwidth
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+import numpy as np
+
+from design_scheduler import SUBSTRATE_PROPERTIES, SCHED_FREQ_TOLERANCE
+from patch_analytic import effective_permittivity, patch_dimensions, FEED_BW_FACTORS
+
+PARETO_DIR = "pareto_fronts"
+PARETO_CANDIDATES = 2**17          # Sobol designs evaluated per substrate
+PARETO_BATCH = 8192                # rows per forward pass
+PARETO_FREQ_GRID = np.round(np.arange(1.0, 6.0001, 0.05), 3)   # GHz, fronts precomputed at these targets
+PARETO_MAX_FREQ_ERROR = 0.05       # relative; designs further off the target are not considered
+PARETO_OBJECTIVES = ("freq_error_ghz", "bw_mhz", "footprint_mm2")
+PARETO_ASPECT = (0.5, 2.0)         # patch_W / patch_L range of the candidates
+# feed width range of the design space (RDN_AI.PARAM_BOUNDS)
+PARETO_FEED_WIDTH = (0.001, 0.006)
+
+
+def pareto_front(costs):
+    """
+    Indices of the rows of costs (n, k), all minimized, that no other row dominates.
+    Each surviving point removes everything it dominates in one vectorized pass, so the
+    cost is n x (front size) rather than n x n.
+    """
+    costs = np.asarray(costs, dtype=float)
+    idx = np.arange(len(costs))
+    i = 0
+    while i < len(costs):
+        keep = np.any(costs < costs[i], axis=1)
+        keep[i] = True
+        idx, costs = idx[keep], costs[keep]
+        i = int(np.sum(keep[:i])) + 1
+    return idx
+
+
+def sample_candidates(eps_r, h, freq_grid=PARETO_FREQ_GRID, n=PARETO_CANDIDATES, seed=0):
+    """
+    (n, 6) [W, L, eps_eff, h, eps_r, feed_width] and (n,) feed types, deterministic for a
+    given seed. L is drawn log-uniformly around the transmission-line design for the ends
+    of freq_grid, so nearly every candidate resonates inside the grid, and W / L
+    log-uniformly within PARETO_ASPECT.
+    """
+    from scipy.stats import qmc
+    _, L_hi, _, _ = patch_dimensions(freq_grid[0] * 1e9, eps_r, h)
+    _, L_lo, _, _ = patch_dimensions(freq_grid[-1] * 1e9, eps_r, h)
+    lo = np.log([L_lo * 0.85, PARETO_ASPECT[0], PARETO_FEED_WIDTH[0]])
+    hi = np.log([L_hi * 1.15, PARETO_ASPECT[1], PARETO_FEED_WIDTH[1]])
+    u = qmc.Sobol(d=4, scramble=True, seed=seed).random_base2(int(np.ceil(np.log2(n))))[:n]
+    L, aspect, fw = np.exp(lo + (hi - lo) * u[:, :3]).T
+    W = aspect * L
+    feed = np.minimum((u[:, 3] * len(FEED_BW_FACTORS)).astype(int), len(FEED_BW_FACTORS) - 1)
+    numeric = np.column_stack([W, L, effective_permittivity(W, eps_r, h), np.full(n, h), np.full(n, eps_r), fw])
+    return numeric, feed
+
+
+def front_indices(freq_ghz, predicted, footprint, max_freq_error=PARETO_MAX_FREQ_ERROR):
+    """Indices of the non-dominated candidates for one target, sorted by footprint."""
+    err = np.abs(predicted[:, 0] - freq_ghz)
+    near = np.flatnonzero((err <= max_freq_error * freq_ghz) & (predicted[:, 1] > 0))
+    costs = np.column_stack([err[near], -predicted[near, 1], footprint[near]])
+    idx = near[pareto_front(costs)]
+    return idx[np.argsort(footprint[idx], kind="stable")]
+
+
+class ParetoFronts:
+    """Per-substrate fronts for one TrainedAI (or InferencePool), computed once and cached on disk."""
+    def __init__(self, ai, cache_dir=PARETO_DIR, n_candidates=PARETO_CANDIDATES, freq_grid=PARETO_FREQ_GRID,
+                 max_freq_error=PARETO_MAX_FREQ_ERROR, seed=0):
+        self.ai = ai
+        self.cache_dir = cache_dir
+        self.settings = {"n": int(n_candidates), "grid": [float(f) for f in freq_grid],
+                         "max_freq_error": float(max_freq_error), "seed": int(seed)}
+        self.freq_grid = np.asarray(freq_grid, dtype=float)
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _path(self, substrate, version):
+        key = hashlib.sha1(json.dumps([substrate, self.settings], sort_keys=True).encode()).hexdigest()[:10]
+        slug = "".join(ch if ch.isalnum() else "_" for ch in substrate).strip("_")
+        return os.path.join(self.cache_dir, f"{slug}-{version}-{key}.npz")
+
+    def _candidates(self, substrate):
+        eps_r, h = SUBSTRATE_PROPERTIES[substrate]
+        numeric, feed = sample_candidates(eps_r, h, self.freq_grid, self.settings["n"], self.settings["seed"])
+        return numeric, feed, (numeric[:, 0] + 6 * h) * (numeric[:, 1] + 6 * h) * 1e6
+
+    def build(self, substrate):
+        """Evaluate the candidates and compute the front at every grid frequency; returns the table."""
+        t0 = time.perf_counter()
+        numeric, feed, footprint = self._candidates(substrate)
+        predicted = np.vstack([self.ai.predict_output_batch(numeric[s:s + PARETO_BATCH], feed[s:s + PARETO_BATCH])
+                               for s in range(0, len(numeric), PARETO_BATCH)])
+        t_eval = time.perf_counter() - t0
+        fronts = [front_indices(f, predicted, footprint, self.settings["max_freq_error"]) for f in self.freq_grid]
+        print(f"[AI][pareto] {substrate}: {len(numeric)} candidates evaluated in {t_eval:.2f} s, "
+              f"{len(self.freq_grid)} fronts ({np.mean([len(f) for f in fronts]):.0f} designs each) "
+              f"in {time.perf_counter() - t0 - t_eval:.2f} s")
+        return {"numeric": numeric, "feed_type": feed, "predicted": predicted, "footprint_mm2": footprint,
+                "front": np.concatenate(fronts), "offsets": np.cumsum([0] + [len(f) for f in fronts])}
+
+    def table(self, substrate):
+        """Cached candidate table of substrate for the current model version, built on first use."""
+        version = self.ai.forward_model_version()
+        with self._lock:
+            if (substrate, version) in self._tables:
+                return self._tables[(substrate, version)]
+            path = self._path(substrate, version)
+            if os.path.exists(path):
+                numeric, feed, footprint = self._candidates(substrate)
+                with np.load(path) as data:
+                    table = {k: data[k] for k in data.files}
+                table.update(numeric=numeric, feed_type=feed, footprint_mm2=footprint)
+            else:
+                table = self.build(substrate)
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = path + ".tmp.npz"
+                np.savez(tmp, predicted=table["predicted"], front=table["front"], offsets=table["offsets"])
+                os.replace(tmp, path)
+            self._tables[(substrate, version)] = table
+            return table
+
+    def front(self, substrate, freq_ghz):
+        """
+        Non-dominated designs for a target frequency, smallest footprint first, as a dict of
+        arrays (params columns, Fr/BW predictions, freq error, footprint). A grid frequency
+        is a lookup; any other target is filtered from the cached candidate evaluations.
+        """
+        t = self.table(substrate)
+        freq_ghz = float(freq_ghz)
+        k = int(np.argmin(np.abs(self.freq_grid - freq_ghz)))
+        if abs(self.freq_grid[k] - freq_ghz) < 1e-9:
+            idx = t["front"][t["offsets"][k]:t["offsets"][k + 1]]
+        else:
+            idx = front_indices(freq_ghz, t["predicted"], t["footprint_mm2"], self.settings["max_freq_error"])
+        numeric, h = t["numeric"][idx], t["numeric"][idx, 3]
+        return {
+            "patch_W": numeric[:, 0], "patch_L": numeric[:, 1], "eps_eff": numeric[:, 2],
+            "substrate_h": h, "eps_r": numeric[:, 4], "feed_width": numeric[:, 5],
+            "substrate_W": numeric[:, 0] + 6 * h, "substrate_L": numeric[:, 1] + 6 * h,
+            "feed_type": t["feed_type"][idx],
+            "freq_ghz": t["predicted"][idx, 0], "bw_mhz": t["predicted"][idx, 1],
+            "freq_error_ghz": np.abs(t["predicted"][idx, 0] - freq_ghz),
+            "footprint_mm2": t["footprint_mm2"][idx],
+        }
+
+    def best(self, substrate, freq_ghz, maximize="bandwidth", freq_tolerance=SCHED_FREQ_TOLERANCE,
+             min_bw=None, max_footprint=None):
+        """
+        One design from the front: the widest band (maximize="bandwidth") or the smallest
+        board (maximize="footprint") among those predicted within freq_tolerance GHz of the
+        target, optionally also with bw_mhz >= min_bw / footprint_mm2 <= max_footprint.
+        Returns a params dict like TrainedAI.optimize_parameters()["dict"] plus the
+        predictions, or None when no design qualifies.
+        """
+        f = self.front(substrate, freq_ghz)
+        ok = f["freq_error_ghz"] <= freq_tolerance
+        if min_bw is not None:
+            ok &= f["bw_mhz"] >= min_bw
+        if max_footprint is not None:
+            ok &= f["footprint_mm2"] <= max_footprint
+        if not ok.any():
+            return None
+        rows = np.flatnonzero(ok)
+        if maximize == "bandwidth":
+            i = rows[np.argmax(f["bw_mhz"][rows])]
+        elif maximize == "footprint":
+            i = rows[np.argmin(f["footprint_mm2"][rows])]
+        else:
+            raise ValueError(f"maximize must be 'bandwidth' or 'footprint', not {maximize!r}")
+        design = {k: (int(v[i]) if k == "feed_type" else float(v[i])) for k, v in f.items()}
+        return design
+
+    def build_all(self):
+        for substrate in SUBSTRATE_PROPERTIES:
+            self.table(substrate)
+
+
+def _print_design(d):
+    print(f"  {d['freq_ghz']:.3f} GHz (err {d['freq_error_ghz'] * 1e3:5.1f} MHz)  BW {d['bw_mhz']:6.1f} MHz  "
+          f"board {d['substrate_W'] * 1e3:5.1f} x {d['substrate_L'] * 1e3:5.1f} mm = {d['footprint_mm2']:7.0f} mm^2  "
+          f"patch {d['patch_W'] * 1e3:.2f} x {d['patch_L'] * 1e3:.2f} mm, feed {d['feed_width'] * 1e3:.2f} mm "
+          f"type {d['feed_type']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pareto fronts of frequency error, bandwidth and footprint.")
+    parser.add_argument("--cache-dir", default=PARETO_DIR)
+    parser.add_argument("--candidates", type=int, default=PARETO_CANDIDATES)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="precompute the fronts of every (or one) substrate")
+    p_build.add_argument("--substrate", default=None, choices=list(SUBSTRATE_PROPERTIES))
+    for name in ("front", "best"):
+        p = sub.add_parser(name)
+        p.add_argument("--substrate", required=True, choices=list(SUBSTRATE_PROPERTIES))
+        p.add_argument("--freq", type=float, required=True)
+    sub.choices["front"].add_argument("--limit", type=int, default=20)
+    sub.choices["best"].add_argument("--maximize", choices=["bandwidth", "footprint"], default="bandwidth")
+    sub.choices["best"].add_argument("--tolerance", type=float, default=SCHED_FREQ_TOLERANCE, help="GHz")
+    sub.choices["best"].add_argument("--min-bw", type=float, default=None)
+    sub.choices["best"].add_argument("--max-footprint", type=float, default=None, help="mm^2")
+    args = parser.parse_args()
+
+    from RDN_AI import TrainedAI
+    fronts = ParetoFronts(TrainedAI(), args.cache_dir, n_candidates=args.candidates)
+    if args.command == "build":
+        for substrate in ([args.substrate] if args.substrate else SUBSTRATE_PROPERTIES):
+            fronts.table(substrate)
+    elif args.command == "front":
+        f = fronts.front(args.substrate, args.freq)
+        print(f"{len(f['freq_ghz'])} designs on the front at {args.freq} GHz on {args.substrate}")
+        for i in np.linspace(0, len(f["freq_ghz"]) - 1, min(args.limit, len(f["freq_ghz"])), dtype=int):
+            _print_design({k: v[i] for k, v in f.items()})
+    elif args.command == "best":
+        d = fronts.best(args.substrate, args.freq, args.maximize, args.tolerance, args.min_bw, args.max_footprint)
+        if d is None:
+            print("no design on the front meets the constraints")
+        else:
+            _print_design(d)
@@ -0,0 +1,142 @@
+import numpy as np
+
+c = 3e8  # Speed of light in m/s
+
+# bandwidth multipliers per feed type, same values generate-dataset.py uses
+FEED_BW_FACTORS = np.array([1.0, 0.9, 1.1, 1.05])
+
+
+def effective_permittivity(W, eps_r, h):
+    return (eps_r + 1)/2 + (eps_r - 1)/2 * (1 + 12*h/W)**-0.5
+
+
+def patch_dimensions(f_r, eps_r, h):
+    """
+    Transmission-line design equations (same as calculate_patch_params in
+    ai_training/generate-dataset.py) but accepting arrays.
+    f_r in Hz, h in m. Returns (W, L, eps_eff, BW_Hz) for feed type 0.
+    """
+    f_r = np.asarray(f_r, dtype=float)
+    eps_r = np.asarray(eps_r, dtype=float)
+    h = np.asarray(h, dtype=float)
+    W = (c / (2 * f_r)) * np.sqrt(2 / (eps_r + 1))
+    eps_eff = effective_permittivity(W, eps_r, h)
+    delta_L = 0.412 * h * ((eps_eff + 0.3)*(W/h + 0.264))/((eps_eff - 0.258)*(W/h + 0.8))
+    L = (c / (2 * f_r * np.sqrt(eps_eff))) - 2*delta_L
+    BW = (1.5 * h / W) * np.sqrt(eps_r) * f_r
+    return W, L, eps_eff, BW
+
+
+def patch_resonance(patch_W, patch_L, eps_r, h, feed_type=0):
+    """
+    Closed-form forward model of a rectangular patch: geometry -> (Fr_GHz, BW_MHz).
+    All arguments broadcast, so whole candidate arrays are evaluated at once.
+    """
+    W = np.asarray(patch_W, dtype=float)
+    L = np.asarray(patch_L, dtype=float)
+    eps_r = np.asarray(eps_r, dtype=float)
+    h = np.asarray(h, dtype=float)
+    ft = np.clip(np.asarray(feed_type, dtype=int), 0, len(FEED_BW_FACTORS) - 1)
+
+    eps_eff = effective_permittivity(W, eps_r, h)
+    delta_L = 0.412 * h * ((eps_eff + 0.3)*(W/h + 0.264))/((eps_eff - 0.258)*(W/h + 0.8))
+    f_r = c / (2 * (L + 2*delta_L) * np.sqrt(eps_eff))
+    BW = (1.5 * h / W) * np.sqrt(eps_r) * f_r * FEED_BW_FACTORS[ft]
+    return f_r / 1e9, BW / 1e6
+
+
+# ranges of the synthetic dataset (generate-dataset.py), used to clip the analytic inverse
+ANALYTIC_EPS_R_RANGE = (2.0, 10.0)
+ANALYTIC_H_RANGE = (0.0005, 0.003)
+ANALYTIC_FEED_WIDTH_RANGE = (0.001, 0.006)
+ANALYTIC_EPS_R_PREFERRED = 4.4   # FR-4; tie-breaker among substrates that hit the bandwidth equally well
+ANALYTIC_EPS_R_GRID = np.linspace(*ANALYTIC_EPS_R_RANGE, 33)
+
+
+def microstrip_width(eps_r, h, z0=50.0):
+    """Hammerstad synthesis: width (m) of a z0-ohm microstrip line on (eps_r, h). Arrays broadcast."""
+    eps_r = np.asarray(eps_r, dtype=float)
+    h = np.asarray(h, dtype=float)
+    A = z0 / 60 * np.sqrt((eps_r + 1) / 2) + (eps_r - 1) / (eps_r + 1) * (0.23 + 0.11 / eps_r)
+    B = 377 * np.pi / (2 * z0 * np.sqrt(eps_r))
+    narrow = 8 * np.exp(A) / (np.exp(2 * A) - 2)
+    wide = 2 / np.pi * (B - 1 - np.log(2 * B - 1) + (eps_r - 1) / (2 * eps_r) * (np.log(B - 1) + 0.39 - 0.61 / eps_r))
+    return h * np.where(narrow < 2, narrow, wide)
+
+
+def _free_or_fixed(value, n):
+    """(n,) float array from None / scalar / array, NaN meaning "free"."""
+    if value is None:
+        return np.full(n, np.nan)
+    return np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+
+def valid_targets(freq_ghz, bw_mhz, eps_r=None, substrate_h=None):
+    """
+    (B,) mask of the targets analytic_inverse can design for: finite, positive freq / bw,
+    and eps_r >= 1 / substrate_h > 0 where they are fixed (NaN = free is fine).
+    """
+    f = np.atleast_1d(np.asarray(freq_ghz, dtype=float))
+    bw = np.broadcast_to(np.asarray(bw_mhz, dtype=float), f.shape)
+    eps = _free_or_fixed(eps_r, len(f))
+    h = _free_or_fixed(substrate_h, len(f))
+    with np.errstate(invalid="ignore"):
+        return ((np.isfinite(f) & (f > 0) & np.isfinite(bw) & (bw > 0)
+                 & (np.isnan(eps) | (np.isfinite(eps) & (eps >= 1)))
+                 & (np.isnan(h) | (np.isfinite(h) & (h > 0)))))
+
+
+def analytic_inverse(freq_ghz, bw_mhz, eps_r=None, substrate_h=None):
+    """
+    Closed-form inverse of the transmission-line model for arrays of targets.
+
+    For every target the resonance is met exactly by patch_dimensions(); the bandwidth
+    (1.5 h/W sqrt(eps_r) f x feed factor) is then matched by solving for h on each
+    candidate substrate (ANALYTIC_EPS_R_GRID, or the given eps_r) and feed type, clipped to
+    the dataset ranges, keeping the combination with the smallest bandwidth error. The
+    feed width is a 50-ohm line on the chosen substrate.
+    eps_r / substrate_h: None, scalar or (B,) array with NaN meaning "free".
+    Returns (params (B, 7) in [W, L, eps_eff, h, eps_r, feed_width, feed_type] order,
+    predicted (B, 2) [Fr_GHz, BW_MHz] of those params under patch_resonance).
+    Targets failing valid_targets raise ValueError for a scalar call; in a batch their
+    rows of params and predicted are NaN (valid_targets gives the same mask).
+    """
+    valid = valid_targets(freq_ghz, bw_mhz, eps_r, substrate_h)
+    if np.ndim(freq_ghz) == 0 and np.ndim(bw_mhz) == 0 and not valid.all():
+        raise ValueError(f"no design for freq_ghz={freq_ghz!r}, bw_mhz={bw_mhz!r}, eps_r={eps_r!r}, "
+                         f"substrate_h={substrate_h!r}: targets must be finite and positive")
+    f = np.atleast_1d(np.asarray(freq_ghz, dtype=float)) * 1e9
+    bw = np.broadcast_to(np.asarray(bw_mhz, dtype=float), f.shape) * 1e6
+    n = len(f)
+    eps_fixed = _free_or_fixed(eps_r, n)
+    h_fixed = _free_or_fixed(substrate_h, n)
+    # invalid rows are designed for a harmless stand-in target and blanked at the end
+    f = np.where(valid, f, 1e9)
+    bw = np.where(valid, bw, 1e6)
+    eps_fixed[~valid] = np.nan
+    h_fixed[~valid] = np.nan
+
+    # candidates: (n, n_eps, n_feed)
+    eps = np.where(np.isnan(eps_fixed)[:, None], ANALYTIC_EPS_R_GRID[None, :], eps_fixed[:, None])[:, :, None]
+    factors = FEED_BW_FACTORS[None, None, :]
+    f3 = f[:, None, None]
+    W = (c / (2 * f3)) * np.sqrt(2 / (eps + 1))
+    h_needed = bw[:, None, None] * W / (1.5 * np.sqrt(eps) * f3 * factors)
+    h = np.where(np.isnan(h_fixed)[:, None, None], np.clip(h_needed, *ANALYTIC_H_RANGE), h_fixed[:, None, None])
+    bw_got = (1.5 * h / W) * np.sqrt(eps) * f3 * factors
+    score = np.abs(bw_got - bw[:, None, None]) / bw[:, None, None]
+    # tie-breakers only: substrate closest to FR-4, then the lowest feed-type index
+    score = score + 1e-6 * np.abs(eps - ANALYTIC_EPS_R_PREFERRED) + 1e-9 * np.arange(len(FEED_BW_FACTORS))
+
+    flat = score.reshape(n, -1).argmin(axis=1)
+    i_eps, i_feed = np.unravel_index(flat, score.shape[1:])
+    rows = np.arange(n)
+    eps_best = np.broadcast_to(eps, score.shape)[rows, i_eps, i_feed]
+    h_best = h[rows, i_eps, i_feed]
+    W, L, eps_eff, _ = patch_dimensions(f, eps_best, h_best)
+    fw = np.clip(microstrip_width(eps_best, h_best), *ANALYTIC_FEED_WIDTH_RANGE)
+    params = np.column_stack([W, L, eps_eff, h_best, eps_best, fw, i_feed.astype(float)])
+    predicted = np.column_stack(patch_resonance(W, L, eps_best, h_best, i_feed))
+    params[~valid] = np.nan
+    predicted[~valid] = np.nan
+    return params, predicted
@@ -0,0 +1,224 @@
+"""
+Opt-in cProfile + tracemalloc hooks for TrainedAI and CSTDriver.
+
+Enable with the environment variable RDN_PROFILE (a directory, or "1" for ./profiles)
+before the classes are imported, or at runtime with enable_profiling(). Every public
+method call then writes <Class>.<method>.<id>.prof (cProfile) to the directory, and
+every RDN_PROFILE_MEM_EVERY-th call also writes a .tmsnap tracemalloc snapshot.
+When switched off the classes are returned untouched, so there is no overhead.
+
+tracemalloc is process-wide: calls that overlap (threads of serving.InferencePool) share
+one tracing session, started by the first active call and stopped when the last one
+ends, so the peak recorded for each of them is the process peak since that session
+began, not the call's own.
+
+Summarize many calls with:
+    python profiling.py summarize profiles --top 25
+"""
+import os
+import csv
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+PROFILE_ENV = "RDN_PROFILE"
+PROFILE_MEM_EVERY_ENV = "RDN_PROFILE_MEM_EVERY"
+PROFILE_DEFAULT_DIR = "profiles"
+PROFILE_INDEX = "calls.csv"
+TRACEMALLOC_FRAMES = 8
+
+# keep the profiler's own bookkeeping out of the allocation snapshots
+_SNAPSHOT_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__),
+                     tracemalloc.Filter(False, cProfile.__file__),
+                     tracemalloc.Filter(False, __file__)]
+_originals = {}                 # (class, method name) -> original function, for disable_profiling()
+_state = threading.local()      # nesting depth per thread: only the outermost public call is profiled
+_counter_lock = threading.Lock()
+_call_counter = [0]
+_trace_lock = threading.Lock()
+_tracing = {"calls": 0, "owned": False}   # snapshot calls in flight; whether we started tracemalloc
+
+
+def profiling_dir():
+    """Output directory requested through RDN_PROFILE, or None when profiling is off."""
+    value = os.environ.get(PROFILE_ENV, "").strip()
+    if not value or value == "0":
+        return None
+    return PROFILE_DEFAULT_DIR if value == "1" else value
+
+
+def maybe_profile(cls):
+    """Class decorator: wraps public methods only when RDN_PROFILE is set at import time."""
+    out_dir = profiling_dir()
+    if out_dir is None:
+        return cls
+    return profile_methods(cls, out_dir)
+
+
+def enable_profiling(out_dir=PROFILE_DEFAULT_DIR, classes=None, mem_every=None):
+    """
+    API switch: patch the public methods of `classes` (default TrainedAI and CSTDriver)
+    in place. Instances that already exist are affected too.
+    """
+    if mem_every is not None:
+        os.environ[PROFILE_MEM_EVERY_ENV] = str(mem_every)
+    if classes is None:
+        from RDN_AI import TrainedAI
+        from cst_interface.cst_driver import CSTDriver
+        classes = [TrainedAI, CSTDriver]
+    for cls in classes:
+        profile_methods(cls, out_dir)
+    return out_dir
+
+
+def disable_profiling():
+    for (cls, name), fn in list(_originals.items()):
+        setattr(cls, name, fn)
+        del _originals[(cls, name)]
+
+
+def profile_methods(cls, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("_") or not callable(fn) or (cls, name) in _originals:
+            continue
+        _originals[(cls, name)] = fn
+        setattr(cls, name, _profiled(cls.__name__, name, fn, out_dir))
+    return cls
+
+
+def _start_tracing():
+    """Join the shared tracing session, starting it (and its peak) for the first active call."""
+    with _trace_lock:
+        if _tracing["calls"] == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                _tracing["owned"] = True
+            tracemalloc.reset_peak()
+        _tracing["calls"] += 1
+
+
+def _stop_tracing():
+    """Leave the tracing session; the last call out stops tracemalloc if the profiler started it."""
+    with _trace_lock:
+        _tracing["calls"] -= 1
+        if _tracing["calls"] == 0 and _tracing["owned"]:
+            tracemalloc.stop()
+            _tracing["owned"] = False
+
+
+def _profiled(cls_name, name, fn, out_dir):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        depth = getattr(_state, "depth", 0)
+        if depth:
+            # nested public call (e.g. simulate -> standard_antenna): part of the outer profile
+            return fn(*args, **kwargs)
+        with _counter_lock:
+            _call_counter[0] += 1
+            call_id = _call_counter[0]
+        mem_every = int(os.environ.get(PROFILE_MEM_EVERY_ENV, "1") or 1)
+        take_snapshot = mem_every > 0 and call_id % mem_every == 0
+        if take_snapshot:
+            _start_tracing()
+
+        prof = cProfile.Profile()
+        _state.depth = 1
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            elapsed = time.perf_counter() - t0
+            _state.depth = 0
+            stem = f"{cls_name}.{name}.{os.getpid()}-{call_id}"
+            peak = 0
+            try:
+                prof.dump_stats(os.path.join(out_dir, stem + ".prof"))
+                if take_snapshot:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+                    snapshot.dump(os.path.join(out_dir, stem + ".tmsnap"))
+                _append_index(out_dir, [stem, f"{cls_name}.{name}", time.time(), elapsed, peak])
+            except Exception as e:
+                print("[profiling] failed to write profile:", e)
+            finally:
+                if take_snapshot:
+                    _stop_tracing()
+    return wrapper
+
+
+def _append_index(out_dir, row):
+    path = os.path.join(out_dir, PROFILE_INDEX)
+    with _counter_lock:
+        exists = os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if not exists:
+                writer.writerow(["stem", "method", "timestamp", "wall_s", "peak_traced_bytes"])
+            writer.writerow(row)
+
+
+# ---------- summarizer ----------
+def summarize(out_dir=PROFILE_DEFAULT_DIR, top=20, method=None, sort="cumulative"):
+    """
+    Print per-method call counts and wall time, the top functions over every .prof dump
+    (merged with pstats) and the top allocation sites over every .tmsnap snapshot.
+    method restricts everything to one "Class.method".
+    """
+    import pstats
+    import linecache
+
+    index = os.path.join(out_dir, PROFILE_INDEX)
+    if os.path.exists(index):
+        per_method = {}
+        with open(index, newline="") as f:
+            for row in csv.DictReader(f):
+                if method and row["method"] != method:
+                    continue
+                calls, total, peak = per_method.get(row["method"], (0, 0.0, 0))
+                per_method[row["method"]] = (calls + 1, total + float(row["wall_s"]),
+                                             max(peak, int(row["peak_traced_bytes"])))
+        print(f"{'method':<40}{'calls':>8}{'total s':>12}{'mean s':>10}{'peak MiB':>10}")
+        for name, (calls, total, peak) in sorted(per_method.items(), key=lambda kv: -kv[1][1]):
+            print(f"{name:<40}{calls:>8}{total:>12.3f}{total / calls:>10.4f}{peak / 2**20:>10.1f}")
+
+    files = sorted(os.listdir(out_dir))
+    prefix = (method + ".") if method else ""
+    profs = [os.path.join(out_dir, f) for f in files if f.endswith(".prof") and f.startswith(prefix)]
+    if profs:
+        print(f"\nTop {top} functions over {len(profs)} calls (sorted by {sort}):")
+        stats = pstats.Stats(profs[0])
+        for path in profs[1:]:
+            stats.add(path)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    snaps = [os.path.join(out_dir, f) for f in files if f.endswith(".tmsnap") and f.startswith(prefix)]
+    if snaps:
+        sites = {}
+        for path in snaps:
+            for stat in tracemalloc.Snapshot.load(path).statistics("lineno"):
+                frame = stat.traceback[0]
+                key = (frame.filename, frame.lineno)
+                size, count = sites.get(key, (0, 0))
+                sites[key] = (size + stat.size, count + stat.count)
+        print(f"Top {top} allocation sites over {len(snaps)} snapshots (live bytes summed):")
+        for (filename, lineno), (size, count) in sorted(sites.items(), key=lambda kv: -kv[1][0])[:top]:
+            line = linecache.getline(filename, lineno).strip()
+            print(f"{size / 2**20:>10.2f} MiB {count:>9} blocks  {os.path.basename(filename)}:{lineno}  {line}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarize TrainedAI / CSTDriver profile dumps.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("summarize")
+    s.add_argument("out_dir", nargs="?", default=PROFILE_DEFAULT_DIR)
+    s.add_argument("--top", type=int, default=20)
+    s.add_argument("--method", default=None, help='only this "Class.method"')
+    s.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, ...)")
+    args = parser.parse_args()
+    summarize(args.out_dir, args.top, args.method, args.sort)
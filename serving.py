@@ -0,0 +1,90 @@
+"""
+Concurrency-safe access to the surrogates for the multi-session (Flet web) GUI.
+
+InferencePool keeps a fixed number of TrainedAI instances and lends one out per method
+call, so no two threads ever run predict() on the same Keras model, and at most `size`
+inference calls run at once (the rest queue). It forwards method calls, so existing
+code can swap `ai = TrainedAI()` for `ai = InferencePool()` unchanged (data attributes
+such as encoder are per instance and are not forwarded; lease() one to read them):
+
+    ai = InferencePool(size=4, inference_mode="float16")
+    opt = ai.optimize_parameters(2.4, 100)          # leases an instance for this call only
+
+Feedback rows from every instance go through RDN_AI.FEEDBACK_LOCK and retraining through
+RDN_AI.RETRAIN_LOCK, so concurrent sessions cannot interleave CSV rows or retrain twice.
+A multifidelity refit replaces the model only on the instance that ran it; the others
+pick it up when the pool is rebuilt. SessionRegistry gives every GUI session its own
+job ids and stops two sessions from driving the same checkpointed job.
+"""
+import os
+import queue
+import threading
+import contextlib
+
+AI_POOL_SIZE = int(os.environ.get("RDN_AI_POOL_SIZE", "2"))
+CST_CONCURRENT_SOLVES = int(os.environ.get("RDN_CST_SOLVES", "1"))   # CST licences available
+
+
+class InferencePool:
+    def __init__(self, size=AI_POOL_SIZE, factory=None, **ai_kwargs):
+        if factory is None:
+            from RDN_AI import TrainedAI
+            factory = TrainedAI
+        self.size = size
+        self._free = queue.Queue()
+        for _ in range(size):
+            self._free.put(factory(**ai_kwargs))
+        self._ai_type = type(self._free.queue[0]) if size else object
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.waits = 0
+
+    @contextlib.contextmanager
+    def lease(self, timeout=None):
+        """Borrow one instance exclusively; blocks while all `size` instances are busy."""
+        try:
+            ai = self._free.get_nowait()
+        except queue.Empty:
+            with self._stats_lock:
+                self.waits += 1
+            ai = self._free.get(timeout=timeout)
+        try:
+            yield ai
+        finally:
+            self._free.put(ai)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(self._ai_type, name, None)):
+            raise AttributeError(f"InferencePool forwards only methods of {self._ai_type.__name__}, not {name!r}")
+
+        def call(*args, **kwargs):
+            with self.lease() as ai:
+                with self._stats_lock:
+                    self.calls += 1
+                return getattr(ai, name)(*args, **kwargs)
+        return call
+
+
+class SessionRegistry:
+    """Which session currently drives which design job (design_checkpoint.py ids)."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner = {}
+
+    def claim(self, job_id, session_id):
+        """True if job_id is now owned by session_id; False if another session is running it."""
+        with self._lock:
+            owner = self._owner.get(job_id)
+            if owner is not None and owner != session_id:
+                return False
+            self._owner[job_id] = session_id
+            return True
+
+    def release(self, job_id, session_id=None):
+        with self._lock:
+            if session_id is None or self._owner.get(job_id) == session_id:
+                self._owner.pop(job_id, None)
+
+    def running(self):
+        with self._lock:
+            return dict(self._owner)
@@ -0,0 +1,170 @@
+"""
+Full-spectrum S11 surrogate: design -> S11 (dB) on a fixed frequency grid, plus
+vectorized band metrics for thousands of curves at once.
+
+A resonance moves by many grid points across the design space, which a network
+predicting the raw grid (or a PCA of it) learns poorly. The curve is therefore modelled
+in resonance-centred coordinates: the net predicts the log-correction of Fr and of the
+band scale relative to the closed-form patch model (as in multifidelity.py) and a few
+PCA coefficients of the curve shape sampled at fixed detunings SHAPE_U (in units of the
+band scale) around Fr. predict() rebuilds every curve on the frequency grid with one
+matrix product and one vectorized interpolation, so screening N candidates is a single
+batched pass followed by band_metrics().
+"""
+import os
+import numpy as np
+from patch_analytic import patch_resonance
+from multifidelity import _split_inputs
+
+SPECTRUM_GRID_GHZ = np.linspace(0.5, 6.5, 1201)     # 5 MHz steps; must stay uniform
+SPECTRUM_MODEL_PATH = os.path.join("models", "spectrum", "spectrum_surrogate.save")
+SHAPE_U = np.linspace(-6.0, 6.0, 121)               # detuning in band scales, uniform
+SPECTRUM_MAX_BANDS = 4
+
+
+def _lerp_rows(x_grid, values, x):
+    """
+    Row-wise linear interpolation on a uniform x_grid: values (N, K), x (N, M) -> (N, M).
+    Points outside the grid take the edge value (np.interp semantics).
+    """
+    dx = x_grid[1] - x_grid[0]
+    pos = np.clip((x - x_grid[0]) / dx, 0, len(x_grid) - 1)
+    i0 = np.minimum(pos.astype(int), len(x_grid) - 2)
+    w = pos - i0
+    left = np.take_along_axis(values, i0, axis=1)
+    right = np.take_along_axis(values, i0 + 1, axis=1)
+    return left * (1 - w) + right * w
+
+
+def band_metrics(grid_ghz, s11_db, threshold=-10.0, max_bands=SPECTRUM_MAX_BANDS):
+    """
+    Band metrics of N curves on a uniform grid, without Python loops over curves.
+    Returns a dict of arrays:
+      Fr_GHz, S11_min_dB           (N,)  location / depth of the global minimum
+      BW_MHz                       (N,)  width of the below-threshold band containing Fr (0 if none)
+      n_bands                      (N,)  number of separate below-threshold bands
+      band_lo_GHz, band_hi_GHz     (N, max_bands)  band edges, NaN where absent
+      band_bw_MHz                  (N, max_bands)  per-band bandwidth, 0 where absent
+    Band edges are linearly interpolated at the threshold crossing.
+    """
+    grid = np.asarray(grid_ghz, dtype=float)
+    s = np.atleast_2d(np.asarray(s11_db, dtype=float))
+    N, G = s.shape
+    rows = np.arange(N)
+    dg = grid[1] - grid[0]
+
+    imin = s.argmin(axis=1)
+    mask = s <= threshold
+    prev = np.zeros_like(mask)
+    prev[:, 1:] = mask[:, :-1]
+    nxt = np.zeros_like(mask)
+    nxt[:, :-1] = mask[:, 1:]
+    starts = mask & ~prev
+    ends = mask & ~nxt
+    label = np.cumsum(starts, axis=1) * mask           # 1..n inside bands, 0 outside
+
+    def edge_freqs(flags, lower):
+        r, i = np.nonzero(flags)
+        rank = label[r, i] - 1
+        if lower:
+            j = np.maximum(i - 1, 0)
+            t = np.where(i > 0, (threshold - s[r, j]) / np.where(s[r, i] != s[r, j], s[r, i] - s[r, j], 1.0), 1.0)
+            f = grid[j] + t * dg * (i > 0)
+        else:
+            j = np.minimum(i + 1, G - 1)
+            t = np.where(i < G - 1, (threshold - s[r, i]) / np.where(s[r, j] != s[r, i], s[r, j] - s[r, i], 1.0), 0.0)
+            f = grid[i] + t * dg
+        out = np.full((N, max_bands), np.nan)
+        keep = rank < max_bands
+        out[r[keep], rank[keep]] = f[keep]
+        return out
+
+    lo = edge_freqs(starts, lower=True)
+    hi = edge_freqs(ends, lower=False)
+    band_bw = np.nan_to_num(hi - lo) * 1e3
+    in_band = label[rows, imin]
+    bw = np.where((in_band > 0) & (in_band <= max_bands),
+                  band_bw[rows, np.clip(in_band - 1, 0, max_bands - 1)], 0.0)
+    return {
+        "Fr_GHz": grid[imin],
+        "S11_min_dB": s[rows, imin],
+        "BW_MHz": bw,
+        "n_bands": starts.sum(axis=1),
+        "band_lo_GHz": lo,
+        "band_hi_GHz": hi,
+        "band_bw_MHz": band_bw,
+    }
+
+
+class SpectrumSurrogate:
+    """
+    fit()/predict() take the same unscaled input rows as the forward network
+    ([W, L, eps_eff, h, eps_r, feed_width] + one-hot feed type, see multifidelity.forward_rows).
+    """
+    def __init__(self, grid=SPECTRUM_GRID_GHZ, n_components=12, hidden_layer_sizes=(64, 64),
+                 alpha=1e-4, random_state=42):
+        self.grid = np.asarray(grid, dtype=float)
+        self.n_components = n_components
+        self.hidden_layer_sizes = hidden_layer_sizes
+        self.alpha = alpha
+        self.random_state = random_state
+        self.net = None
+
+    def _prior(self, X):
+        W, L, h, eps_r, fw, feed_type = _split_inputs(X)
+        Fr, BW = patch_resonance(W, L, eps_r, h, feed_type)
+        return Fr, BW / 1e3
+
+    def _features(self, X, Fr_lf, BW_lf):
+        W, L, h, eps_r, fw, feed_type = _split_inputs(X)
+        onehot = np.eye(4)[np.clip(feed_type, 0, 3)]
+        return np.column_stack([np.log(W), np.log(L), np.log(h), np.log(eps_r), np.log(fw),
+                                np.log(Fr_lf), np.log(BW_lf), onehot])
+
+    def fit(self, X, S):
+        """X: (n, 10) input rows, S: (n, len(grid)) S11 in dB on self.grid (e.g. S11Store.resampled)."""
+        from sklearn.neural_network import MLPRegressor
+        S = np.asarray(S, dtype=float)
+        Fr_lf, BW_lf = self._prior(X)
+        m = band_metrics(self.grid, S)
+        scale = np.where(m["BW_MHz"] > 0, m["BW_MHz"] / 1e3, BW_lf)
+        shapes = _lerp_rows(self.grid, S, m["Fr_GHz"][:, None] + SHAPE_U[None, :] * scale[:, None])
+        self.shape_mean = shapes.mean(axis=0)
+        _, _, Vt = np.linalg.svd(shapes - self.shape_mean, full_matrices=False)
+        self.components = Vt[:self.n_components]
+        coeffs = (shapes - self.shape_mean) @ self.components.T
+
+        T = np.column_stack([np.log(m["Fr_GHz"] / Fr_lf), np.log(scale / BW_lf), coeffs])
+        F = self._features(X, Fr_lf, BW_lf)
+        self.f_mean, self.f_std = F.mean(axis=0), F.std(axis=0) + 1e-9
+        self.t_mean, self.t_std = T.mean(axis=0), T.std(axis=0) + 1e-9
+        self.net = MLPRegressor(hidden_layer_sizes=self.hidden_layer_sizes, alpha=self.alpha,
+                                max_iter=500, early_stopping=True, random_state=self.random_state)
+        self.net.fit((F - self.f_mean) / self.f_std, (T - self.t_mean) / self.t_std)
+        return self
+
+    def predict(self, X, verbose=None):
+        """(n, len(grid)) predicted S11 in dB."""
+        if self.net is None:
+            raise RuntimeError("SpectrumSurrogate is not fitted.")
+        Fr_lf, BW_lf = self._prior(X)
+        F = (self._features(X, Fr_lf, BW_lf) - self.f_mean) / self.f_std
+        T = self.net.predict(F).reshape(len(F), -1) * self.t_std + self.t_mean
+        Fr = Fr_lf * np.exp(T[:, 0])
+        scale = BW_lf * np.exp(T[:, 1])
+        shapes = self.shape_mean + T[:, 2:] @ self.components
+        u = (self.grid[None, :] - Fr[:, None]) / scale[:, None]
+        return _lerp_rows(SHAPE_U, shapes, u)
+
+    def predict_metrics(self, X, threshold=-10.0):
+        return band_metrics(self.grid, self.predict(X), threshold)
+
+    def save(self, path=SPECTRUM_MODEL_PATH):
+        import joblib
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=SPECTRUM_MODEL_PATH):
+        import joblib
+        return joblib.load(path)
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class StackedMLP:
+    """
+    K dense ReLU networks of identical shape evaluated together with numpy.
+    Weights are stacked per layer as kernels (K, n_in, n_out) and biases (K, n_out),
+    so one predict() call runs every member over the whole batch with one einsum per
+    layer instead of K separate Keras dispatches. The last layer is linear, as in
+    build_model() of ai_training/forward-predict.py.
+    """
+    def __init__(self, kernels, biases):
+        self.kernels = [np.asarray(k, dtype=np.float32) for k in kernels]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+
+    @property
+    def n_members(self):
+        return self.kernels[0].shape[0]
+
+    def predict(self, X):
+        """X: (n, n_in) already scaled. Returns (K, n, n_out)."""
+        h = np.asarray(X, dtype=np.float32)
+        h = np.einsum("ni,kio->kno", h, self.kernels[0]) + self.biases[0][:, None, :]
+        for kernel, bias in zip(self.kernels[1:], self.biases[1:]):
+            h = np.maximum(h, 0.0)
+            h = np.einsum("kni,kio->kno", h, kernel) + bias[:, None, :]
+        return h
+
+    def save(self, path):
+        arrays = {}
+        for i, (k, b) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{i}"] = k
+            arrays[f"bias_{i}"] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_layers = len([k for k in data.files if k.startswith("kernel_")])
+            kernels = [data[f"kernel_{i}"] for i in range(n_layers)]
+            biases = [data[f"bias_{i}"] for i in range(n_layers)]
+        return cls(kernels, biases)
+
+    @classmethod
+    def from_keras(cls, models):
+        """Stack the Dense layers of several Keras models with the same architecture."""
+        per_model = [[layer.get_weights() for layer in m.layers if layer.get_weights()] for m in models]
+        kernels = [np.stack([w[i][0] for w in per_model]) for i in range(len(per_model[0]))]
+        biases = [np.stack([w[i][1] for w in per_model]) for i in range(len(per_model[0]))]
+        return cls(kernels, biases)
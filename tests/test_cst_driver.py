@@ -0,0 +1,132 @@
+"""Solver window, edge expansion, S11 metrics and macro text of cst_driver, without CST."""
+import numpy as np
+import pytest
+
+from cst_interface.cst_driver import (CSTDriver, solver_window, expand_window_if_edge, s11_metrics,
+                                      SOLVER_MIN_HALF_SPAN, SOLVER_BW_FACTOR, SOLVER_SIGMA_FACTOR,
+                                      SOLVER_EXPAND_FACTOR)
+
+
+def lorentzian(freqs, f0, half_width, depth=-30.0):
+    """S11 in dB with its minimum `depth` at f0; -10 dB is crossed at f0 +- sqrt(2) half_width for depth -30."""
+    return depth / (1 + ((freqs - f0) / half_width) ** 2)
+
+
+# ----- solver_window -----
+def test_window_without_prediction():
+    assert solver_window(None) is None
+
+
+def test_window_from_prediction_without_std():
+    f_lo, f_hi = solver_window(2.4, 100.0)
+    half = SOLVER_BW_FACTOR * 0.1
+    assert f_lo == pytest.approx(2.4 - half)
+    assert f_hi == pytest.approx(2.4 + half)
+
+
+def test_window_never_narrower_than_minimum():
+    assert solver_window(2.4, 1.0) == pytest.approx((2.4 - SOLVER_MIN_HALF_SPAN, 2.4 + SOLVER_MIN_HALF_SPAN))
+
+
+def test_window_from_prediction_with_std():
+    f_lo, f_hi = solver_window(2.4, 100.0, fr_std_ghz=0.01, bw_std_mhz=10.0)
+    half = SOLVER_BW_FACTOR * (100.0 + 2 * 10.0) / 1e3 + SOLVER_SIGMA_FACTOR * 0.01
+    assert (f_lo, f_hi) == pytest.approx((2.4 - half, 2.4 + half))
+    base_lo, base_hi = solver_window(2.4, 100.0)
+    assert f_hi - f_lo > base_hi - base_lo
+
+
+# ----- expand_window_if_edge -----
+@pytest.fixture
+def window():
+    return 2.0, 3.0
+
+
+@pytest.fixture
+def freqs(window):
+    return np.linspace(*window, 1001)
+
+
+def test_no_expansion_when_minimum_inside(window, freqs):
+    assert expand_window_if_edge(freqs, lorentzian(freqs, 2.5, 0.02), window) is None
+
+
+def test_expands_low_side_when_minimum_on_lower_edge(window, freqs):
+    grow = (SOLVER_EXPAND_FACTOR - 1) * (window[1] - window[0])
+    assert expand_window_if_edge(freqs, lorentzian(freqs, 2.01, 0.02), window) == pytest.approx(
+        (window[0] - grow, window[1]))
+
+
+def test_expands_high_side_when_minimum_on_upper_edge(window, freqs):
+    grow = (SOLVER_EXPAND_FACTOR - 1) * (window[1] - window[0])
+    assert expand_window_if_edge(freqs, lorentzian(freqs, 2.99, 0.02), window) == pytest.approx(
+        (window[0], window[1] + grow))
+
+
+def test_expands_when_band_runs_past_an_edge(window, freqs):
+    # minimum well inside, but the -10 dB band is still below threshold at the upper edge
+    lo, hi = expand_window_if_edge(freqs, lorentzian(freqs, 2.8, 0.3), window)
+    assert lo == window[0] and hi > window[1]
+
+
+def test_expansion_keeps_f_min_positive():
+    freqs = np.linspace(0.2, 0.4, 201)
+    lo, _ = expand_window_if_edge(freqs, lorentzian(freqs, 0.2, 0.01), (0.2, 0.4))
+    assert lo == pytest.approx(0.1)
+
+
+# ----- s11_metrics -----
+def test_metrics_of_lorentzian():
+    freqs = np.linspace(1.0, 4.0, 30001)
+    Fr, BW, S11_min = s11_metrics(freqs, lorentzian(freqs, 2.45, 0.05))
+    assert Fr == pytest.approx(2.45, abs=1e-4)
+    assert BW == pytest.approx(2 * np.sqrt(2) * 0.05, abs=2e-4)
+    assert S11_min == pytest.approx(-30.0)
+
+
+def test_metrics_without_band():
+    freqs = np.linspace(1.0, 4.0, 301)
+    Fr, BW, S11_min = s11_metrics(freqs, lorentzian(freqs, 2.0, 0.05, depth=-6.0))
+    assert Fr == pytest.approx(2.0)
+    assert BW == 0.0
+    assert S11_min == pytest.approx(-6.0)
+
+
+# ----- macro text -----
+@pytest.fixture
+def driver():
+    return CSTDriver()
+
+
+def test_solver_range_macro_text(driver):
+    macro = driver.format_command("set solver freq range", **driver.solver_range_kwargs((2.1, 2.7)))
+    assert macro.splitlines()[0] == "With Solver"
+    assert '.FrequencyRange "2.1000", "2.7000"' in macro
+    assert macro.splitlines()[-1].strip() == "End With"
+
+
+def test_patch_commands_use_the_window(driver):
+    params = {"patch_W": 0.038, "patch_L": 0.029, "substrate_h": 0.0016,
+              "substrate_W": 0.0476, "substrate_L": 0.0386, "feed_width": 0.003}
+    window = solver_window(2.4, 100.0)
+    commands = driver.patch_antenna_commands(2.4, "FR-4 (lossy)", "Copper (annealed)", params, freq_window=window)
+    names = [name for name, _ in commands]
+    assert names[-1] == "run Solver"
+    kwargs = dict(commands)["set solver freq range"]
+    assert kwargs == {"resonant_frequency1": f"{window[0]:.4f}", "resonant_frequency2": f"{window[1]:.4f}"}
+    # default window when no prediction is given
+    default = dict(driver.patch_antenna_commands(2.4, "FR-4 (lossy)", "Copper (annealed)", params))
+    assert default["set solver freq range"] == {"resonant_frequency1": "1.4000", "resonant_frequency2": "3.4000"}
+    # every macro formats without a missing placeholder
+    for name, kwargs in commands:
+        driver.format_command(name, **kwargs)
+
+
+def test_patch_commands_are_pure(driver):
+    params = {"patch_W": 0.038, "patch_L": 0.029, "substrate_h": 0.0016,
+              "substrate_W": 0.0476, "substrate_L": 0.0386, "feed_width": 0.003}
+    args = (2.4, "FR-4 (lossy)", "Copper (annealed)", params, (2.1, 2.7))
+    assert driver.patch_antenna_commands(*args) == driver.patch_antenna_commands(*args)
+    name, brick = driver.patch_antenna_commands(*args)[2]
+    assert name == "define brick"
+    assert (brick["solid_name"], brick["x1"], brick["x2"], brick["z1"]) == ("patch", "-19.0000", "19.0000", "1.6000")